@@ -2,25 +2,152 @@
 ADMIN CONTROL PANEL – PRODUCTION READY (FINAL)
 
 Features (FULLY INTEGRATED):
-✔ Manual refresh: Sector / ETF / Both
+✔ Manual refresh: Sector / ETF / Both / Stale only
 ✔ Automatic hourly refresh during market hours
-✔ Market hours aware (9:15–15:30 IST, Mon–Fri)
-✔ AngelOne secure connection
+✔ Market hours aware (9:15–15:30 IST, NSE trading days only)
+✔ AngelOne secure connection (one shared session, auto-renewed)
 ✔ Persistent timestamps via DataRefreshTracker
 ✔ Subscriber + Admin views always consistent
-✔ Fly.io safe (no background threads)
+✔ Sector + ETF refresh run concurrently in one background job (shared
+  rate limiter), progress polled without blocking the page
+✔ Opt-in hot-path timings (fetch / compute / validation / I/O spans)
+✔ Opt-in per-rerun profiler (top functions, file reads, tab times)
 """
 
+import json
 import streamlit as st
-from datetime import datetime, time as dt_time
+from datetime import datetime
 import pytz
 import pandas as pd
 
 from data_refresh_tracker import DataRefreshTracker
 from api_connector import AngelOneConnector
-from rs_analyzer import SectorRSAnalyzer
-from etf_rs_calculator import calculate_etf_rs
-from config import SECTOR_TOKENS, BENCHMARK_TOKENS
+from refresh_orchestrator import ETFS, SECTORS, RefreshOrchestrator, get_refresh_job, start_refresh
+from universe_rs import run_universe_rs
+from live_ticks import default_live_instruments, derive_live_metrics, start_live_feed, stop_live_feed
+from token_health import get_health_board
+from broker_session import get_broker_session
+from trading_calendar import get_trading_calendar
+from freshness import freshness_table
+from data_version import publish_results
+from metrics import get_registry, is_enabled, set_enabled
+from rerun_profiler import load_profiles
+from config import SECTOR_TOKENS, BENCHMARK_TOKENS, REFRESH_PROGRESS_POLL_SECONDS
+
+# =============================================================================
+# HOT-PATH TIMINGS
+# =============================================================================
+
+def _label_text(labels):
+    return ", ".join(f"{k}={v}" for k, v in sorted(labels.items()))
+
+
+def _span_table(snapshot):
+    """One row per span series, slowest total first."""
+    rows = [
+        {
+            "Span": span["name"],
+            "Labels": _label_text(span["labels"]),
+            "Count": span["count"],
+            "Total (s)": round(span["sum"], 3),
+            "Mean (ms)": round(span["sum"] / span["count"] * 1000, 2) if span["count"] else 0.0,
+            "Max (ms)": round(span["max"] * 1000, 2),
+        }
+        for span in snapshot["spans"]
+    ]
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).sort_values("Total (s)", ascending=False)
+
+
+def render_metrics_panel():
+    st.markdown("#### ⏱️ Hot-path Timings")
+    enabled = st.toggle("Collect timings", value=is_enabled(), key="metrics_enabled")
+    if enabled != is_enabled():
+        set_enabled(enabled)
+
+    registry = get_registry()
+    snapshot = registry.snapshot()
+    if not snapshot["spans"] and not snapshot["counters"]:
+        st.info("No timings recorded" if enabled else "Timing collection is off")
+        return
+
+    st.dataframe(_span_table(snapshot), width="stretch", hide_index=True)
+    if snapshot["counters"]:
+        st.dataframe(
+            pd.DataFrame([
+                {"Counter": c["name"], "Labels": _label_text(c["labels"]), "Value": c["value"]}
+                for c in snapshot["counters"]
+            ]),
+            width="stretch",
+            hide_index=True,
+        )
+
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        "⬇️ Download JSON",
+        json.dumps(snapshot, indent=2),
+        file_name="metrics.json",
+        mime="application/json",
+    )
+    if col2.button("🧹 Reset timings"):
+        registry.reset()
+        registry.dump()
+        st.rerun()
+    registry.dump()
+
+# =============================================================================
+# RERUN PROFILER
+# =============================================================================
+
+def _profile_history(records):
+    return pd.DataFrame([
+        {
+            "At": datetime.fromtimestamp(r["at"], IST).strftime("%H:%M:%S"),
+            "Page": r["page"],
+            "Total (s)": r["total_seconds"],
+            "File opens": r["file_opens"],
+            "Parses": r["parses"],
+            "Slowest section": max(r["sections"], key=r["sections"].get) if r["sections"] else "-",
+        }
+        for r in records
+    ])
+
+
+def render_profile_panel(record):
+    """Collapsible summary of one profiled rerun plus the recent history."""
+    if not record:
+        return
+    with st.expander(f"🧪 Rerun profile – {record['total_seconds']:.2f} s", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rerun time", f"{record['total_seconds']:.2f} s")
+        col2.metric("File opens", record["file_opens"])
+        col3.metric("CSV / JSON parses", record["parses"])
+
+        if record["sections"]:
+            st.markdown("**Sections**")
+            st.dataframe(
+                pd.DataFrame(
+                    sorted(record["sections"].items(), key=lambda kv: -kv[1]),
+                    columns=["Section", "Seconds"],
+                ),
+                width="stretch",
+                hide_index=True,
+            )
+        if record["reads_by_caller"]:
+            st.markdown("**Reads / parses by caller**")
+            st.dataframe(
+                pd.DataFrame(list(record["reads_by_caller"].items()), columns=["Caller", "Count"]),
+                width="stretch",
+                hide_index=True,
+            )
+        st.markdown(f"**Top {len(record['top'])} functions by cumulative time**")
+        st.dataframe(pd.DataFrame(record["top"]), width="stretch", hide_index=True)
+
+        history = load_profiles(limit=20)
+        if len(history) > 1:
+            st.markdown("**Recent profiled reruns**")
+            st.dataframe(_profile_history(history), width="stretch", hide_index=True)
 
 # =============================================================================
 # TIMEZONE & MARKET HOURS
@@ -29,54 +156,155 @@ from config import SECTOR_TOKENS, BENCHMARK_TOKENS
 IST = pytz.timezone("Asia/Kolkata")
 
 def is_market_hours(now=None):
-    if now is None:
-        now = datetime.now(IST)
-
-    market_start = dt_time(9, 15)
-    market_end = dt_time(15, 30)
-
-    return (
-        now.weekday() < 5 and
-        market_start <= now.time() <= market_end
-    )
+    return get_trading_calendar().is_open(now)
 
 # =============================================================================
 # CORE REFRESH ENGINE (SINGLE SOURCE)
 # =============================================================================
 
-def refresh_all_data(connector, run_sector=True, run_etf=True, is_auto=False):
-    now = datetime.now(IST)
+def attach_shared_session():
+    """Point this browser session at the shared (renewed) broker session."""
+    connector = get_broker_session().connector()
+    st.session_state.admin_connector = connector
+    st.session_state.admin_connected = connector is not None
+    return connector
+
+
+def _refresh_args(connector, is_auto, fast, now):
+    # Renew the shared session's JWT first if it is close to expiry
+    connector = get_broker_session().connector() or connector
+
+    # Intraday auto refreshes only need today's price: LTP fast mode
+    if fast is None:
+        fast = is_auto and is_market_hours(now)
+    return connector, fast
+
+
+def track_refresh(results, run_sector=True, run_etf=True):
+    """
+    Publish whatever a refresh produced (shared CSV + data version bump, so
+    subscriber sessions pick it up) and persist refresh timestamps. Results
+    identical to the last publish are skipped entirely.
+    """
+    changed = []
+    for kind, requested in ((SECTORS, run_sector), (ETFS, run_etf)):
+        if requested and results.get(kind) is not None:
+            if publish_results(kind, results[kind]) is not None:
+                DataRefreshTracker.save_refresh(kind)
+                changed.append(kind)
+    if run_sector and run_etf and changed:
+        DataRefreshTracker.save_refresh("comprehensive")
+    return changed
 
-    # ---------------- Sector Analysis ----------------
-    if run_sector:
-        analyzer = SectorRSAnalyzer(connector, SECTOR_TOKENS)
-        df_sector = analyzer.analyze(
-            BENCHMARK_TOKENS["NIFTY 50"]["token"],
-            [21, 55, 123],
-            None
-        )
 
-        if df_sector is None or df_sector.empty:
-            return False, "Sector analysis returned no data"
+def apply_refresh_results(results, run_sector=True, run_etf=True, is_auto=False, partial=False, now=None):
+    """Publish refresh results into this browser session."""
+    now = now or datetime.now(IST)
+    df_sector = results.get(SECTORS)
+    df_etf = results.get(ETFS)
 
+    if run_sector and df_sector is not None:
         st.session_state.analysis_results = df_sector
-        DataRefreshTracker.save_refresh("sectors")
+    if run_etf and df_etf is not None:
+        st.session_state.etf_rs = df_etf
 
-    # ---------------- ETF Analysis ----------------
-    if run_etf:
-        df_etf = calculate_etf_rs(connector.smartapi, "ETFs-List_updated.csv")
-        if df_etf is not None and not df_etf.empty:
-            st.session_state.etf_rs = df_etf
-            DataRefreshTracker.save_refresh("etfs")
+    if run_sector and df_sector is None:
+        return False, "Sector analysis returned no data"
 
-    # ---------------- Comprehensive ----------------
-    if run_sector and run_etf:
-        DataRefreshTracker.save_refresh("comprehensive")
+    mode = "Auto" if is_auto else ("Partial" if partial else "Manual")
+    return True, f"{mode} refresh completed at {now.strftime('%H:%M:%S IST')}"
 
+
+def refresh_all_data(connector, run_sector=True, run_etf=True, is_auto=False, fast=None, partial=False):
+    """Blocking refresh: sector and ETF pipelines side by side on one limiter."""
+    now = datetime.now(IST)
+    connector, fast = _refresh_args(connector, is_auto, fast, now)
+
+    results = RefreshOrchestrator(connector).run(
+        run_sector,
+        run_etf,
+        fast=fast,
+        partial=partial,
+        sector_snapshot=st.session_state.get("analysis_results"),
+    )
+    track_refresh(results, run_sector, run_etf)
     st.session_state.last_auto_refresh_time = now
+    return apply_refresh_results(results, run_sector, run_etf, is_auto, partial, now)
 
-    mode = "Auto" if is_auto else "Manual"
-    return True, f"{mode} refresh completed at {now.strftime('%H:%M:%S IST')}"
+
+def start_background_refresh(connector, run_sector=True, run_etf=True, is_auto=False, fast=None, partial=False):
+    """
+    Non-blocking refresh: the process-wide job runs on a worker thread and
+    render_refresh_progress() polls it. A refresh already running (from any
+    session) is joined instead of started twice.
+    """
+    now = datetime.now(IST)
+    connector, fast = _refresh_args(connector, is_auto, fast, now)
+
+    job = start_refresh(
+        connector,
+        on_complete=lambda job: track_refresh(job.results, run_sector, run_etf),
+        run_sector=run_sector,
+        run_etf=run_etf,
+        fast=fast,
+        partial=partial,
+        sector_snapshot=st.session_state.get("analysis_results"),
+    )
+    st.session_state.last_auto_refresh_time = now
+    st.session_state.refresh_job_mode = {"is_auto": is_auto, "partial": partial}
+    return job
+
+
+def _progress_text(name, p):
+    size = p["bytes"] / 1024
+    text = (
+        f"{name.capitalize()} {p['done']}/{p['total'] or '?'} {p['current']} · "
+        f"{p['requests']} req · {size:,.0f} KB · {p['retries']} retries · {p['elapsed']:.0f}s"
+    )
+    if p["state"] != "running":
+        text += f" · {p['message'] or p['state']}"
+    return text
+
+
+def render_refresh_progress():
+    """Progress of the background refresh; publishes its results once done."""
+    job = get_refresh_job()
+    if job is None:
+        return
+
+    progress = job.progress.snapshot()
+    for name, p in progress.items():
+        fraction = 1.0 if p["state"] != "running" else (p["done"] / p["total"] if p["total"] else 0.0)
+        st.progress(min(fraction, 1.0), text=_progress_text(name, p))
+
+    if job.running:
+        try:
+            from streamlit_autorefresh import st_autorefresh
+            st_autorefresh(
+                interval=REFRESH_PROGRESS_POLL_SECONDS * 1000,
+                key="refresh_progress_poll",
+            )
+        except ImportError:
+            st.button("↻ Update progress", key="refresh_progress_manual")
+        return
+
+    if st.session_state.get("applied_refresh_id") == job.id:
+        return
+    st.session_state.applied_refresh_id = job.id
+    if job.error:
+        st.error(f"Refresh failed: {job.error}")
+        return
+
+    mode = st.session_state.get("refresh_job_mode", {})
+    ok, msg = apply_refresh_results(
+        job.results,
+        job.run_kwargs.get("run_sector", True),
+        job.run_kwargs.get("run_etf", True),
+        is_auto=mode.get("is_auto", False),
+        partial=job.run_kwargs.get("partial", False),
+        now=datetime.fromtimestamp(job.finished_at, IST),
+    )
+    (st.success if ok else st.error)(f"{msg} ({job.finished_at - job.started_at:.0f}s)")
 
 # =============================================================================
 # MAIN ADMIN PANEL
@@ -119,10 +347,11 @@ def render_admin_panel(user_manager):
         now = datetime.now(IST)
         market_open = is_market_hours(now)
 
+        calendar = get_trading_calendar()
         if market_open:
-            st.success("📈 Market OPEN")
+            st.success(f"📈 Market OPEN · closes {calendar.next_close(now):%H:%M}")
         else:
-            st.warning("📉 Market CLOSED")
+            st.warning(f"📉 Market CLOSED · next open {calendar.next_open(now):%a %d %b %H:%M}")
 
         st.caption("Auto-refresh runs hourly during market hours")
 
@@ -138,6 +367,7 @@ def render_admin_panel(user_manager):
                     conn = AngelOneConnector(apikey, client, pwd, totp)
                     ok, msg = conn.connect()
                     if ok:
+                        get_broker_session().adopt(conn)
                         st.session_state.admin_connector = conn
                         st.session_state.admin_connected = True
                         st.success("Connected to AngelOne")
@@ -146,53 +376,108 @@ def render_admin_panel(user_manager):
                 else:
                     st.error("All fields required")
 
+        attach_shared_session()
         if not st.session_state.get("admin_connected"):
             st.warning("AngelOne not connected")
             return
 
+        session = get_broker_session().status()
+        if session["connected"]:
+            st.caption(
+                f"🔑 Shared session {session['client']} · expires in "
+                f"{session['minutes_left']:.0f} min · renewed {session['renewals']}×"
+            )
+
         # ---------------- AUTO REFRESH ----------------
         last_auto = st.session_state.get("last_auto_refresh_time")
         if market_open:
             if last_auto is None or (now - last_auto).total_seconds() > 3600:
-                with st.spinner("🤖 Auto-refreshing..."):
-                    ok, msg = refresh_all_data(
-                        st.session_state.admin_connector,
-                        run_sector=True,
-                        run_etf=True,
-                        is_auto=True
-                    )
-                    if ok:
-                        st.success(msg)
+                start_background_refresh(
+                    st.session_state.admin_connector,
+                    run_sector=True,
+                    run_etf=True,
+                    is_auto=True
+                )
 
         # ---------------- MANUAL BUTTONS ----------------
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
+
+        job = get_refresh_job()
+        busy = job is not None and job.running
 
         with col1:
-            if st.button("📊 Analyze Sectors"):
-                ok, msg = refresh_all_data(
+            if st.button("📊 Analyze Sectors", disabled=busy):
+                start_background_refresh(
                     st.session_state.admin_connector,
                     run_sector=True,
                     run_etf=False
                 )
-                st.success(msg)
 
         with col2:
-            if st.button("💼 Analyze ETF"):
-                ok, msg = refresh_all_data(
+            if st.button("💼 Analyze ETF", disabled=busy):
+                start_background_refresh(
                     st.session_state.admin_connector,
                     run_sector=False,
                     run_etf=True
                 )
-                st.success(msg)
 
         with col3:
-            if st.button("🔄 Analyze Both"):
-                ok, msg = refresh_all_data(
+            if st.button("🔄 Analyze Both", disabled=busy):
+                start_background_refresh(
                     st.session_state.admin_connector,
                     run_sector=True,
                     run_etf=True
                 )
-                st.success(msg)
+
+        with col4:
+            if st.button("🩹 Stale Only", disabled=busy, help="Re-fetch only out-of-date or failed instruments"):
+                start_background_refresh(
+                    st.session_state.admin_connector,
+                    run_sector=True,
+                    run_etf=True,
+                    partial=True
+                )
+
+        render_refresh_progress()
+
+        # ---------------- LIVE TICKS ----------------
+        if market_open and st.toggle("📡 Stream live LTP (WebSocket)", key="admin_live_feed"):
+            instruments = default_live_instruments()
+            feed = start_live_feed(
+                st.session_state.admin_connector, instruments.values()
+            )
+            st.caption(
+                f"📡 {len(feed.book)}/{len(instruments)} tokens live · "
+                f"{feed.book.tick_count} ticks received"
+            )
+            df_live = derive_live_metrics(
+                feed.book, instruments, BENCHMARK_TOKENS["NIFTY 50"]["token"]
+            )
+            if not df_live.empty:
+                st.dataframe(df_live, width="stretch", hide_index=True)
+        else:
+            # Toggled off or market closed: don't leave the WebSocket running
+            stop_live_feed()
+
+        # ---------------- FULL UNIVERSE ----------------
+        st.divider()
+        if st.button("🌐 Rank Full NSE Universe"):
+            progress = st.progress(0.0)
+
+            def _on_progress(i, total, symbol):
+                progress.progress(i / total, text=f"{i}/{total} {symbol}")
+
+            df_universe = run_universe_rs(
+                st.session_state.admin_connector,
+                BENCHMARK_TOKENS["NIFTY 50"]["token"],
+                progress_callback=_on_progress,
+            )
+            if df_universe.empty:
+                st.error("Universe run returned no data")
+            else:
+                st.session_state.universe_rs = df_universe
+                st.success(f"Ranked {len(df_universe)} instruments")
+                st.dataframe(df_universe.head(50), width="stretch")
 
     # =========================================================================
     # TAB 3 — SYSTEM STATUS (ALIGNED WITH TRACKER)
@@ -200,14 +485,42 @@ def render_admin_panel(user_manager):
     with tab_status:
         col1, col2, col3 = st.columns(3)
 
-        s = DataRefreshTracker.get_status("sectors")
-        e = DataRefreshTracker.get_status("etfs")
-        c = DataRefreshTracker.get_status("comprehensive")
+        statuses = DataRefreshTracker.get_all_status()
+        s, e, c = statuses["sectors"], statuses["etfs"], statuses["comprehensive"]
 
         col1.metric("Sector Data", s["freshness"].capitalize(), s["last_refresh"])
         col2.metric("ETF Data", e["freshness"].capitalize(), e["last_refresh"])
         col3.metric("Combined", c["freshness"].capitalize(), c["last_refresh"])
 
+        st.divider()
+        st.markdown("#### 🩺 Instrument Health")
+        board = get_health_board()
+        df_health = board.table()
+        if df_health.empty:
+            st.info("No fetch history yet")
+        else:
+            open_count = int((df_health["State"] == "🔴 Open").sum())
+            st.caption(
+                f"{open_count} token(s) on cool-off – cached values are served "
+                "until the breaker closes"
+            )
+            st.dataframe(df_health, width="stretch", hide_index=True)
+            if open_count and st.button("♻️ Reset circuit breakers"):
+                board.reset()
+                board.save()
+                st.rerun()
+
+        st.divider()
+        st.markdown("#### 🕒 Sector Freshness")
+        st.dataframe(
+            freshness_table({str(i["token"]): i["name"] for i in SECTOR_TOKENS.values()}),
+            width="stretch",
+            hide_index=True,
+        )
+
+        st.divider()
+        render_metrics_panel()
+
     # =========================================================================
     # TAB 4 — SECURITY (UNCHANGED)
     # =========================================================================
@@ -7,10 +7,15 @@ Handles all communication with AngelOne SmartAPI for live market data
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import timedelta
 from SmartApi import SmartConnect
 import pyotp
 
+from intraday_bars import date_windows
+from metrics import span
+from rate_limiter import get_shared_limiter
+from trading_calendar import ist_now
+
 class AngelOneConnector:
     """Connect and fetch live market data from AngelOne broker"""
 
@@ -21,6 +26,9 @@ class AngelOneConnector:
         self.password = password
         self.totpsecret = totpsecret
         self.smartapi = None
+        self.jwt_token = None
+        self.refresh_token = None
+        self.feed_token = None
 
     def connect(self):
         """Connect to AngelOne API"""
@@ -36,6 +44,10 @@ class AngelOneConnector:
             )
 
             if session_data.get("status"):
+                data = session_data.get("data") or {}
+                self.jwt_token = data.get("jwtToken")
+                self.refresh_token = data.get("refreshToken")
+                self.feed_token = data.get("feedToken") or self.smartapi.getfeedToken()
                 return True, "Connected to AngelOne"
             else:
                 msg = session_data.get("message", "Login failed")
@@ -43,30 +55,73 @@ class AngelOneConnector:
         except Exception as e:
             return False, f"Error: {str(e)}"
 
-    def get_historical_df(self, token, daysback=400):
-        """Fetch historical daily candles"""
+    @classmethod
+    def from_tokens(cls, apikey, clientcode, jwt_token, refresh_token, feed_token):
+        """Rebuild a connected connector from saved session tokens (no login)"""
+        conn = cls(apikey, clientcode, None, None)
+        conn.smartapi = SmartConnect(
+            api_key=apikey,
+            access_token=str(jwt_token).replace("Bearer ", "", 1),
+            refresh_token=refresh_token,
+            feed_token=feed_token,
+        )
+        conn.jwt_token = jwt_token
+        conn.refresh_token = refresh_token
+        conn.feed_token = feed_token
+        return conn
+
+    def renew(self):
+        """Renew the JWT with the refresh token (no password / TOTP needed)"""
         try:
-            todate = datetime.now()
+            data = self.smartapi.generateToken(self.refresh_token)
+            if data and data.get("status"):
+                tokens = data.get("data") or {}
+                self.jwt_token = tokens.get("jwtToken") or self.jwt_token
+                self.refresh_token = tokens.get("refreshToken") or self.refresh_token
+                self.feed_token = tokens.get("feedToken") or self.feed_token
+                return True, "Session renewed"
+            msg = data.get("message", "Renewal failed") if data else "Renewal failed"
+            return False, f"Renewal failed: {msg}"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+
+    def get_historical_df(self, token, daysback=400, interval="ONE_DAY"):
+        """
+        Fetch historical candles (daily by default; intraday intervals such as
+        FIVE_MINUTE / FIFTEEN_MINUTE / ONE_HOUR are fetched in chunked windows
+        that respect SmartAPI's per-request day limits)
+        """
+        try:
+            todate = ist_now()
             fromdate = todate - timedelta(days=daysback)
-            
-            params = {
-                "exchange": "NSE",
-                "symboltoken": str(token),
-                "interval": "ONE_DAY",
-                "fromdate": fromdate.strftime("%Y-%m-%d %H:%M"),
-                "todate": todate.strftime("%Y-%m-%d %H:%M"),
-            }
+            windows = date_windows(fromdate, todate, interval)
 
-            data = self.smartapi.getCandleData(params)
-            
-            if data and data.get("status") and data.get("data"):
-                df = pd.DataFrame(
-                    data["data"],
-                    columns=["timestamp", "open", "high", "low", "close", "volume"]
-                )
+            frames = []
+            for i, (start, end) in enumerate(windows):
+                if i:
+                    get_shared_limiter().acquire()
+                params = {
+                    "exchange": "NSE",
+                    "symboltoken": str(token),
+                    "interval": interval,
+                    "fromdate": start.strftime("%Y-%m-%d %H:%M"),
+                    "todate": end.strftime("%Y-%m-%d %H:%M"),
+                }
+
+                with span("fetch", token=token, interval=interval):
+                    data = self.smartapi.getCandleData(params)
+                
+                if data and data.get("status") and data.get("data"):
+                    frames.append(pd.DataFrame(
+                        data["data"],
+                        columns=["timestamp", "open", "high", "low", "close", "volume"]
+                    ))
 
+            if frames:
+                df = pd.concat(frames, ignore_index=True)
                 df["timestamp"] = pd.to_datetime(df["timestamp"])
                 df["close"] = df["close"].astype(float)
+                df = df.drop_duplicates("timestamp", keep="last")
                 return df.sort_values("timestamp").reset_index(drop=True)
             
             return None
@@ -0,0 +1,236 @@
+"""
+Async SmartAPI Client
+asyncio/aiohttp access to the historical-candle and quote endpoints
+
+SmartConnect is synchronous (requests-based), so fetching a large universe
+means one thread per in-flight request. This client reuses the session JWT
+from AngelOneConnector.connect() and keeps hundreds of requests on a single
+event loop instead.
+
+Features:
+- One aiohttp ClientSession per client: HTTP keep-alive connection pool
+  capped at `max_concurrency`
+- Semaphore-bounded concurrency plus AsyncRateLimiter pacing (shares the
+  process-wide historical-endpoint budget with threaded fetchers)
+- Server errors ("Something went wrong" / AB1004, HTTP 5xx) retried with
+  the RetryScheduler backoff policy; rate-limit rejections return None
+  like AngelOneConnector.get_historical_df
+- get_candles() / get_candles_many(): chunked windows per interval,
+  DataFrames identical to get_historical_df
+- get_ltps(): batched LTP quotes, same {token: ltp} shape as ltp_quotes
+
+Usage:
+    async with AsyncSmartAPIClient.from_connector(connector) as client:
+        frames = await client.get_candles_many(tokens, 400)
+"""
+
+import asyncio
+import json
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+import aiohttp
+import pandas as pd
+
+from config import (
+    ASYNC_MAX_CONCURRENCY,
+    ASYNC_REQUEST_TIMEOUT,
+    QUOTE_BATCH_SIZE,
+    SMARTAPI_ROOT_URL,
+)
+from intraday_bars import date_windows
+from rate_limiter import AsyncRateLimiter, RateLimiter, get_shared_limiter
+from retry_scheduler import RetryableFetchError, RetryScheduler, is_retryable_message
+from trading_calendar import ist_now
+
+logger = logging.getLogger(__name__)
+
+CANDLE_ROUTE = "/rest/secure/angelbroking/historical/v1/getCandleData"
+QUOTE_ROUTE = "/rest/secure/angelbroking/market/v1/quote/"
+
+CANDLE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+class AsyncSmartAPIClient:
+    """Keep-alive, rate-limited SmartAPI REST client for one broker session."""
+
+    def __init__(
+        self,
+        apikey: str,
+        jwt_token: str,
+        base_url: str = SMARTAPI_ROOT_URL,
+        max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+        limiter: Optional[RateLimiter] = None,
+        timeout: float = ASYNC_REQUEST_TIMEOUT,
+        retry: Optional[RetryScheduler] = None,
+    ):
+        if not jwt_token:
+            raise ValueError("jwt_token required - connect the AngelOneConnector first")
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.limiter = AsyncRateLimiter(limiter or get_shared_limiter())
+        self.retry = retry or RetryScheduler()
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "X-UserType": "USER",
+            "X-SourceID": "WEB",
+            "X-ClientLocalIP": "127.0.0.1",
+            "X-ClientPublicIP": "127.0.0.1",
+            "X-MACAddress": "00:00:00:00:00:00",
+            "X-PrivateKey": apikey,
+            # SmartConnect hands out the JWT with or without the scheme prefix
+            "Authorization": jwt_token if jwt_token.startswith("Bearer ") else f"Bearer {jwt_token}",
+        }
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_connector(cls, connector, **kwargs) -> "AsyncSmartAPIClient":
+        """Client sharing a connected AngelOneConnector's API key and JWT."""
+        return cls(connector.apikey, connector.jwt_token, **kwargs)
+
+    # ------------------ Session lifecycle ------------------
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        """Create the pooled session (must run inside the event loop)."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ------------------ Transport ------------------
+
+    async def _post_once(self, route: str, payload: Dict) -> Optional[Dict]:
+        async with self._semaphore:
+            await self.limiter.acquire()
+            async with self._session.post(self.base_url + route, json=payload) as resp:
+                text = await resp.text()
+                status = resp.status
+
+        if "exceeding access rate" in text.lower():
+            logger.warning(f"Rate limited on {route}")
+            return None
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            if status >= 500 or is_retryable_message(text):
+                raise RetryableFetchError(text[:200] or f"HTTP {status}")
+            logger.warning(f"Unexpected response from {route} (HTTP {status})")
+            return None
+        if not data.get("status"):
+            # "No data" also carries AB1004; only the generic server error is transient
+            message = str(data.get("message", ""))
+            if status >= 500 or "something went wrong" in message.lower():
+                raise RetryableFetchError(message or f"HTTP {status}")
+            return None
+        return data
+
+    async def _post(self, route: str, payload: Dict, key=None) -> Optional[Dict]:
+        """POST with bounded backoff on transient server errors."""
+        if self._session is None:
+            await self.open()
+        for attempt in range(1, self.retry.max_attempts + 1):
+            try:
+                return await self._post_once(route, payload)
+            except RetryableFetchError as e:
+                if attempt == self.retry.max_attempts:
+                    self.retry.failed[key] = str(e)
+                    return None
+                delay = self.retry.backoff(attempt)
+                logger.warning(f"Server error for {key}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Request failed for {key}: {e}")
+                return None
+        return None
+
+    # ------------------ Endpoints ------------------
+
+    async def get_candles(
+        self, token, daysback: int = 400, interval: str = "ONE_DAY", exchange: str = "NSE"
+    ) -> Optional[pd.DataFrame]:
+        """Async equivalent of AngelOneConnector.get_historical_df."""
+        todate = ist_now()
+        fromdate = todate - timedelta(days=daysback)
+
+        frames = []
+        for start, end in date_windows(fromdate, todate, interval):
+            data = await self._post(CANDLE_ROUTE, {
+                "exchange": exchange,
+                "symboltoken": str(token),
+                "interval": interval,
+                "fromdate": start.strftime("%Y-%m-%d %H:%M"),
+                "todate": end.strftime("%Y-%m-%d %H:%M"),
+            }, key=str(token))
+            if data and data.get("data"):
+                frames.append(pd.DataFrame(data["data"], columns=CANDLE_COLUMNS))
+
+        if not frames:
+            return None
+        df = pd.concat(frames, ignore_index=True)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        df["close"] = df["close"].astype(float)
+        df = df.drop_duplicates("timestamp", keep="last")
+        return df.sort_values("timestamp").reset_index(drop=True)
+
+    async def get_candles_many(
+        self,
+        tokens: Sequence,
+        daysback: int = 400,
+        interval: str = "ONE_DAY",
+        progress_callback: Optional[Callable] = None,
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """{token: frame or None} for every token, fetched concurrently."""
+        tokens = [str(t) for t in tokens]
+
+        async def fetch(token):
+            return token, await self.get_candles(token, daysback, interval)
+
+        frames: Dict[str, Optional[pd.DataFrame]] = {}
+        for done, task in enumerate(asyncio.as_completed([fetch(t) for t in tokens]), start=1):
+            token, df = await task
+            frames[token] = df
+            if progress_callback:
+                progress_callback(done, len(tokens), token)
+        return frames
+
+    async def get_ltps(
+        self, tokens: Iterable, exchange: str = "NSE", batch_size: int = QUOTE_BATCH_SIZE
+    ) -> Dict[str, float]:
+        """{token: ltp} via batched LTP quotes; unfetched tokens are absent."""
+        tokens = list(dict.fromkeys(str(t) for t in tokens))
+        batches = [tokens[i:i + batch_size] for i in range(0, len(tokens), batch_size)]
+        responses = await asyncio.gather(*(
+            self._post(QUOTE_ROUTE, {"mode": "LTP", "exchangeTokens": {exchange: batch}}, key="quote")
+            for batch in batches
+        ))
+
+        ltps: Dict[str, float] = {}
+        for response in responses:
+            for item in ((response or {}).get("data") or {}).get("fetched", []):
+                try:
+                    ltps[str(item["symbolToken"])] = float(item["ltp"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return ltps
+
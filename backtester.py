@@ -0,0 +1,307 @@
+"""
+Vectorized Backtesting Engine
+Replays the sector TLDR/category rules and the ETF TLDR rules over stored
+daily history (price_history.npz) and reports how each signal performed.
+
+Features:
+- Signal matrices (days x instruments) built with NumPy, no per-day loops
+- Rules mirror SectorRSAnalyzer.get_tldr / analyze and etf_rs_calculator.get_etf_tldr
+- Forward return, excess vs benchmark, hit rate and max drawdown per signal
+- Parameter sweeps over RS periods reuse one loaded panel
+
+Usage:
+    python backtester.py              # sectors + ETFs, default periods
+"""
+
+import logging
+from itertools import product
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import BENCHMARK_TOKENS, DEFAULT_RS_PERIODS, SECTOR_TOKENS
+from price_history import get_history_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZONS = (5, 21, 55)
+
+# Mirrors SectorRSAnalyzer.get_tldr (category first, then thresholds)
+SECTOR_SIGNALS = [
+    "VERY STRONG momentum - Leading market across all timeframes",
+    "STRONG momentum - Consistently outperforming",
+    "MODERATELY STRONG - Positive across periods",
+    "VERY WEAK - Significantly lagging market",
+    "WEAK - Underperforming across periods",
+    "MODERATELY WEAK - Lagging benchmark",
+    "Gaining momentum - Watch for sustained breakout",
+    "Losing momentum - Former strength fading",
+    "Volatile pattern - Inconsistent performance",
+]
+SECTOR_CATEGORIES = ["Outperforming", "Underperforming", "Mixed"]
+
+# Mirrors etf_rs_calculator.get_etf_tldr (first matching rule wins)
+ETF_SIGNALS = [
+    "Very strong momentum - Multi-timeframe leader",
+    "Strong uptrend - Buy on dips",
+    "Severe underperformance - Avoid for now",
+    "Weak trend - Lagging benchmark",
+    "Short-term surge - Watch follow-through",
+    "Short-term pressure - Avoid fresh entries",
+    "Sideways / volatile - Wait for clear trend",
+]
+
+
+# ============================================================================
+# DATA
+# ============================================================================
+
+def _etf_tokens(etf_csv_path: str) -> Dict[str, str]:
+    from instrument_registry import resolve_token
+
+    etf_list = pd.read_csv(etf_csv_path)
+    tokens = {}
+    for idx, row in etf_list.iterrows():
+        token = resolve_token(row)
+        if token:
+            tokens[row.get("ETF Code", f"ETF_{idx}")] = token
+    return tokens
+
+
+def load_panel(
+    universe: str = "sectors",
+    benchmark: str = "NIFTY 50",
+    years: float = 5,
+    etf_csv_path: str = "ETFs-List_updated.csv",
+) -> Tuple[pd.DatetimeIndex, List[str], np.ndarray, np.ndarray]:
+    """
+    Load (dates, names, panel, bench) from the history store.
+
+    The benchmark column is always the first token requested so both share
+    the same trading-day axis.
+    """
+    if universe == "sectors":
+        names_tokens = {info["name"]: info["token"] for info in SECTOR_TOKENS.values()}
+    elif universe == "etfs":
+        names_tokens = _etf_tokens(etf_csv_path)
+    else:
+        raise ValueError(f"Unknown universe: {universe}")
+
+    bench_token = BENCHMARK_TOKENS[benchmark]["token"]
+    start = pd.Timestamp.now().normalize() - pd.Timedelta(days=int(365 * years))
+    dates, panel = get_history_store().panel(
+        [bench_token] + list(names_tokens.values()), start=start
+    )
+    return dates, list(names_tokens.keys()), panel[:, 1:], panel[:, 0]
+
+
+# ============================================================================
+# SIGNAL MATRICES
+# ============================================================================
+
+def rs_history(panel: np.ndarray, bench: np.ndarray, lag: int) -> np.ndarray:
+    """RS (%) at every day: lag-bar return of each column minus the benchmark's."""
+    rs = np.full(panel.shape, np.nan, dtype=np.float32)
+    if lag <= 0 or lag >= len(panel):
+        return rs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = (panel[lag:] / panel[:-lag] - 1.0) * 100.0
+        bret = (bench[lag:] / bench[:-lag] - 1.0) * 100.0
+    rs[lag:] = ret - bret[:, None]
+    return rs
+
+
+def sector_signal_codes(
+    panel: np.ndarray, bench: np.ndarray, periods: Sequence[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (tldr_codes, category_codes) as int8 matrices; -1 where any RS is
+    unavailable. Lags match SectorRSAnalyzer.calculate_rs (iloc[-period - 1]).
+    """
+    rs1, rs2, rs3 = (rs_history(panel, bench, p) for p in periods[:3])
+    valid = np.isfinite(rs1) & np.isfinite(rs2) & np.isfinite(rs3)
+
+    pos = (rs1 > 0).astype(np.int8) + (rs2 > 0) + (rs3 > 0)
+    neg = (rs1 < 0).astype(np.int8) + (rs2 < 0) + (rs3 < 0)
+    outp, under = pos == 3, neg == 3
+    mixed = ~outp & ~under
+
+    category = np.select([outp, under], [0, 1], default=2).astype(np.int8)
+    tldr = np.select(
+        [
+            outp & (rs2 >= 3), outp & (rs2 >= 1.5), outp,
+            under & (rs2 <= -3), under & (rs2 <= -1.5), under,
+            mixed & (rs1 > 0) & (rs2 > 0), mixed & (rs1 < 0) & (rs2 < 0),
+        ],
+        np.arange(8),
+        default=8,
+    ).astype(np.int8)
+
+    category[~valid] = -1
+    tldr[~valid] = -1
+    return tldr, category
+
+
+def etf_signal_codes(
+    panel: np.ndarray, bench: np.ndarray, periods: Sequence[int]
+) -> np.ndarray:
+    """
+    ETF TLDR codes; -1 where RS is unavailable. Lags match
+    etf_rs_calculator.compute_rs (iloc[-period], i.e. period - 1 bars).
+    """
+    rs21, rs55, rs123 = (rs_history(panel, bench, p - 1) for p in periods[:3])
+    valid = np.isfinite(rs21) & np.isfinite(rs55) & np.isfinite(rs123)
+
+    pct = np.full(panel.shape, np.nan, dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct[1:] = (panel[1:] / panel[:-1] - 1.0) * 100.0
+    pct = np.nan_to_num(pct)
+
+    codes = np.select(
+        [
+            (rs55 >= 3) & (rs21 > 0) & (rs123 > 0),
+            (rs55 >= 1.5) & (rs21 > 0),
+            rs55 <= -3,
+            (rs55 <= -1.5) & (rs21 < 0),
+            (pct > 1) & (rs21 > 0),
+            (pct < -1) & (rs21 < 0),
+        ],
+        np.arange(6),
+        default=6,
+    ).astype(np.int8)
+    codes[~valid] = -1
+    return codes
+
+
+# ============================================================================
+# EVALUATION
+# ============================================================================
+
+def evaluate_signals(
+    codes: np.ndarray,
+    labels: Sequence[str],
+    panel: np.ndarray,
+    bench: np.ndarray,
+    horizons: Iterable[int] = DEFAULT_HORIZONS,
+) -> pd.DataFrame:
+    """
+    Aggregate forward performance per signal with np.bincount.
+
+    For each horizon h and every (day, instrument) carrying a signal:
+    forward return P[t+h]/P[t]-1, excess over the benchmark, hit rate
+    (excess > 0) and the max drawdown inside the h-bar window.
+    """
+    n_labels = len(labels)
+    rows = []
+
+    for h in horizons:
+        if h >= len(panel):
+            continue
+        n = len(panel) - h
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fwd = (panel[h:] / panel[:n] - 1.0) * 100.0
+            bfwd = (bench[h:] / bench[:n] - 1.0) * 100.0
+            windows = sliding_window_view(panel, h + 1, axis=0)[:n]
+            rel = windows / windows[..., :1]
+            peak = np.maximum.accumulate(rel, axis=-1)
+            dd = ((rel / peak).min(axis=-1) - 1.0) * 100.0
+        excess = fwd - bfwd[:, None]
+
+        c = codes[:n].ravel()
+        ok = (c >= 0) & np.isfinite(fwd.ravel()) & np.isfinite(excess.ravel())
+        c = c[ok].astype(np.intp)
+        f, x, d = fwd.ravel()[ok], excess.ravel()[ok], dd.ravel()[ok]
+
+        count = np.bincount(c, minlength=n_labels)
+        safe = np.maximum(count, 1)
+        mean_fwd = np.bincount(c, weights=f, minlength=n_labels) / safe
+        mean_x = np.bincount(c, weights=x, minlength=n_labels) / safe
+        hits = np.bincount(c, weights=(x > 0), minlength=n_labels) / safe
+        mean_dd = np.bincount(c, weights=d, minlength=n_labels) / safe
+        worst_dd = np.full(n_labels, np.nan)
+        np.fmin.at(worst_dd, c, d)
+
+        for k, label in enumerate(labels):
+            rows.append({
+                "Signal": label,
+                "Horizon": h,
+                "Signals": int(count[k]),
+                "Avg Fwd Return %": round(mean_fwd[k], 2) if count[k] else np.nan,
+                "Avg Excess %": round(mean_x[k], 2) if count[k] else np.nan,
+                "Hit Rate %": round(hits[k] * 100, 1) if count[k] else np.nan,
+                "Avg Max DD %": round(mean_dd[k], 2) if count[k] else np.nan,
+                "Worst DD %": round(worst_dd[k], 2) if count[k] else np.nan,
+            })
+
+    return pd.DataFrame(rows)
+
+
+def run_backtest(
+    universe: str = "sectors",
+    periods: Sequence[int] = DEFAULT_RS_PERIODS,
+    horizons: Iterable[int] = DEFAULT_HORIZONS,
+    benchmark: str = "NIFTY 50",
+    years: float = 5,
+    data=None,
+) -> pd.DataFrame:
+    """
+    Backtest the TLDR signals (and sector categories) for one universe.
+
+    `data` may be a preloaded (dates, names, panel, bench) tuple to avoid
+    reloading the store during sweeps.
+    """
+    dates, names, panel, bench = data or load_panel(universe, benchmark, years)
+    if panel.size == 0:
+        logger.warning(f"No stored history for {universe}")
+        return pd.DataFrame()
+
+    horizons = tuple(horizons)
+    if universe == "sectors":
+        tldr, category = sector_signal_codes(panel, bench, periods)
+        result = pd.concat(
+            [
+                evaluate_signals(tldr, SECTOR_SIGNALS, panel, bench, horizons).assign(Rule="TLDR"),
+                evaluate_signals(category, SECTOR_CATEGORIES, panel, bench, horizons).assign(Rule="Category"),
+            ],
+            ignore_index=True,
+        )
+    else:
+        codes = etf_signal_codes(panel, bench, periods)
+        result = evaluate_signals(codes, ETF_SIGNALS, panel, bench, horizons).assign(Rule="TLDR")
+
+    result.insert(0, "Universe", universe)
+    result.insert(1, "Periods", "/".join(str(p) for p in periods))
+    return result
+
+
+def sweep_rs_periods(
+    universe: str = "sectors",
+    short: Iterable[int] = (10, 21, 34),
+    medium: Iterable[int] = (34, 55, 89),
+    long: Iterable[int] = (89, 123, 200),
+    horizons: Iterable[int] = (21,),
+    benchmark: str = "NIFTY 50",
+    years: float = 5,
+) -> pd.DataFrame:
+    """Run the backtest over a grid of RS periods on one loaded panel."""
+    data = load_panel(universe, benchmark, years)
+    frames = [
+        run_backtest(universe, periods, horizons, benchmark, years, data=data)
+        for periods in product(short, medium, long)
+        if periods[0] < periods[1] < periods[2]
+    ]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+if __name__ == "__main__":
+    import time
+
+    logging.basicConfig(level=logging.INFO)
+    for universe in ("sectors", "etfs"):
+        t0 = time.perf_counter()
+        df = run_backtest(universe)
+        logger.info(f"{universe}: {len(df)} rows in {time.perf_counter() - t0:.2f}s")
+        if not df.empty:
+            print(df.to_string(index=False))
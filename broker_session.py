@@ -0,0 +1,230 @@
+"""
+Broker Session Manager
+One AngelOne session shared by every admin browser session and refresh job
+
+AngelOneConnector.connect() performs a full generateSession (password +
+TOTP) and the connector used to live only in one browser's session state.
+This module keeps a single process-wide connector, persists its session
+tokens and renews the JWT with the refresh token before it expires, so
+reloads and other admins reuse the session instead of logging in again.
+
+Features:
+- adopt(): register a freshly connected connector as the shared session
+- connector(): shared connector, restored from BROKER_SESSION_FILE after a
+  restart and renewed (generateToken) inside BROKER_RENEW_BEFORE_MINUTES
+- Falls back to a full login only when renewal fails and credentials are
+  still in memory; otherwise the session is cleared
+- Picks up tokens renewed by another process (file mtime)
+- Token file holds API key, client code and session tokens only (never
+  password / TOTP secret), written atomically with 0600 permissions
+- status(): expiry / renewal summary for the admin panel
+"""
+
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config import (
+    BROKER_RENEW_BEFORE_MINUTES,
+    BROKER_SESSION_FILE,
+    BROKER_SESSION_TTL_MINUTES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def jwt_expiry(jwt_token) -> Optional[float]:
+    """`exp` claim (epoch seconds) of a JWT, or None if it cannot be read."""
+    try:
+        payload = str(jwt_token).replace("Bearer ", "", 1).split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp else None
+    except Exception:
+        return None
+
+
+def _restore_connector(state: Dict):
+    from api_connector import AngelOneConnector
+
+    return AngelOneConnector.from_tokens(
+        state["apikey"],
+        state["clientcode"],
+        state["jwt_token"],
+        state["refresh_token"],
+        state["feed_token"],
+    )
+
+
+class BrokerSessionManager:
+    """Thread-safe owner of the shared broker connector and its tokens."""
+
+    def __init__(
+        self,
+        path: str = BROKER_SESSION_FILE,
+        renew_before_minutes: float = BROKER_RENEW_BEFORE_MINUTES,
+        ttl_minutes: float = BROKER_SESSION_TTL_MINUTES,
+        restore: Callable[[Dict], object] = _restore_connector,
+    ):
+        self.path = path
+        self.renew_before = renew_before_minutes * 60
+        self.ttl = ttl_minutes * 60
+        self._restore = restore
+        self._lock = threading.RLock()
+        self._connector = None
+        self._state: Optional[Dict] = None
+        self._mtime = None
+
+    # ------------------ Persistence ------------------
+
+    def _load(self) -> Optional[Dict]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            self._mtime = os.path.getmtime(self.path)
+            return state
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable {self.path}: {e}")
+            return None
+
+    def _save(self) -> None:
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._state, f, indent=2)
+            os.replace(tmp, self.path)
+            self._mtime = os.path.getmtime(self.path)
+        except Exception as e:
+            logger.warning(f"Could not save {self.path}: {e}")
+
+    def _capture(self, connector, renewals: int = 0) -> None:
+        """Snapshot the connector's tokens into state and persist them."""
+        now = time.time()
+        self._state = {
+            "apikey": connector.apikey,
+            "clientcode": connector.clientcode,
+            "jwt_token": connector.jwt_token,
+            "refresh_token": connector.refresh_token,
+            "feed_token": connector.feed_token,
+            "issued_at": now,
+            "expires_at": jwt_expiry(connector.jwt_token) or now + self.ttl,
+            "renewals": renewals,
+        }
+        self._save()
+
+    # ------------------ Session ------------------
+
+    def adopt(self, connector) -> None:
+        """Share a connector that just logged in successfully."""
+        with self._lock:
+            self._connector = connector
+            self._capture(connector)
+        logger.info(f"Broker session for {connector.clientcode} shared and saved")
+
+    def _sync_from_disk(self) -> None:
+        """Adopt tokens another process renewed since we last read the file."""
+        if not os.path.exists(self.path):
+            return
+        if self._mtime is not None and os.path.getmtime(self.path) <= self._mtime:
+            return
+        state = self._load()
+        if not state:
+            return
+        self._state = state
+        if self._connector is not None:
+            self._connector.jwt_token = state["jwt_token"]
+            self._connector.refresh_token = state["refresh_token"]
+            self._connector.feed_token = state["feed_token"]
+            smartapi = self._connector.smartapi
+            if hasattr(smartapi, "setAccessToken"):
+                smartapi.setAccessToken(str(state["jwt_token"]).replace("Bearer ", "", 1))
+                smartapi.setRefreshToken(state["refresh_token"])
+                smartapi.setFeedToken(state["feed_token"])
+
+    def connector(self):
+        """
+        The shared connector with at least BROKER_RENEW_BEFORE_MINUTES of
+        validity left, or None when there is no usable session.
+        """
+        with self._lock:
+            self._sync_from_disk()
+            if self._state is None:
+                return None
+            if self._connector is None:
+                try:
+                    self._connector = self._restore(self._state)
+                except Exception as e:
+                    logger.error(f"Could not restore broker session: {e}")
+                    return None
+            if time.time() >= self._state["expires_at"] - self.renew_before:
+                self._renew()
+            return self._connector
+
+    def _renew(self) -> None:
+        connector = self._connector
+        ok, msg = connector.renew()
+        if ok:
+            self._capture(connector, renewals=self._state.get("renewals", 0) + 1)
+            logger.info(f"Broker session renewed for {connector.clientcode}")
+            return
+
+        logger.warning(f"Broker session renewal failed: {msg}")
+        if connector.password and connector.totpsecret:
+            ok, msg = connector.connect()
+            if ok:
+                self._capture(connector)
+                logger.info(f"Broker session re-established for {connector.clientcode}")
+                return
+        logger.error(f"Broker session lost: {msg}")
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop the shared session for everyone (admin disconnect)."""
+        with self._lock:
+            self._connector = None
+            self._state = None
+            self._mtime = None
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Could not remove {self.path}: {e}")
+
+    # ------------------ Reporting ------------------
+
+    def status(self) -> Dict:
+        with self._lock:
+            self._sync_from_disk()
+            state = self._state
+        if not state:
+            return {"connected": False}
+        return {
+            "connected": True,
+            "client": state["clientcode"],
+            "issued_at": state["issued_at"],
+            "expires_at": state["expires_at"],
+            "minutes_left": round((state["expires_at"] - time.time()) / 60, 1),
+            "renewals": state.get("renewals", 0),
+        }
+
+
+_manager: Optional[BrokerSessionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_broker_session() -> BrokerSessionManager:
+    """Process-wide broker session shared by all Streamlit sessions."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = BrokerSessionManager()
+        return _manager
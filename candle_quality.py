@@ -0,0 +1,188 @@
+"""
+Candle Quality Checks
+Vectorised completeness / staleness checks over every fetched candle frame
+
+compute_rs and _result_row anchor on the last bar and count bars back, so a
+stale last candle, a holiday-sized hole or a duplicated timestamp silently
+shifts every RS window. Fetchers add() each frame as it arrives (reduced to
+int64 epoch seconds + float64 closes); check() then scores the whole set in
+one pass over the concatenated arrays instead of per-instrument pandas work.
+
+Features:
+- Duplicate and out-of-order timestamps
+- Missing sessions between an instrument's first and last bar, measured
+  against the NSE trading calendar (trading_calendar); bars before the
+  calendar's holiday coverage, or outside an optional `window_bars` RS
+  window, are ignored (the history store can hold years of backfill)
+- Zero / negative / non-numeric closes
+- Last-bar lag in sessions behind the latest session
+- Quality column text per instrument: "OK" or e.g. "stale:3, gaps:2"
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import CANDLE_MAX_LAG_SESSIONS, CANDLE_MAX_MISSING_SESSIONS, LOOKBACK_BUFFER_SESSIONS
+from trading_calendar import TradingCalendar, get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+IST_OFFSET_SECONDS = 19800  # UTC+05:30
+
+
+def _epoch_seconds(timestamps) -> np.ndarray:
+    """Naive-IST epoch seconds (tz-aware candles shifted to IST)."""
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps)
+    ts = pd.DatetimeIndex(timestamps)
+    # asi8 of a tz-aware index is UTC whatever its zone; IST has no DST
+    secs = ts.as_unit("s").asi8
+    return secs + IST_OFFSET_SECONDS if ts.tz is not None else secs
+
+
+class CandleQualityChecker:
+    """Collects candle frames during a refresh and scores them together."""
+
+    def __init__(
+        self,
+        max_lag_sessions: int = CANDLE_MAX_LAG_SESSIONS,
+        max_missing_sessions: int = CANDLE_MAX_MISSING_SESSIONS,
+        calendar: Optional[TradingCalendar] = None,
+        window_bars: Optional[int] = None,
+    ):
+        """
+        window_bars: only score the sessions a fetch of that many bars would
+        cover (trading_calendar.lookback_days), e.g. max(rs_periods) + 1.
+        """
+        self.max_lag_sessions = max_lag_sessions
+        self.max_missing_sessions = max_missing_sessions
+        self.calendar = calendar or get_trading_calendar()
+        self.busdaycal = self.calendar.busdaycal
+
+        since = self.calendar.coverage_start
+        if window_bars:
+            first = np.datetime64(
+                self.calendar.trading_days_back(window_bars + LOOKBACK_BUFFER_SESSIONS - 1), "D"
+            )
+            since = first if since is None else max(since, first)
+        self._since = None if since is None else int(since.astype(np.int64)) * SECONDS_PER_DAY
+        self._keys: List[Hashable] = []
+        self._secs: List[np.ndarray] = []
+        self._closes: List[np.ndarray] = []
+        self._lock = threading.Lock()
+
+    def add(self, key, df: Optional[pd.DataFrame]) -> None:
+        """Record one instrument's candles (None / empty counts as no data)."""
+        if df is None or df.empty:
+            secs = np.empty(0, dtype=np.int64)
+            closes = np.empty(0, dtype=np.float64)
+        else:
+            secs = _epoch_seconds(df["timestamp"])
+            closes = pd.to_numeric(df["close"], errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            if self._since is not None:
+                keep = secs >= self._since
+                secs, closes = secs[keep], closes[keep]
+        with self._lock:
+            self._keys.append(key)
+            self._secs.append(secs)
+            self._closes.append(closes)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def check(self, now: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        One row per added key: Bars, First, Last, Duplicates, Unsorted,
+        Missing, Bad Closes, Lag (sessions) and Quality.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            keys, secs, closes = list(self._keys), list(self._secs), list(self._closes)
+        k = len(keys)
+        if not k:
+            return pd.DataFrame()
+
+        lengths = np.array([len(s) for s in secs], dtype=np.int64)
+        codes = np.repeat(np.arange(k), lengths)
+        secs = np.concatenate(secs)
+        closes = np.concatenate(closes)
+
+        # Order problems are judged on the bars as they arrived
+        same = codes[1:] == codes[:-1]
+        unsorted = np.bincount(codes[1:][same & (np.diff(secs) < 0)], minlength=k)
+        bad_closes = np.bincount(codes[~(closes > 0)], minlength=k)
+
+        order = np.lexsort((secs, codes))
+        codes, secs = codes[order], secs[order]
+        same = codes[1:] == codes[:-1]
+        duplicates = np.bincount(codes[1:][same & (secs[1:] == secs[:-1])], minlength=k)
+
+        days = (secs // SECONDS_PER_DAY).astype("datetime64[D]")
+        new_day = np.ones(len(days), dtype=bool)
+        new_day[1:] = ~same | (days[1:] != days[:-1])
+        on_session = new_day & np.is_busday(days, busdaycal=self.busdaycal)
+        present = np.bincount(codes[on_session], minlength=k)
+
+        has = lengths > 0
+        starts = np.cumsum(lengths) - lengths
+        first = np.full(k, np.datetime64("NaT"), dtype="datetime64[D]")
+        last = first.copy()
+        first[has] = days[starts[has]]
+        last[has] = days[starts[has] + lengths[has] - 1]
+
+        expected = np.zeros(k, dtype=np.int64)
+        lag = np.zeros(k, dtype=np.int64)
+        if has.any():
+            one = np.timedelta64(1, "D")
+            expected[has] = np.busday_count(first[has], last[has] + one, busdaycal=self.busdaycal)
+            newest = np.datetime64(self.calendar.latest_session(now), "D")
+            lag[has] = np.busday_count(last[has] + one, newest + one, busdaycal=self.busdaycal)
+        missing = np.maximum(expected - present, 0)
+        lag = np.maximum(lag, 0)
+
+        report = pd.DataFrame({
+            "Bars": lengths,
+            "First": first,
+            "Last": last,
+            "Duplicates": duplicates,
+            "Unsorted": unsorted,
+            "Missing": missing,
+            "Bad Closes": bad_closes,
+            "Lag": lag,
+        }, index=pd.Index(keys, dtype=object))
+        report["Quality"] = self._labels(report)
+
+        flagged = int((report["Quality"] != "OK").sum())
+        elapsed = (time.perf_counter() - started) * 1000
+        log = logger.warning if flagged else logger.info
+        log(f"Candle quality: {flagged}/{k} flagged ({len(secs)} bars, {elapsed:.1f} ms)")
+        return report
+
+    def _labels(self, report: pd.DataFrame) -> List[str]:
+        issues = [
+            (report["Bars"] == 0, lambda i: "no_data"),
+            (report["Lag"] > self.max_lag_sessions, lambda i: f"stale:{report['Lag'].iat[i]}"),
+            (report["Missing"] > self.max_missing_sessions, lambda i: f"gaps:{report['Missing'].iat[i]}"),
+            (report["Duplicates"] > 0, lambda i: f"dup:{report['Duplicates'].iat[i]}"),
+            (report["Unsorted"] > 0, lambda i: "unsorted"),
+            (report["Bad Closes"] > 0, lambda i: f"bad_close:{report['Bad Closes'].iat[i]}"),
+        ]
+        labels = [[] for _ in range(len(report))]
+        for mask, text in issues:
+            for i in np.flatnonzero(mask.to_numpy()):
+                labels[i].append(text(i))
+        return [", ".join(parts) if parts else "OK" for parts in labels]
+
+    def flags(self, now: Optional[datetime] = None) -> Dict[Hashable, str]:
+        """{key: Quality text} for every added key."""
+        report = self.check(now)
+        return {} if report.empty else dict(zip(report.index, report["Quality"]))
@@ -58,12 +58,110 @@ RS_PERIODS = {
 
 DEFAULT_RS_PERIODS = [21, 55, 123]
 
+# Composite RS score = weighted mix of per-period percentile ratings
+# (short, medium, long) – same order as DEFAULT_RS_PERIODS
+RS_COMPOSITE_WEIGHTS = [0.4, 0.35, 0.25]
+
+# ============================================================================
+# RELATIVE ROTATION GRAPH (RRG) CONFIGURATION
+# ============================================================================
+
+RRG_WINDOW = 14          # rolling window (days) for RS-Ratio / RS-Momentum
+RRG_MOMENTUM_LAG = 1     # rate-of-change lag (days) for RS-Momentum
+RRG_TAIL_LENGTH = 10     # trailing points drawn per sector
+RRG_MAX_POINTS = 500     # cached points kept per sector
+
+# ============================================================================
+# INTRADAY CONFIGURATION
+# ============================================================================
+
+# SmartAPI getCandleData: max calendar days per request for each interval
+INTERVAL_MAX_DAYS = {
+    "ONE_MINUTE": 30,
+    "THREE_MINUTE": 60,
+    "FIVE_MINUTE": 100,
+    "TEN_MINUTE": 100,
+    "FIFTEEN_MINUTE": 200,
+    "THIRTY_MINUTE": 200,
+    "ONE_HOUR": 400,
+    "ONE_DAY": 2000,
+}
+
+INTRADAY_INTERVALS = ["FIVE_MINUTE", "FIFTEEN_MINUTE", "ONE_HOUR"]
+INTRADAY_DIR = "intraday_bars"
+
+# Calendar days of bars kept per interval (~32 bytes per bar before compression)
+INTRADAY_RETENTION_DAYS = {
+    "FIVE_MINUTE": 10,
+    "FIFTEEN_MINUTE": 30,
+    "ONE_HOUR": 120,
+}
+
+# Intraday RS look-backs in bars (short, medium, long)
+INTRADAY_RS_PERIODS = {
+    "FIVE_MINUTE": [12, 36, 75],      # 1h, 3h, 1 session
+    "FIFTEEN_MINUTE": [4, 13, 25],    # 1h, ~half session, 1 session
+    "ONE_HOUR": [7, 21, 35],          # 1, 3, 5 sessions
+}
+
 # ============================================================================
 # DATA FETCH CONFIGURATION
 # ============================================================================
 
 DEFAULT_DAYSBACK = 400
+# Extra sessions fetched beyond the longest RS period (unlisted closures, the
+# previous close for % change); trading_calendar turns sessions into days
+LOOKBACK_BUFFER_SESSIONS = 5
 RATE_LIMIT_DELAY = 0.2
+ETF_RATE_LIMIT_DELAY = 0.5
+
+# SmartAPI historical endpoint allows ~3 requests/second per session
+HISTORICAL_REQUESTS_PER_SECOND = 3
+
+# Async REST client (see async_smartapi)
+SMARTAPI_ROOT_URL = "https://apiconnect.angelone.in"
+ASYNC_MAX_CONCURRENCY = 20         # in-flight requests on one keep-alive pool
+ASYNC_REQUEST_TIMEOUT = 30         # seconds per request
+
+# Intraday fast refresh: batched LTP quotes instead of candle histories
+QUOTE_BATCH_SIZE = 50              # tokens per getMarketData call
+QUOTE_REQUESTS_PER_SECOND = 1
+
+# Partial refresh: only instruments older than this (or failed last cycle)
+PARTIAL_REFRESH_MAX_AGE_MINUTES = 60
+
+# Admin panel polls a running background refresh (see refresh_orchestrator)
+REFRESH_PROGRESS_POLL_SECONDS = 1
+
+# Published-data version polled by every session (see data_version)
+DATA_VERSION_FILE = "data_version.json"
+DATA_CHANGES_FILE = "data_changes.json"  # row diff of the last changed publish per kind
+DATA_VERSION_POLL_SECONDS = 5            # st.fragment poll (reads only the version)
+DATA_VERSION_FALLBACK_POLL_SECONDS = 30  # full-page rerun when st.fragment is unavailable
+
+# Deferred retries for transient server errors (see retry_scheduler)
+RETRY_MAX_ATTEMPTS = 3       # total attempts per token, first try included
+RETRY_BASE_DELAY = 10        # seconds before the first retry (doubles each time)
+RETRY_MAX_DELAY = 60         # cap on a single backoff
+RETRY_DRAIN_BUDGET = 90      # max seconds a refresh cycle spends draining retries
+
+# Shared broker session (see broker_session)
+BROKER_SESSION_FILE = "data/broker_session.json"  # live JWT / refresh token; git-ignored
+BROKER_SESSION_TTL_MINUTES = 1440  # assumed JWT lifetime when it carries no exp claim
+BROKER_RENEW_BEFORE_MINUTES = 30   # renew with the refresh token this long before expiry
+
+# Per-token circuit breaker (see token_health)
+HEALTH_BREAKER_THRESHOLD = 3       # consecutive failures before a token is skipped
+HEALTH_COOLOFF_MINUTES = 30        # first cool-off; doubles on every re-trip
+HEALTH_MAX_COOLOFF_MINUTES = 360
+
+# ============================================================================
+# UNIVERSE-SCALE RS CONFIGURATION
+# ============================================================================
+
+UNIVERSE_MAX_WORKERS = 3
+UNIVERSE_DAYSBACK = 200  # calendar days, enough for RS_123
+UNIVERSE_OUTPUT_FILE = "universe_rs_output.csv"
 
 # ============================================================================
 # OPTION-A DATA REFRESH CONFIGURATION
@@ -78,6 +176,49 @@ MARKET_OPEN_MINUTE = 15
 MARKET_CLOSE_HOUR = 15
 MARKET_CLOSE_MINUTE = 30
 
+# NSE equity-segment trading holidays (weekday closures only; update from the
+# exchange circular each December)
+NSE_HOLIDAYS = [
+    # 2024
+    "2024-01-22", "2024-01-26", "2024-03-08", "2024-03-25", "2024-03-29",
+    "2024-04-11", "2024-04-17", "2024-05-01", "2024-05-20", "2024-06-17",
+    "2024-07-17", "2024-08-15", "2024-10-02", "2024-11-01", "2024-11-15",
+    "2024-11-20", "2024-12-25",
+    # 2025
+    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10", "2025-04-14",
+    "2025-04-18", "2025-05-01", "2025-08-15", "2025-08-27", "2025-10-02",
+    "2025-10-21", "2025-10-22", "2025-11-05", "2025-12-25",
+    # 2026
+    "2026-01-15", "2026-01-26", "2026-03-03", "2026-03-26", "2026-03-31",
+    "2026-04-03", "2026-04-14", "2026-05-01", "2026-05-28", "2026-06-26",
+    "2026-09-14", "2026-10-02", "2026-10-20", "2026-11-10", "2026-11-24",
+    "2026-12-25",
+]
+
+# ============================================================================
+# CANDLE QUALITY CHECKS
+# ============================================================================
+
+# Sessions the last daily bar may trail the latest session before "stale"
+CANDLE_MAX_LAG_SESSIONS = 1
+# Missing sessions inside an instrument's history tolerated before "gaps"
+CANDLE_MAX_MISSING_SESSIONS = 0
+
+# ============================================================================
+# METRICS / INSTRUMENTATION
+# ============================================================================
+
+METRICS_ENABLED = False           # RS_METRICS=1 in the environment turns it on
+METRICS_FILE = "metrics.json"     # snapshot dumped for the admin panel / webhook /metrics
+METRICS_DUMP_SECONDS = 15         # at most one dump per this many seconds
+# Span histogram upper bounds (seconds)
+METRICS_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+# Admin rerun profiler (sidebar toggle)
+PROFILE_LOG_FILE = "rerun_profiles.jsonl"   # one JSON summary per profiled rerun
+PROFILE_LOG_MAX_ENTRIES = 200
+PROFILE_TOP_N = 25                          # functions listed by cumulative time
+
 # ============================================================================
 # EMAIL CONFIGURATION
 # ============================================================================
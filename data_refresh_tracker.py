@@ -1,80 +1,125 @@
 """
-UPDATED: data_refresh_tracker.py (v3)
-Fixes double "IST IST" suffix issue
-
-Changes from v2:
-1. ✅ Fixed: Double IST suffix removal
-2. ✅ Fixed: IST timezone in datetime parsing
-3. ✅ Uses IST for all operations
-4. ✅ No duplicate "IST" in output
+UPDATED: data_refresh_tracker.py (v4)
+Epoch timestamps + in-process cache
+
+Changes from v3:
+1. ✅ Stores epoch seconds ("last_refresh_ts"); display strings are derived,
+   never re-parsed (v3 "YYYY-MM-DD HH:MM IST" strings are migrated on read)
+2. ✅ Process-level cache invalidated by the file's mtime: a status lookup
+   is one stat() + dict lookup instead of open + json.load per call
+3. ✅ get_all_status(): every refresh type from one read
+4. ✅ Reads no longer create the file; writes are atomic (tmp + os.replace)
 """
 
 import json
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
 from typing import Dict, Any, Optional
 import pytz
 
+from metrics import span
+
 TRACKER_FILE = "refresh_tracker.json"
 IST = pytz.timezone("Asia/Kolkata")
 
+REFRESH_TYPES = ("sectors", "etfs", "comprehensive")
+DISPLAY_FORMAT = "%Y-%m-%d %H:%M IST"
+
+
+def _default_status() -> Dict[str, Any]:
+    return {
+        "last_refresh": "Never",
+        "last_refresh_ts": None,
+        "status": "unknown",
+        "count": 0,
+        "freshness": "unknown",
+    }
+
+
+def _legacy_epoch(ts_str) -> Optional[float]:
+    """Epoch seconds from a v3 "YYYY-MM-DD HH:MM IST" string."""
+    if not isinstance(ts_str, str) or ts_str == "Never":
+        return None
+    try:
+        naive = datetime.strptime(ts_str.replace(" IST", "").strip(), "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+    return IST.localize(naive).timestamp()
+
+
+def _status(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored entry -> status dict with the display string precomputed."""
+    status = _default_status()
+    if not entry:
+        return status
+    ts = entry.get("last_refresh_ts")
+    if ts is None:
+        ts = _legacy_epoch(entry.get("last_refresh"))
+    status.update(
+        last_refresh_ts=ts,
+        last_refresh=(
+            datetime.fromtimestamp(ts, IST).strftime(DISPLAY_FORMAT) if ts is not None else "Never"
+        ),
+        status=entry.get("status", "unknown"),
+        count=entry.get("count", 0),
+        freshness=entry.get("freshness", "unknown"),
+    )
+    return status
+
 
 class DataRefreshTracker:
     """
     Tracks refresh times for sectors, ETFs, and combined data.
-    Uses JSON file as primary storage (no database dependency).
+    Uses JSON file as primary storage (no database dependency); parsed
+    statuses are cached per process until the file's mtime changes.
     """
-    
+
+    _lock = threading.Lock()
+    _stamp = None
+    _cache: Dict[str, Dict[str, Any]] = {}
+
     @staticmethod
-    def _ensure_file_exists():
-        """Create refresh_tracker.json if it doesn't exist."""
-        if not os.path.exists(TRACKER_FILE):
-            default_data = {
-                "sectors": {
-                    "last_refresh": "Never",
-                    "status": "unknown",
-                    "count": 0,
-                    "freshness": "unknown"
-                },
-                "etfs": {
-                    "last_refresh": "Never",
-                    "status": "unknown",
-                    "count": 0,
-                    "freshness": "unknown"
-                },
-                "comprehensive": {
-                    "last_refresh": "Never",
-                    "status": "unknown",
-                    "count": 0,
-                    "freshness": "unknown"
-                }
-            }
-            try:
-                with open(TRACKER_FILE, "w") as f:
-                    json.dump(default_data, f, indent=2)
-            except Exception as e:
-                print(f"Warning: Could not create {TRACKER_FILE}: {e}")
-    
+    def _file_stamp():
+        try:
+            st = os.stat(TRACKER_FILE)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _load() -> Dict[str, Dict[str, Any]]:
+        """{refresh_type: status}, re-read only when the file changed."""
+        cls = DataRefreshTracker
+        stamp = cls._file_stamp()
+        with cls._lock:
+            if stamp == cls._stamp and cls._cache:
+                return cls._cache
+            data = {}
+            if stamp is not None:
+                try:
+                    with span("io", store="refresh_tracker", op="read"), open(TRACKER_FILE, "r") as f:
+                        data = json.load(f)
+                except Exception:
+                    data = {}
+            statuses = {name: _status(entry) for name, entry in data.items()}
+            for name in REFRESH_TYPES:
+                statuses.setdefault(name, _default_status())
+            cls._cache, cls._stamp = statuses, stamp
+            return statuses
+
     @staticmethod
-    def _clean_timestamp(ts_str: str) -> str:
+    def get_all_status() -> Dict[str, Dict[str, Any]]:
         """
-        Clean timestamp by removing duplicate IST suffixes.
-        
-        Args:
-            ts_str: Timestamp string, possibly with duplicate "IST"
-        
+        Every refresh type from one (cached) read.
+
         Returns:
-            Clean timestamp with single " IST" suffix
+            {"sectors" | "etfs" | "comprehensive": {last_refresh,
+            last_refresh_ts, status, count, freshness}}
         """
-        if not ts_str or ts_str == "Never":
-            return ts_str
-        
-        # Remove all " IST" occurrences first
-        clean = ts_str.replace(" IST", "").strip()
-        
-        # Add single " IST" at end
-        return f"{clean} IST"
-    
+        return {name: dict(status) for name, status in DataRefreshTracker._load().items()}
+
     @staticmethod
     def get_status(refresh_type: str) -> Dict[str, Any]:
         """
@@ -84,85 +129,56 @@ class DataRefreshTracker:
             refresh_type: "sectors", "etfs", or "comprehensive"
         
         Returns:
-            Dict with: last_refresh, status, count, freshness
+            Dict with: last_refresh, last_refresh_ts, status, count, freshness
         """
-        DataRefreshTracker._ensure_file_exists()
-        
-        try:
-            with open(TRACKER_FILE, "r") as f:
-                data = json.load(f)
-        except Exception:
-            return {
-                "last_refresh": "Never",
-                "status": "unknown",
-                "count": 0,
-                "freshness": "unknown",
-            }
-        
-        result = data.get(refresh_type, {})
-        
-        # Ensure all required fields exist
-        if not result:
-            return {
-                "last_refresh": "Never",
-                "status": "unknown",
-                "count": 0,
-                "freshness": "unknown",
-            }
-        
-        # Get last_refresh and clean it (remove duplicate IST)
-        last_refresh = result.get("last_refresh", "Never")
-        last_refresh = DataRefreshTracker._clean_timestamp(last_refresh)
-        
-        return {
-            "last_refresh": last_refresh,
-            "status": result.get("status", "unknown"),
-            "count": result.get("count", 0),
-            "freshness": result.get("freshness", "unknown"),
-        }
+        status = DataRefreshTracker._load().get(refresh_type)
+        return dict(status) if status else _default_status()
     
     @staticmethod
     def save_refresh(refresh_type: str, status: str = "success", count: int = 0) -> None:
         """
-        Save refresh timestamp for a data type.
-        Always uses IST timezone for consistency.
+        Save refresh timestamp (epoch seconds) for a data type.
         
         Args:
             refresh_type: "sectors", "etfs", or "comprehensive"
             status: "success" or "failed"
             count: number of records processed
         """
-        DataRefreshTracker._ensure_file_exists()
-        
-        # Get current time in IST (THIS IS THE CRITICAL FIX)
-        now_ist = datetime.now(IST)
-        # Format: "2025-12-29 22:17 IST" (single IST suffix)
-        timestamp_str = now_ist.strftime("%Y-%m-%d %H:%M IST")
-        
-        # Determine freshness
-        freshness = "fresh"  # Just saved, so always fresh
-        
-        try:
-            # Read existing data
-            with open(TRACKER_FILE, "r") as f:
-                data = json.load(f)
-        except Exception:
-            data = {}
-        
-        # Update the specific refresh type
-        data[refresh_type] = {
-            "last_refresh": timestamp_str,
-            "status": status,
-            "count": count,
-            "freshness": freshness,
-        }
-        
-        # Write back to file
-        try:
-            with open(TRACKER_FILE, "w") as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Warning: Could not save refresh status: {e}")
+        cls = DataRefreshTracker
+        now = time.time()
+        with cls._lock:
+            try:
+                with open(TRACKER_FILE, "r") as f:
+                    data = json.load(f)
+            except Exception:
+                data = {}
+
+            # Migrate v3 string timestamps while the file is being rewritten
+            for entry in data.values():
+                if isinstance(entry, dict) and "last_refresh_ts" not in entry:
+                    entry["last_refresh_ts"] = _legacy_epoch(entry.pop("last_refresh", None))
+
+            data[refresh_type] = {
+                "last_refresh_ts": now,
+                "status": status,
+                "count": count,
+                "freshness": "fresh",  # Just saved, so always fresh
+            }
+
+            try:
+                tmp = TRACKER_FILE + ".tmp"
+                with span("io", store="refresh_tracker", op="write"):
+                    with open(tmp, "w") as f:
+                        json.dump(data, f, indent=2)
+                    os.replace(tmp, TRACKER_FILE)
+            except Exception as e:
+                print(f"Warning: Could not save refresh status: {e}")
+                return
+
+            statuses = {name: _status(entry) for name, entry in data.items()}
+            for name in REFRESH_TYPES:
+                statuses.setdefault(name, _default_status())
+            cls._cache, cls._stamp = statuses, cls._file_stamp()
     
     @staticmethod
     def get_last_refresh_time_ist(refresh_type: str) -> Optional[datetime]:
@@ -176,24 +192,8 @@ class DataRefreshTracker:
         Returns:
             datetime object in IST, or None if never refreshed
         """
-        status = DataRefreshTracker.get_status(refresh_type)
-        ts_str = status.get("last_refresh", "Never")
-        
-        if ts_str == "Never":
-            return None
-        
-        try:
-            # Parse IST timestamp back to datetime
-            # Remove " IST" suffix for parsing
-            ts_str_clean = ts_str.replace(" IST", "").strip()
-            # Parse as naive datetime
-            dt_naive = datetime.strptime(ts_str_clean, "%Y-%m-%d %H:%M")
-            # Localize to IST
-            dt_ist = IST.localize(dt_naive)
-            return dt_ist
-        except Exception as e:
-            print(f"Error parsing timestamp '{ts_str}': {e}")
-            return None
+        ts = DataRefreshTracker.get_status(refresh_type)["last_refresh_ts"]
+        return None if ts is None else datetime.fromtimestamp(ts, IST)
     
     @staticmethod
     def get_age_minutes(refresh_type: str) -> int:
@@ -206,15 +206,8 @@ class DataRefreshTracker:
         Returns:
             Age in minutes, or -1 if never refreshed
         """
-        last_time = DataRefreshTracker.get_last_refresh_time_ist(refresh_type)
-        
-        if last_time is None:
-            return -1
-        
-        now = datetime.now(IST)
-        age = now - last_time
-        
-        return int(age.total_seconds() / 60)
+        ts = DataRefreshTracker.get_status(refresh_type)["last_refresh_ts"]
+        return -1 if ts is None else int((time.time() - ts) / 60)
     
     @staticmethod
     def update_status(refresh_type: str, status: str = "success", count: int = 0) -> None:
@@ -0,0 +1,326 @@
+"""
+Data Version
+Monotonic version stamp for published results, polled by every session
+
+Subscribers used to see new data only after pressing "Refresh data" (60 s
+cooldown) and the subscriber page re-read both CSVs on every rerun. The
+refresh pipeline now publishes results through publish_results(), which
+writes the CSV and bumps a small version file; each session polls only that
+version and reloads from a process-wide read model when it moves.
+
+Features:
+- publish_results(kind, df): schema-validated, content-hashed publish –
+  unchanged results (e.g. repeated refreshes after the close) skip the CSV
+  write, the version bump and therefore every session reload; changed
+  results write the CSV, bump the version and record a row-level diff
+- diff_frames() / get_last_changes(kind): rows added / removed / changed
+  (old -> new per column) by the last publish that changed anything
+- current_data_version(): stat() per poll, the file is only re-parsed
+  when its mtime / size changes
+- get_read_model(): validated sector / ETF frames loaded once per version
+  and shared by every session in the process
+- sync_session(state): copy the read model into a session that is behind
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config import DATA_CHANGES_FILE, DATA_VERSION_FILE
+from etf_rs_calculator import ETF_OUTPUT_FILE
+from frame_schema import ETF_SCHEMA, SECTOR_SCHEMA
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+SECTOR_OUTPUT_FILE = "sector_analysis_data.csv"
+
+# kind -> (shared CSV, schema, session_state key, row key column)
+OUTPUTS = {
+    "sectors": (SECTOR_OUTPUT_FILE, SECTOR_SCHEMA, "analysis_results", "Sector"),
+    "etfs": (ETF_OUTPUT_FILE, ETF_SCHEMA, "etf_rs", "ETF Code"),
+}
+
+# Stamped per run, so they differ even when the market data does not
+VOLATILE_COLUMNS = ("Timestamp", "Data Age (min)")
+
+
+# ============================================================================
+# VERSION FILE
+# ============================================================================
+
+class DataVersion:
+    """
+    {"version", "kinds": {kind: version}, "hashes": {kind: content hash},
+    "updated_at"} in one small JSON file.
+    """
+
+    def __init__(self, path: str = DATA_VERSION_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._state = {"version": 0, "kinds": {}, "hashes": {}, "updated_at": None}
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> Dict:
+        """Re-parse the file only if it changed since the last read."""
+        stamp = self._stat()
+        if stamp != self._stamp:
+            state = {"version": 0, "kinds": {}, "hashes": {}, "updated_at": None}
+            if stamp is not None:
+                try:
+                    with span("io", store="data_version", op="read"), \
+                            open(self.path, "r", encoding="utf-8") as f:
+                        state.update(json.load(f))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Unreadable data version file: {e}")
+                    return self._state
+            self._state, self._stamp = state, stamp
+        return self._state
+
+    def read(self) -> Dict:
+        with self._lock:
+            state = self._load()
+            return {**state, "kinds": dict(state["kinds"]), "hashes": dict(state["hashes"])}
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return int(self._load()["version"])
+
+    def bump(self, kind: str, digest: Optional[str] = None) -> int:
+        """Advance the version for `kind`; returns the new global version."""
+        with self._lock:
+            state = self._load()
+            version = int(state["version"]) + 1
+            state = {
+                "version": version,
+                "kinds": {**state["kinds"], kind: version},
+                "hashes": {**state["hashes"], kind: digest},
+                "updated_at": time.time(),
+            }
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.path)
+            self._state, self._stamp = state, self._stat()
+        logger.info(f"Data version {version} ({kind})")
+        return version
+
+
+_versions: Optional[DataVersion] = None
+
+
+def get_data_version() -> DataVersion:
+    """Process-wide version file reader / writer."""
+    global _versions
+    if _versions is None:
+        _versions = DataVersion()
+    return _versions
+
+
+def current_data_version() -> int:
+    return get_data_version().version
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Hash of a result frame's CSV text, per-run stamp columns excluded."""
+    stable = df.drop(columns=[c for c in VOLATILE_COLUMNS if c in df.columns])
+    return hashlib.sha1(stable.to_csv(index=False).encode("utf-8")).hexdigest()
+
+
+def publish_results(kind: str, df: pd.DataFrame) -> Optional[int]:
+    """
+    Validate and publish a finished result frame: shared CSV, version bump
+    and row diff. Returns the new version, or None when the content matches
+    the last publish (nothing is written, nobody is notified).
+    """
+    path, schema, _, key = OUTPUTS[kind]
+    df, _ = schema.validate(df)
+    versions = get_data_version()
+    digest = content_hash(df)
+    if digest == versions.read()["hashes"].get(kind):
+        logger.info(f"{kind}: results unchanged, publish skipped")
+        return None
+
+    text = df.to_csv(index=False)
+    previous = _read_csv(path)
+    changes = diff_frames(previous, pd.read_csv(io.StringIO(text)), key)
+
+    tmp = path + ".tmp"
+    with span("io", store=kind, op="write"):
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    version = versions.bump(kind, digest)
+    _save_changes(kind, version, changes)
+    logger.info(
+        f"{kind}: published v{version} ({len(changes['changed'])} changed, "
+        f"{len(changes['added'])} added, {len(changes['removed'])} removed)"
+    )
+    return version
+
+
+def _read_csv(path: str) -> Optional[pd.DataFrame]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with span("io", store=os.path.basename(path), op="read"):
+            return pd.read_csv(path)
+    except Exception as e:
+        logger.warning(f"Could not read previous {path}: {e}")
+        return None
+
+
+# ============================================================================
+# ROW DIFF
+# ============================================================================
+
+def _plain(value):
+    """JSON-safe scalar."""
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def diff_frames(
+    old: Optional[pd.DataFrame],
+    new: pd.DataFrame,
+    key: str,
+    ignore=VOLATILE_COLUMNS,
+) -> Dict:
+    """
+    {"added": [key], "removed": [key], "changed": {key: {column: [old, new]}}}
+    between two result frames matched on `key`. Columns in `ignore` and
+    columns missing on either side are not compared.
+    """
+    if key not in new.columns:
+        return {"added": [], "removed": [], "changed": {}}
+    new = new.drop_duplicates(key).set_index(key)
+    if old is None or key not in old.columns:
+        return {"added": [str(k) for k in new.index], "removed": [], "changed": {}}
+    old = old.drop_duplicates(key).set_index(key)
+
+    columns = [c for c in new.columns if c in old.columns and c not in ignore]
+    common = new.index.intersection(old.index, sort=False)
+    before = old.loc[common, columns]
+    after = new.loc[common, columns]
+    # Compare as text: both sides came through the same CSV round trip
+    differs = before.astype(str).to_numpy() != after.astype(str).to_numpy()
+
+    changed: Dict[str, Dict[str, List]] = {}
+    for i, j in zip(*differs.nonzero()):
+        row = changed.setdefault(str(common[i]), {})
+        row[columns[j]] = [_plain(before.iat[i, j]), _plain(after.iat[i, j])]
+    return {
+        "added": [str(k) for k in new.index.difference(old.index, sort=False)],
+        "removed": [str(k) for k in old.index.difference(new.index, sort=False)],
+        "changed": changed,
+    }
+
+
+_changes_lock = threading.Lock()
+
+
+def _save_changes(kind: str, version: int, changes: Dict) -> None:
+    with _changes_lock:
+        try:
+            with open(DATA_CHANGES_FILE, "r", encoding="utf-8") as f:
+                log = json.load(f)
+        except (OSError, ValueError):
+            log = {}
+        log[kind] = {"version": version, "at": time.time(), **changes}
+        tmp = DATA_CHANGES_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(log, f, default=str)
+        os.replace(tmp, DATA_CHANGES_FILE)
+
+
+def get_last_changes(kind: str) -> Optional[Dict]:
+    """Diff recorded by the last publish of `kind` that changed anything."""
+    try:
+        with open(DATA_CHANGES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get(kind)
+    except (OSError, ValueError):
+        return None
+
+
+# ============================================================================
+# SHARED READ MODEL
+# ============================================================================
+
+class SharedReadModel:
+    """Validated result frames, reloaded from disk only when the version moves."""
+
+    def __init__(self, versions: Optional[DataVersion] = None):
+        self.versions = versions or get_data_version()
+        self.version = None
+        self.frames: Dict[str, Optional[pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def get(self) -> Tuple[int, Dict[str, Optional[pd.DataFrame]]]:
+        version = self.versions.version
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self.frames = {kind: _load_output(kind) for kind in OUTPUTS}
+                    self.version = version
+        return self.version, self.frames
+
+
+def _load_output(kind: str) -> Optional[pd.DataFrame]:
+    path, schema, _, _ = OUTPUTS[kind]
+    if not os.path.exists(path):
+        return None
+    try:
+        with span("io", store=kind, op="read"):
+            raw = pd.read_csv(path)
+        df, report = schema.validate(raw)
+    except Exception as e:
+        logger.error(f"Error loading {path}: {e}")
+        return None
+    logger.info(f"Read model {kind}: {report.summary()}")
+    return df
+
+
+_read_model: Optional[SharedReadModel] = None
+
+
+def get_read_model() -> SharedReadModel:
+    global _read_model
+    if _read_model is None:
+        _read_model = SharedReadModel()
+    return _read_model
+
+
+def sync_session(state) -> bool:
+    """
+    Copy the shared frames into a session (st.session_state or any mapping)
+    whose data_version is behind. Returns True when anything was loaded.
+    """
+    version, frames = get_read_model().get()
+    if state.get("data_version") == version:
+        return False
+    for kind, (_, _, key, _) in OUTPUTS.items():
+        if frames.get(kind) is not None:
+            state[key] = frames[kind].copy()
+    state["data_version"] = version
+    return True
+
+
+def data_version_changed(state) -> bool:
+    """Cheap poll: has anything been published since this session synced?"""
+    return state.get("data_version") != current_data_version()
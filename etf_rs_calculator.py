@@ -4,79 +4,102 @@ Enhanced ETF RS Calculator V2 - CIRCULAR IMPORT FIXED
 Calculates: LTP, % Change, 20-DMA, % Change 20 DMA, RS-21/55/123, TLDR
 
 Features:
-- Fetch 400 days of historical data per ETF
+- Fetch just enough daily history per ETF for the longest RS period
+  (trading_calendar.lookback_days)
 - Calculate 20-day moving average
 - Compute daily % change from previous close
 - Compute % change from 20-DMA
 - Calculate RS vs NIFTY 50 benchmark
 - Generate TLDR summary for each ETF
+- Candle quality flags (stale / gaps / duplicates / bad closes) per ETF
+- Partial refresh: re-fetch only stale / failed ETFs, the rest from history
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import os
 import time
+from functools import partial
+
+from config import ETF_RATE_LIMIT_DELAY, PARTIAL_REFRESH_MAX_AGE_MINUTES
+from instrument_registry import resolve_token
+from intraday_bars import date_windows
+from metrics import span, timed
+from rs_ratings import add_rs_ratings
+from price_history import get_history_store
+from ltp_quotes import fetch_ltps, has_recent_history, splice_ltps
+from token_health import get_health_board
+from candle_quality import CandleQualityChecker
+from trading_calendar import ist_now, lookback_days
+from freshness import stale_tokens
+from retry_scheduler import RetryableFetchError, RetryScheduler, is_retryable_message
 
 BENCHMARK_TOKEN = "99926000"  # NIFTY 50 index token
 BENCHMARK_EXCHANGE = "NSE"
+BENCHMARK_KEY = "benchmark"
+
 
+def get_candles(smartapi, token, days_back=400, exchange="NSE", interval="ONE_DAY"):
+    """
+    Fetch candles for given token with rate limit protection (daily by
+    default; intraday intervals are fetched in per-request day windows).
 
-def get_candles(smartapi, token, days_back=400, exchange="NSE"):
-    """Fetch daily candles for given token with rate limit protection."""
-    to_date = datetime.now()
+    Transient server errors ("something went wrong" / AB1004) raise
+    RetryableFetchError so the caller can defer the token instead of
+    sleeping inline.
+    """
+    to_date = ist_now()
     from_date = to_date - timedelta(days=days_back)
     
-    params = {
-        "exchange": exchange,
-        "symboltoken": str(token),
-        "interval": "ONE_DAY",
-        "fromdate": from_date.strftime("%Y-%m-%d 09:15"),
-        "todate": to_date.strftime("%Y-%m-%d 15:30"),
-    }
-    
-    retries = 3
-    for attempt in range(retries):
-        try:
-            data = smartapi.getCandleData(params)
+    try:
+        frames = []
+        for start, end in date_windows(from_date, to_date, interval):
+            params = {
+                "exchange": exchange,
+                "symboltoken": str(token),
+                "interval": interval,
+                "fromdate": start.strftime("%Y-%m-%d 09:15"),
+                "todate": end.strftime("%Y-%m-%d 15:30"),
+            }
+            with span("fetch", token=token, interval=interval):
+                data = smartapi.getCandleData(params)
             
             # Check for rate limit error
             if isinstance(data, str) and "exceeding access rate" in data.lower():
                 print(f"⚠️ Rate limit hit for token {token}, using cached fallback")
                 return None
             
-            if not data or not data.get("status") or not data.get("data"):
-                return None
-            
-            df = pd.DataFrame(
-                data["data"],
-                columns=["timestamp", "open", "high", "low", "close", "volume"],
-            )
-            
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            df["close"] = df["close"].astype(float)
-            
-            return df.sort_values("timestamp").reset_index(drop=True)
+            if data and data.get("status") and data.get("data"):
+                frames.append(pd.DataFrame(
+                    data["data"],
+                    columns=["timestamp", "open", "high", "low", "close", "volume"],
+                ))
         
-        except Exception as e:
-            error_msg = str(e).lower()
-            
-            # Rate limit: stop immediately, don't retry
-            if "exceeding access rate" in error_msg:
-                print(f"⚠️ Rate limit hit for token {token}, no retry")
-                return None
-            
-            # Server error: wait and retry
-            if "something went wrong" in error_msg or "ab1004" in error_msg:
-                if attempt < retries - 1:
-                    wait_time = 60 + (attempt * 30)
-                    print(f"⚠️ Server error, waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
-                    continue
-            
-            print(f"⚠️ Error fetching candles for token {token}: {str(e)[:80]}")
+        if not frames:
             return None
+        
+        df = pd.concat(frames, ignore_index=True)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        df["close"] = df["close"].astype(float)
+        df = df.drop_duplicates("timestamp", keep="last")
+        
+        return df.sort_values("timestamp").reset_index(drop=True)
     
-    return None
+    except Exception as e:
+        error_msg = str(e).lower()
+        
+        # Rate limit: stop immediately, don't retry
+        if "exceeding access rate" in error_msg:
+            print(f"⚠️ Rate limit hit for token {token}, no retry")
+            return None
+        
+        # Server error: let the caller schedule a deferred retry
+        if is_retryable_message(error_msg):
+            raise RetryableFetchError(str(e)) from e
+        
+        print(f"⚠️ Error fetching candles for token {token}: {str(e)[:80]}")
+        return None
 
 
 def compute_rs(etf_df, bm_df, period):
@@ -150,28 +173,138 @@ def get_etf_tldr(rs21: float, rs55: float, rs123: float, pct_change: float) -> s
     return "Sideways / volatile - Wait for clear trend"
 
 
-def load_cached_etf_data(etf_name):
-    """Load cached data from CSV if fresh data unavailable."""
-    try:
-        cached_df = pd.read_csv("etf_rs_output.csv")
-        cached_row = cached_df[cached_df['Ticker'] == etf_name]
-        
-        if not cached_row.empty:
-            return {
-                'LTP': cached_row.iloc[0].get('LTP', 0),
-                'Change': cached_row.iloc[0].get('Change', 0),
-                'RS_21': cached_row.iloc[0].get('RS_21', '-'),
-                'RS_55': cached_row.iloc[0].get('RS_55', '-'),
-                'RS_123': cached_row.iloc[0].get('RS_123', '-'),
-                'TLDR': 'Using cached data'
-            }
-    except Exception as e:
-        print(f"Cache lookup failed for {etf_name}: {e}")
+ETF_OUTPUT_FILE = "etf_rs_output.csv"
+
+# Columns carried by a fallback row (ratings/ranks are recomputed per run)
+ETF_METRIC_COLUMNS = [
+    "ETF Code", "Sector/Theme", "LTP", "% Change", "% Change 20 DMA", "20 DMA",
+    "RS_21", "RS_55", "RS_123", "TLDR", "Timestamp", "Quality",
+]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ETFFallbackCache:
+    """
+    Last-good ETF rows from the previous output, indexed by ETF Code.
+
+    The snapshot is read once (on the first miss of a refresh) and every
+    later lookup is a dict hit. Rows keep their original Timestamp, so an
+    ETF that keeps failing shows a growing Data Age instead of looking fresh.
+    """
+
+    def __init__(self, path=ETF_OUTPUT_FILE):
+        self.path = path
+        self._rows = None
+
+    def _load(self):
+        if self._rows is not None:
+            return self._rows
+        self._rows = {}
+        try:
+            cached_df = pd.read_csv(self.path)
+        except FileNotFoundError:
+            return self._rows
+        except Exception as e:
+            print(f"Cache load failed for {self.path}: {e}")
+            return self._rows
+
+        if "ETF Code" not in cached_df.columns:
+            return self._rows
+        if "Timestamp" not in cached_df.columns:
+            # Snapshots written before rows were timestamped: use file time
+            mtime = datetime.fromtimestamp(os.path.getmtime(self.path))
+            cached_df["Timestamp"] = mtime.strftime(TIMESTAMP_FORMAT)
+
+        cols = [c for c in ETF_METRIC_COLUMNS if c in cached_df.columns]
+        cached_df = cached_df[cols].drop_duplicates("ETF Code", keep="last")
+        cached_df = cached_df.astype(object).where(cached_df.notna(), "-")
+        self._rows = {row["ETF Code"]: row for row in cached_df.to_dict("records")}
+        return self._rows
+
+    def get(self, etf_code, sector=None):
+        """Full metric row for `etf_code` with Data Age (min), or None."""
+        cached = self._load().get(etf_code)
+        if cached is None:
+            return None
+        row = dict(cached)
+        if sector is not None:
+            row["Sector/Theme"] = sector
+        try:
+            ts = datetime.strptime(str(row["Timestamp"]), TIMESTAMP_FORMAT)
+            row["Data Age (min)"] = int((datetime.now() - ts).total_seconds() // 60)
+        except ValueError:
+            row["Data Age (min)"] = None
+        return row
+
+    def __len__(self):
+        return len(self._load())
+
+
+@timed("compute", stage="etf_row")
+def _etf_metrics(etf_code, sector, etf_df, bm_df):
+    """Full metric row for one ETF from its candles and the benchmark's."""
+    if bm_df is not None and len(bm_df) > 0:
+        rs_21 = compute_rs(etf_df, bm_df, 21)
+        rs_55 = compute_rs(etf_df, bm_df, 55)
+        rs_123 = compute_rs(etf_df, bm_df, 123)
+    else:
+        rs_21 = rs_55 = rs_123 = None
+    
+    ltp = round(etf_df["close"].iloc[-1], 2)
+    
+    prev_close = etf_df["close"].iloc[-2] if len(etf_df) > 1 else etf_df["close"].iloc[-1]
+    pct_change = round(((ltp - prev_close) / prev_close * 100) if prev_close != 0 else 0, 2)
+    
+    dma_20 = calculate_20_dma(etf_df)
+    pct_change_20dma = calculate_pct_change_from_20dma(etf_df)
     
-    return None
+    tldr = get_etf_tldr(
+        rs_21 if rs_21 is not None else 0.0,
+        rs_55 if rs_55 is not None else 0.0,
+        rs_123 if rs_123 is not None else 0.0,
+        pct_change if pct_change is not None else 0.0,
+    )
+    
+    print(f"   ✅ RS: {rs_21}/{rs_55}/{rs_123}")
+    return {
+        "ETF Code": etf_code,
+        "Sector/Theme": sector,
+        "LTP": ltp,
+        "% Change": pct_change,
+        "% Change 20 DMA": pct_change_20dma,
+        "20 DMA": dma_20,
+        "RS_21": round(rs_21, 2) if rs_21 is not None else "-",
+        "RS_55": round(rs_55, 2) if rs_55 is not None else "-",
+        "RS_123": round(rs_123, 2) if rs_123 is not None else "-",
+        "TLDR": tldr,
+        "Timestamp": datetime.now().strftime(TIMESTAMP_FORMAT),
+        "Data Age (min)": 0,
+    }
+
+
+def _paced(fetch, limiter):
+    """Wrap a fetch so every call (retries included) waits on `limiter`."""
+    if limiter is None:
+        return fetch
+
+    def paced(*args, **kwargs):
+        limiter.acquire()
+        return fetch(*args, **kwargs)
+
+    return paced
+
+
+def _attach_quality(results, quality):
+    """Add Quality to fresh rows ({key: row}); cached rows keep their own."""
+    flags = quality.flags()
+    if flags.get(BENCHMARK_KEY, "OK") != "OK":
+        print(f"⚠️ Benchmark candles flagged: {flags[BENCHMARK_KEY]}")
+    for key, row in results.items():
+        if key in flags:
+            row["Quality"] = flags[key]
 
 
-def calculate_etf_rs(smartapi, etf_csv_path, periods=(21, 55, 123)):
+def calculate_etf_rs(smartapi, etf_csv_path, periods=(21, 55, 123), limiter=None, progress_callback=None):
     """
     Read ETFs-List_updated.csv and compute complete metrics for each ETF.
     
@@ -184,6 +317,16 @@ def calculate_etf_rs(smartapi, etf_csv_path, periods=(21, 55, 123)):
     - % Change 20 DMA (Price vs 20-DMA)
     - RS_21, RS_55, RS_123
     - TLDR (narrative summary)
+    - Timestamp, Data Age (min) (0 for fresh rows, age of the fallback row otherwise)
+    - Quality (candle_quality flags for fresh rows; "OK" when clean)
+    - RS_*_Rating / RS_*_Rank / RS_Composite* (see rs_ratings)
+
+    ETFs that hit a transient server error are deferred to a RetryScheduler
+    and re-fetched after the rest of the list, then merged back in order.
+
+    With a shared `limiter` (see refresh_orchestrator) every request waits
+    for its slot instead of the fixed ETF_RATE_LIMIT_DELAY sleep.
+    progress_callback(i, total, etf_code) is called before each ETF.
     """
     
     try:
@@ -192,101 +335,94 @@ def calculate_etf_rs(smartapi, etf_csv_path, periods=(21, 55, 123)):
         print(f"❌ Failed to load ETF list: {e}")
         return None
     
-    # Get benchmark data
+    scheduler = RetryScheduler()
+    days_back = lookback_days(max(periods) + 1)
+    candles = _paced(get_candles, limiter)
+
+    # Get benchmark data (every RS depends on it, so retry in place)
     print("Fetching benchmark (NIFTY 50) data...")
-    bm_df = get_candles(
-        smartapi,
-        BENCHMARK_TOKEN,
-        days_back=400,
-        exchange=BENCHMARK_EXCHANGE,
+    bm_df = scheduler.call(
+        partial(candles, smartapi, BENCHMARK_TOKEN, days_back, BENCHMARK_EXCHANGE),
+        key=BENCHMARK_TOKEN,
     )
     
+    history = get_history_store()
+    health = get_health_board()
+
     if bm_df is None:
         print("⚠️ Benchmark data unavailable, using fallback")
+        health.record_failure(BENCHMARK_TOKEN, scheduler.failed.get(BENCHMARK_TOKEN, "No data returned"), "Benchmark")
         bm_df = pd.DataFrame()  # Empty fallback
+    else:
+        health.record_success(BENCHMARK_TOKEN, "Benchmark")
+        history.update(BENCHMARK_TOKEN, bm_df)
     
-    results = []
+    results = {}
     failed_count = 0
+    fallback = ETFFallbackCache()
+    quality = CandleQualityChecker(window_bars=max(periods) + 1)
+    quality.add(BENCHMARK_KEY, bm_df)
+
+    def handle(idx, etf_code, token, sector, etf_df):
+        """Compute (or fall back) one ETF. Returns False when it must be skipped."""
+        # Handle no data (API rate limit or unavailable)
+        if etf_df is None or len(etf_df) == 0:
+            print(f"   ⚠️ No fresh data for {etf_code}, checking cache...")
+            cached = fallback.get(etf_code, sector)
+            if cached:
+                results[idx] = cached
+                print(f"   ✅ Using cached data ({cached['Data Age (min)']} min old)")
+                return True
+            print(f"   ⏭️ Skipping (no data, no cache)")
+            return False
+
+        # Validate data
+        if 'close' not in etf_df.columns:
+            print(f"   ⚠️ Invalid data structure")
+            return False
+
+        history.update(token, etf_df)
+        quality.add(idx, etf_df)
+        results[idx] = _etf_metrics(etf_code, sector, etf_df, bm_df)
+        return True
+
+    def record_fetch(token, etf_code, etf_df, error="No data returned"):
+        if etf_df is None or len(etf_df) == 0:
+            health.record_failure(token, error, etf_code)
+        else:
+            health.record_success(token, etf_code)
+
+    pending = {}
     
     for idx, row in etf_list.iterrows():
         etf_code = row.get("ETF Code", f"ETF_{idx}")
-        token = row.get("Token") or row.get("token") or row.get("numeric_token")
+        token = resolve_token(row)
         sector = row.get("Sector/Theme", "Unknown")
         
         print(f"[{idx+1}/{len(etf_list)}] Processing {etf_code}...")
+        if progress_callback:
+            progress_callback(idx + 1, len(etf_list), etf_code)
         
         try:
-            # Try to get fresh data
-            etf_df = get_candles(smartapi, token, days_back=400, exchange="NSE")
-            
-            # Handle no data (API rate limit or unavailable)
-            if etf_df is None or len(etf_df) == 0:
-                print(f"   ⚠️ No fresh data for {etf_code}, checking cache...")
-                
-                cached = load_cached_etf_data(etf_code)
-                if cached:
-                    results.append({
-                        "ETF Code": etf_code,
-                        "Sector/Theme": sector,
-                        "LTP": cached['LTP'],
-                        "% Change": cached['Change'],
-                        "% Change 20 DMA": '-',
-                        "20 DMA": '-',
-                        "RS_21": cached['RS_21'],
-                        "RS_55": cached['RS_55'],
-                        "RS_123": cached['RS_123'],
-                        "TLDR": cached['TLDR'],
-                    })
-                    print(f"   ✅ Using cached data")
-                    continue
-                
-                failed_count += 1
-                print(f"   ⏭️ Skipping (no data, no cache)")
+            # Breaker open: serve the cached row without spending a request
+            if not health.allow(token, etf_code):
+                print(f"   🔌 Circuit open, skipping fetch")
+                if not handle(idx, etf_code, token, sector, None):
+                    failed_count += 1
                 continue
-            
-            # Validate data
-            if 'close' not in etf_df.columns or len(etf_df) == 0:
-                print(f"   ⚠️ Invalid data structure")
-                failed_count += 1
+
+            fetch = partial(candles, smartapi, token, days_back, "NSE")
+            try:
+                etf_df = fetch()
+            except RetryableFetchError as e:
+                delay = scheduler.defer(idx, fetch, error=e)
+                pending[idx] = (etf_code, token, sector)
+                print(f"   ⏳ Server error, retry deferred ~{delay:.0f}s")
                 continue
-            
-            # Calculate metrics
-            if bm_df is not None and len(bm_df) > 0:
-                rs_21 = compute_rs(etf_df, bm_df, 21)
-                rs_55 = compute_rs(etf_df, bm_df, 55)
-                rs_123 = compute_rs(etf_df, bm_df, 123)
-            else:
-                rs_21 = rs_55 = rs_123 = None
-            
-            ltp = round(etf_df["close"].iloc[-1], 2)
-            
-            prev_close = etf_df["close"].iloc[-2] if len(etf_df) > 1 else etf_df["close"].iloc[-1]
-            pct_change = round(((ltp - prev_close) / prev_close * 100) if prev_close != 0 else 0, 2)
-            
-            dma_20 = calculate_20_dma(etf_df)
-            pct_change_20dma = calculate_pct_change_from_20dma(etf_df)
-            
-            tldr = get_etf_tldr(
-                rs_21 if rs_21 is not None else 0.0,
-                rs_55 if rs_55 is not None else 0.0,
-                rs_123 if rs_123 is not None else 0.0,
-                pct_change if pct_change is not None else 0.0,
-            )
-            
-            results.append({
-                "ETF Code": etf_code,
-                "Sector/Theme": sector,
-                "LTP": ltp,
-                "% Change": pct_change,
-                "% Change 20 DMA": pct_change_20dma,
-                "20 DMA": dma_20,
-                "RS_21": round(rs_21, 2) if rs_21 is not None else "-",
-                "RS_55": round(rs_55, 2) if rs_55 is not None else "-",
-                "RS_123": round(rs_123, 2) if rs_123 is not None else "-",
-                "TLDR": tldr,
-            })
-            
-            print(f"   ✅ RS: {rs_21}/{rs_55}/{rs_123}")
+
+            record_fetch(token, etf_code, etf_df)
+            if not handle(idx, etf_code, token, sector, etf_df):
+                failed_count += 1
         
         except Exception as e:
             print(f"   ❌ Error: {str(e)[:80]}")
@@ -294,14 +430,197 @@ def calculate_etf_rs(smartapi, etf_csv_path, periods=(21, 55, 123)):
             continue
         
         # Rate limit protection
-        time.sleep(0.5)
+        if limiter is None:
+            time.sleep(ETF_RATE_LIMIT_DELAY)
+
+    # Deferred retries: most of the backoff elapsed while the rest fetched
+    if pending:
+        print(f"\n🔁 Retrying {len(pending)} deferred ETFs...")
+        for idx, etf_df in scheduler.drain():
+            etf_code, token, sector = pending.pop(idx)
+            print(f"   🔁 {etf_code}")
+            record_fetch(token, etf_code, etf_df)
+            try:
+                if not handle(idx, etf_code, token, sector, etf_df):
+                    failed_count += 1
+            except Exception as e:
+                print(f"   ❌ Error: {str(e)[:80]}")
+                failed_count += 1
+        for idx, (etf_code, token, sector) in pending.items():
+            error = scheduler.failed.get(idx, "")
+            print(f"   ⚠️ {etf_code} still failing: {error[:80]}")
+            record_fetch(token, etf_code, None, error)
+            if not handle(idx, etf_code, token, sector, None):
+                failed_count += 1
     
+    history.save()
+    health.save()
+
     if not results:
         print("\n⚠️ No ETF data obtained")
         return None
-    
-    df_result = pd.DataFrame(results)
+
+    _attach_quality(results, quality)
+    ordered = [results[idx] for idx in sorted(results)]
+    df_result = add_rs_ratings(pd.DataFrame(ordered), ["RS_21", "RS_55", "RS_123"])
     print(f"\n✅ Processed: {len(results)} ETFs")
     print(f"⚠️ Failed: {failed_count} ETFs")
     
     return df_result
+
+
+def calculate_etf_rs_ltp(smartapi, etf_csv_path, periods=(21, 55, 123)):
+    """
+    Intraday fast refresh for ETFs: batched LTP quotes (a handful of calls
+    for the whole list) spliced into stored daily history, then the same
+    metrics as calculate_etf_rs.
+
+    Returns None when stored history is missing, too short or stale for any
+    tradable ETF (or the benchmark quote fails) – run calculate_etf_rs then.
+    """
+    try:
+        etf_list = pd.read_csv(etf_csv_path)
+    except Exception as e:
+        print(f"❌ Failed to load ETF list: {e}")
+        return None
+
+    health = get_health_board()
+    entries = [
+        (idx, row.get("ETF Code", f"ETF_{idx}"), resolve_token(row), row.get("Sector/Theme", "Unknown"))
+        for idx, row in etf_list.iterrows()
+    ]
+    min_bars = max(periods) + 1
+    tokens = [BENCHMARK_TOKEN] + [
+        token for _, _, token, _ in entries if token and not health.is_open(token)
+    ]
+    if not all(has_recent_history(t, min_bars) for t in tokens):
+        print("⚠️ Stored history not warm enough for LTP refresh")
+        return None
+
+    ltps = fetch_ltps(smartapi, tokens)
+    if BENCHMARK_TOKEN not in ltps:
+        print("⚠️ Benchmark LTP unavailable")
+        return None
+    splice_ltps(ltps)
+
+    history = get_history_store()
+    history.save()
+    bm_df = history.frame(BENCHMARK_TOKEN)
+    fallback = ETFFallbackCache()
+    quality = CandleQualityChecker(window_bars=max(periods) + 1)
+    quality.add(BENCHMARK_KEY, bm_df)
+
+    results = {}
+    for idx, etf_code, token, sector in entries:
+        etf_df = history.frame(token) if token and token in ltps else None
+        if etf_df is None:
+            cached = fallback.get(etf_code, sector)
+            if cached:
+                results[idx] = cached
+            continue
+        quality.add(idx, etf_df)
+        results[idx] = _etf_metrics(etf_code, sector, etf_df, bm_df)
+
+    if not results:
+        return None
+    _attach_quality(results, quality)
+    results = [results[idx] for idx in sorted(results)]
+
+    print(f"\n⚡ LTP refresh: {len(ltps)} quotes, {len(results)} ETFs")
+    return add_rs_ratings(pd.DataFrame(results), ["RS_21", "RS_55", "RS_123"])
+
+
+def calculate_etf_rs_partial(
+    smartapi,
+    etf_csv_path,
+    periods=(21, 55, 123),
+    max_age_minutes=PARTIAL_REFRESH_MAX_AGE_MINUTES,
+    limiter=None,
+    progress_callback=None,
+):
+    """
+    Partial refresh for ETFs: only tokens that freshness.stale_tokens flags
+    (never fetched, failed last cycle, short history, older than
+    `max_age_minutes`, ...) are re-fetched; every other ETF is recomputed
+    from stored history against the same benchmark, and ETFs with no usable
+    data fall back to the previous output like calculate_etf_rs.
+
+    `limiter` / progress_callback as in calculate_etf_rs (progress counts
+    the stale ETFs only).
+
+    Returns None when the benchmark cannot be brought up to date – run
+    calculate_etf_rs then.
+    """
+    try:
+        etf_list = pd.read_csv(etf_csv_path)
+    except Exception as e:
+        print(f"❌ Failed to load ETF list: {e}")
+        return None
+
+    health = get_health_board()
+    history = get_history_store()
+    scheduler = RetryScheduler()
+    days_back = lookback_days(max(periods) + 1)
+    candles = _paced(get_candles, limiter)
+    min_bars = max(periods) + 1
+    entries = [
+        (idx, row.get("ETF Code", f"ETF_{idx}"), resolve_token(row), row.get("Sector/Theme", "Unknown"))
+        for idx, row in etf_list.iterrows()
+    ]
+    tokens = [BENCHMARK_TOKEN] + [token for _, _, token, _ in entries if token]
+    stale = stale_tokens(tokens, max_age_minutes, min_bars)
+    print(f"🩹 Partial refresh: {len(stale)}/{len(tokens)} tokens stale")
+
+    def fetch(token, name):
+        df = scheduler.call(partial(candles, smartapi, token, days_back, "NSE"), key=token)
+        if df is None or len(df) == 0:
+            health.record_failure(token, scheduler.failed.get(token, "No data returned"), name)
+            return None
+        health.record_success(token, name)
+        history.update(token, df)
+        return df
+
+    if BENCHMARK_TOKEN in stale and fetch(BENCHMARK_TOKEN, "Benchmark") is None:
+        print("⚠️ Benchmark refresh failed")
+        return None
+    bm_df = history.frame(BENCHMARK_TOKEN)
+    if bm_df is None:
+        return None
+
+    fetched = set()
+    todo = [(etf_code, token) for _, etf_code, token, _ in entries if token in stale]
+    for i, (etf_code, token) in enumerate(todo):
+        if progress_callback:
+            progress_callback(i + 1, len(todo), etf_code)
+        if health.allow(token, etf_code):
+            print(f"   🔁 {etf_code} ({stale[token]})")
+            if fetch(token, etf_code) is not None:
+                fetched.add(token)
+            if limiter is None:
+                time.sleep(ETF_RATE_LIMIT_DELAY)
+
+    history.save()
+    health.save()
+
+    fallback = ETFFallbackCache()
+    quality = CandleQualityChecker(window_bars=max(periods) + 1)
+    quality.add(BENCHMARK_KEY, bm_df)
+    results = {}
+    for idx, etf_code, token, sector in entries:
+        etf_df = history.frame(token) if token else None
+        if etf_df is None or len(etf_df) < min_bars:
+            cached = fallback.get(etf_code, sector)
+            if cached:
+                results[idx] = cached
+            continue
+        quality.add(idx, etf_df)
+        results[idx] = _etf_metrics(etf_code, sector, etf_df, bm_df)
+        last_fetch = (health.entry(token) or {}).get("last_success_at")
+        if token not in fetched and last_fetch:
+            results[idx]["Data Age (min)"] = int((time.time() - last_fetch) // 60)
+
+    if not results:
+        return None
+    _attach_quality(results, quality)
+    ordered = [results[idx] for idx in sorted(results)]
+    return add_rs_ratings(pd.DataFrame(ordered), ["RS_21", "RS_55", "RS_123"])
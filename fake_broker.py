@@ -0,0 +1,402 @@
+"""
+Fake Broker - Recorded-Replay SmartConnect
+Deterministic stand-in for SmartApi.SmartConnect so refresh performance
+can be measured offline, without AngelOne credentials or TOTP.
+
+Features:
+- RecordingSmartConnect: wraps a live SmartConnect and saves every
+  getCandleData response to a fixture file (one JSON per token/interval)
+- FakeSmartConnect: replays fixtures (or seeded synthetic candles when no
+  fixture exists) with configurable latency, jitter and error injection:
+    * rate-limit strings ("Access denied because of exceeding access rate")
+      both injected at random and enforced when calls exceed `max_rps`
+    * server errors ("Something went wrong ... AB1004") raised as exceptions
+- getMarketData("LTP", ...) quotes derived from the same candles
+- make_fake_connector(): AngelOneConnector wired to a FakeSmartConnect
+- FakeSmartAPIServer: local aiohttp stand-in for the SmartAPI REST
+  candle / quote routes (backed by a FakeSmartConnect) for the async client
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = "fixtures/candles"
+RATE_LIMIT_MESSAGE = "Access denied because of exceeding access rate"
+SERVER_ERROR_MESSAGE = "Something went wrong, please try again later (AB1004)"
+
+_DATE_FMT = "%Y-%m-%d %H:%M"
+SYNTHETIC_START = "2018-01-01"
+SYNTHETIC_INTRADAY_DAYS = 60
+
+_INTERVAL_MINUTES = {
+    "ONE_MINUTE": 1, "THREE_MINUTE": 3, "FIVE_MINUTE": 5, "TEN_MINUTE": 10,
+    "FIFTEEN_MINUTE": 15, "THIRTY_MINUTE": 30, "ONE_HOUR": 60,
+}
+
+
+def fixture_path(fixture_dir: str, token, interval: str = "ONE_DAY") -> str:
+    return os.path.join(fixture_dir, f"{interval}_{token}.json")
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+class RecordingSmartConnect:
+    """Proxy around a live SmartConnect that records candle responses."""
+
+    def __init__(self, smartapi, fixture_dir: str = FIXTURE_DIR):
+        self._smartapi = smartapi
+        self.fixture_dir = fixture_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def getCandleData(self, params):
+        data = self._smartapi.getCandleData(params)
+        if isinstance(data, dict) and data.get("status") and data.get("data"):
+            path = fixture_path(
+                self.fixture_dir, params["symboltoken"], params.get("interval", "ONE_DAY")
+            )
+            with open(path, "w") as f:
+                json.dump({"params": params, "response": data}, f)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._smartapi, name)
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+@lru_cache(maxsize=16)
+def _synthetic_axis(interval: str, today: np.datetime64) -> pd.DatetimeIndex:
+    """Weekday bar timestamps shared by every synthetic token (per interval, per day)."""
+    if interval == "ONE_DAY":
+        days = np.arange(np.datetime64(SYNTHETIC_START, "D"), today + 1)
+        return pd.DatetimeIndex(days[np.is_busday(days)].astype("datetime64[ns]"))
+    minutes = _INTERVAL_MINUTES.get(interval, 15)
+    last = np.busday_offset(today, 0, roll="backward")
+    days = np.busday_offset(last, np.arange(-SYNTHETIC_INTRADAY_DAYS + 1, 1))
+    session = np.arange(9 * 60 + 15, 15 * 60 + 30, minutes).astype("timedelta64[m]")
+    stamps = days.astype("datetime64[m]")[:, None] + session[None, :]
+    return pd.DatetimeIndex(stamps.ravel().astype("datetime64[ns]"))
+
+
+class FakeSmartConnect:
+    """
+    Replays recorded candles with injected latency and failures.
+
+    All randomness comes from `seed`, so a scenario is reproducible.
+    """
+
+    def __init__(
+        self,
+        fixture_dir: str = FIXTURE_DIR,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        max_rps: Optional[float] = None,
+        synthetic: bool = True,
+        seed: int = 42,
+    ):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.max_rps = max_rps
+        self.synthetic = synthetic
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = []
+        self._cache = {}
+        self.stats = Counter()
+
+    # ------------------ Session API ------------------
+
+    def generateSession(self, clientcode, password, totp):
+        return {
+            "status": True,
+            "message": "SUCCESS",
+            "data": {
+                "jwtToken": "fake-jwt",
+                "refreshToken": "fake-refresh",
+                "feedToken": "fake-feed",
+            },
+        }
+
+    def getfeedToken(self):
+        return "fake-feed"
+
+    def generateToken(self, refresh_token):
+        self.stats["token_renewals"] += 1
+        return self.generateSession(None, None, None)
+
+    # ------------------ Failure model ------------------
+
+    def _sleep_and_roll(self):
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+            roll = self._rng.random()
+            now = time.monotonic()
+            throttled = False
+            if self.max_rps:
+                self._recent = [t for t in self._recent if now - t < 1.0]
+                throttled = len(self._recent) >= self.max_rps
+                self._recent.append(now)
+        if delay > 0:
+            time.sleep(delay)
+        return roll, throttled
+
+    # ------------------ Data ------------------
+
+    def _synthetic(self, token, interval="ONE_DAY"):
+        """
+        Seeded random walk from a fixed start, so every window agrees.
+        Returns (rows, stamps); built with array ops, the first call per
+        token must not dominate what the harness measures.
+        """
+        rng = np.random.default_rng(zlib.crc32(f"{token}:{interval}".encode()))
+        stamps = _synthetic_axis(interval, np.datetime64("today", "D"))
+        if interval == "ONE_DAY":
+            sigma = 0.012
+        else:
+            stamps = stamps[stamps <= pd.Timestamp.now()]
+            sigma = 0.012 * np.sqrt(_INTERVAL_MINUTES.get(interval, 15) / 375)
+        closes = (100 * np.exp(np.cumsum(rng.normal(0.0, sigma, len(stamps))))).round(2)
+        text = np.char.add(np.datetime_as_string(stamps.values, unit="s"), "+05:30")
+        rows = [
+            [d, c, h, l, c, 100000]
+            for d, c, h, l in zip(text.tolist(), closes.tolist(), (closes * 1.001).tolist(), (closes * 0.999).tolist())
+        ]
+        return rows, stamps
+
+    def _candles(self, params):
+        token = params["symboltoken"]
+        interval = params.get("interval", "ONE_DAY")
+        fromdate = pd.Timestamp(datetime.strptime(params["fromdate"], _DATE_FMT))
+        todate = pd.Timestamp(datetime.strptime(params["todate"], _DATE_FMT))
+
+        key = (token, interval)
+        if key not in self._cache:
+            path = fixture_path(self.fixture_dir, token, interval)
+            if os.path.exists(path):
+                with open(path) as f:
+                    rows = json.load(f)["response"]["data"]
+                stamps = pd.to_datetime([row[0] for row in rows])
+                if len(stamps) and stamps.tz is not None:
+                    stamps = stamps.tz_localize(None)
+            elif self.synthetic:
+                rows, stamps = self._synthetic(token, interval)
+            else:
+                rows, stamps = [], pd.DatetimeIndex([])
+            self._cache[key] = (rows, stamps)
+
+        rows, stamps = self._cache[key]
+        # Rows are in time order: slice the window instead of scanning every row
+        start = stamps.searchsorted(fromdate.normalize(), side="left")
+        end = stamps.searchsorted(todate, side="right")
+        return rows[start:end]
+
+    def getCandleData(self, params):
+        self.stats["calls"] += 1
+        roll, throttled = self._sleep_and_roll()
+
+        if throttled or roll < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            return RATE_LIMIT_MESSAGE
+        if roll < self.rate_limit_rate + self.server_error_rate:
+            self.stats["server_errors"] += 1
+            raise Exception(SERVER_ERROR_MESSAGE)
+
+        data = self._candles(params)
+        if not data:
+            self.stats["empty"] += 1
+            return {"status": False, "message": "No data", "errorcode": "AB1004", "data": None}
+        self.stats["ok"] += 1
+        return {"status": True, "message": "SUCCESS", "errorcode": "", "data": data}
+
+
+    def getMarketData(self, mode, exchangeTokens):
+        """LTP quotes: last replayed close nudged by a small seeded move."""
+        self.stats["quote_calls"] += 1
+        roll, throttled = self._sleep_and_roll()
+        if throttled or roll < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            return RATE_LIMIT_MESSAGE
+
+        now = datetime.now()
+        params = {
+            "fromdate": (now - pd.Timedelta(days=10)).strftime(_DATE_FMT),
+            "todate": now.strftime(_DATE_FMT),
+        }
+        fetched, unfetched = [], []
+        for exchange, tokens in exchangeTokens.items():
+            for token in tokens:
+                rows = self._candles(dict(params, symboltoken=str(token)))
+                if not rows:
+                    unfetched.append({"exchange": exchange, "symbolToken": str(token)})
+                    continue
+                with self._lock:
+                    move = 1 + self._rng.gauss(0, 0.003)
+                fetched.append({
+                    "exchange": exchange,
+                    "symbolToken": str(token),
+                    "ltp": round(float(rows[-1][4]) * move, 2),
+                })
+        return {"status": True, "message": "SUCCESS", "data": {"fetched": fetched, "unfetched": unfetched}}
+
+
+def make_fake_connector(fake: Optional[FakeSmartConnect] = None):
+    """AngelOneConnector whose smartapi is a FakeSmartConnect (already 'connected')."""
+    from api_connector import AngelOneConnector
+
+    connector = AngelOneConnector("fake-key", "FAKE01", "fake-pass", "JBSWY3DPEHPK3PXP")
+    connector.smartapi = fake or FakeSmartConnect()
+    session = connector.smartapi.generateSession("FAKE01", "fake-pass", "000000")["data"]
+    connector.jwt_token = session["jwtToken"]
+    connector.refresh_token = session["refreshToken"]
+    connector.feed_token = session["feedToken"]
+    return connector
+
+
+# ============================================================================
+# HTTP STAND-IN
+# ============================================================================
+
+class FakeSmartAPIServer:
+    """
+    aiohttp server exposing a FakeSmartConnect on the SmartAPI REST routes,
+    run on its own event loop in a background thread.
+
+    Requests must carry the fake session's JWT, so clients are exercised on
+    the same auth path they use against the live API. Latency is simulated
+    in a thread pool, so concurrent requests overlap like the real thing.
+
+        with FakeSmartAPIServer(fake) as server:
+            client = AsyncSmartAPIClient("fake-key", "fake-jwt", base_url=server.url)
+    """
+
+    def __init__(self, fake: Optional[FakeSmartConnect] = None, host: str = "127.0.0.1",
+                 port: int = 0, jwt_token: str = "fake-jwt", workers: int = 64):
+        self.fake = fake or FakeSmartConnect()
+        self.host = host
+        self.port = port
+        self.jwt_token = jwt_token
+        self.url = None
+        self.stats = Counter()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fake-smartapi")
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def _authorized(self, request) -> bool:
+        return request.headers.get("Authorization") == f"Bearer {self.jwt_token}"
+
+    async def _call(self, request, fn, *args):
+        from aiohttp import web
+
+        self.stats["requests"] += 1
+        if not self._authorized(request):
+            return web.json_response(
+                {"status": False, "message": "Invalid Token", "errorcode": "AG8001", "data": None},
+                status=401,
+            )
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        except Exception as e:
+            return web.json_response(
+                {"status": False, "message": str(e), "errorcode": "AB1004", "data": None}, status=500
+            )
+        if isinstance(result, str):
+            return web.Response(text=result, status=403)
+        return web.json_response(result)
+
+    async def _candles(self, request):
+        return await self._call(request, self.fake.getCandleData, await request.json())
+
+    async def _quote(self, request):
+        body = await request.json()
+        return await self._call(
+            request, self.fake.getMarketData, body.get("mode", "LTP"), body.get("exchangeTokens", {})
+        )
+
+    async def _start(self, ready: threading.Event):
+        from aiohttp import web
+
+        from async_smartapi import CANDLE_ROUTE, QUOTE_ROUTE
+
+        app = web.Application()
+        app.router.add_post(CANDLE_ROUTE, self._candles)
+        app.router.add_post(QUOTE_ROUTE, self._quote)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+        self.url = f"http://{self.host}:{self.port}"
+        ready.set()
+
+    def start(self) -> str:
+        """Start serving; returns the base URL."""
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start(ready))
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name="fake-smartapi-server", daemon=True)
+        self._thread.start()
+        if not ready.wait(10):
+            raise RuntimeError("Fake SmartAPI server did not start")
+        return self.url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+        self._loop.close()
+        self._loop = None
+        self._pool.shutdown(wait=False)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record_fixtures(connector, tokens, days_back: int = 400, fixture_dir: str = FIXTURE_DIR) -> int:
+    """One-off: fetch and record candles for `tokens` through a live connector."""
+    from rate_limiter import get_shared_limiter
+
+    live = connector.smartapi
+    connector.smartapi = RecordingSmartConnect(live, fixture_dir)
+    limiter = get_shared_limiter()
+    recorded = 0
+    try:
+        for token in tokens:
+            limiter.acquire()
+            if connector.get_historical_df(token, days_back) is not None:
+                recorded += 1
+    finally:
+        connector.smartapi = live
+    return recorded
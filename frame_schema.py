@@ -0,0 +1,332 @@
+"""
+Frame Schema - Declarative Validation for Analysis Frames
+Column rules compiled into one vectorised cleaning pass
+
+Replaces the per-column to_numeric / fillna loops and repeated dropna /
+filter / replace passes that each validator used to run. A schema lists
+column -> dtype, default, required and range; validate() coerces every
+numeric column into one float64 block, builds one invalid-cell mask (NaN,
+±inf, unparseable, out of range), fills defaults, and filters rows once.
+
+Features:
+- Column(): dtype ("float" / "str"), default, required, min / max
+- FrameSchema.validate(df) -> (clean_df, ValidationReport)
+- any_of groups: drop rows where every column of a group is missing
+- unique: de-duplicate on key columns (first row wins)
+- ValidationReport: per-column issue counts, rows in/out, summary()
+- SECTOR_SCHEMA / ETF_SCHEMA / ANALYSIS_SCHEMA used by main.py and
+  sector_analysis_validator
+
+Usage:
+    python frame_schema.py --rows 10000     # timing on a dirty synthetic frame
+"""
+
+import argparse
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+
+class Column:
+    """
+    Rule for one column.
+
+    Invalid cells (missing, unparseable, infinite, outside [min, max]) take
+    `default`; if there is no default they stay NaN, and a `required`
+    column drops the row.
+    """
+
+    def __init__(self, dtype: str = "float", default=None, required: bool = False,
+                 min: Optional[float] = None, max: Optional[float] = None):
+        if dtype not in ("float", "str"):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.dtype = dtype
+        self.default = default
+        self.required = required
+        self.min = min
+        self.max = max
+
+
+class ValidationReport:
+    """Structured outcome of one validate() call."""
+
+    def __init__(self, name: str, rows_in: int):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = rows_in
+        self.issues: List[Dict] = []
+        self.seconds = 0.0
+
+    def add(self, column: str, issue: str, count: int) -> None:
+        if count:
+            self.issues.append({"column": column, "issue": issue, "count": int(count)})
+
+    @property
+    def dropped(self) -> int:
+        return self.rows_in - self.rows_out
+
+    @property
+    def ok(self) -> bool:
+        return self.rows_out > 0
+
+    def count(self, issue: str) -> int:
+        return sum(i["count"] for i in self.issues if i["issue"] == issue)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.issues, columns=["column", "issue", "count"])
+
+    def summary(self) -> str:
+        parts = [f"{self.name}: {self.rows_out} rows (dropped {self.dropped})"]
+        by_issue: Dict[str, int] = {}
+        for i in self.issues:
+            by_issue[i["issue"]] = by_issue.get(i["issue"], 0) + i["count"]
+        if by_issue:
+            parts.append(", ".join(f"{k} {v}" for k, v in by_issue.items()))
+        return " · ".join(parts)
+
+
+class FrameSchema:
+    """Compiled column rules applied in one vectorised pass."""
+
+    def __init__(
+        self,
+        columns: Dict[str, Column],
+        unique: Sequence[str] = (),
+        any_of: Sequence[Sequence[str]] = (),
+        name: str = "frame",
+    ):
+        self.columns = columns
+        self.unique = list(unique)
+        self.any_of = [list(group) for group in any_of]
+        self.name = name
+        self._numeric = [c for c, rule in columns.items() if rule.dtype == "float"]
+        self._text = [c for c, rule in columns.items() if rule.dtype == "str"]
+
+    def validate(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, ValidationReport]:
+        with span("validate", schema=self.name):
+            return self._validate(df)
+
+    def _validate(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, ValidationReport]:
+        started = time.perf_counter()
+        report = ValidationReport(self.name, 0 if df is None else len(df))
+        if df is None or df.empty:
+            return pd.DataFrame() if df is None else df, report
+
+        for col, rule in self.columns.items():
+            if col not in df.columns and rule.required:
+                report.add(col, "missing_column", len(df))
+        keep = np.ones(len(df), dtype=bool)
+        updates: Dict[str, object] = {}  # changed columns -> ndarray / ExtensionArray
+        missing: Dict[str, np.ndarray] = {}
+
+        # ---------------- numeric block ----------------
+        num_cols = [c for c in self._numeric if c in df.columns]
+        if num_cols:
+            # (columns x rows): every per-column reduction runs on contiguous memory
+            coerced = [_as_float(df[c]) for c in num_cols]
+            block = np.vstack([values for values, _ in coerced])
+            was_missing = np.vstack([absent for _, absent in coerced])
+            rules = [self.columns[c] for c in num_cols]
+            lo = np.array([[-np.inf if r.min is None else r.min] for r in rules])
+            hi = np.array([[np.inf if r.max is None else r.max] for r in rules])
+            defaults = np.array([[np.nan if r.default is None else r.default] for r in rules])
+
+            finite = np.isfinite(block)
+            out_of_range = finite & ((block < lo) | (block > hi))
+            invalid = ~finite | out_of_range
+            unparseable = invalid & ~was_missing & ~out_of_range
+            filled = invalid & ~np.isnan(defaults)
+            block = np.where(invalid, defaults, block)
+            still_missing = np.isnan(block)
+
+            counts = {
+                "missing": was_missing.sum(axis=1),
+                "invalid": unparseable.sum(axis=1),
+                "out_of_range": out_of_range.sum(axis=1),
+                "filled": filled.sum(axis=1),
+            }
+            changed = invalid.any(axis=1)
+            for j, col in enumerate(num_cols):
+                for issue, per_col in counts.items():
+                    report.add(col, issue, per_col[j])
+                if changed[j] or df[col].dtype != np.float64:
+                    updates[col] = block[j]
+                missing[col] = still_missing[j]
+
+            required = np.array([r.required for r in rules])
+            if required.any():
+                keep &= ~still_missing[required].any(axis=0)
+
+        # ---------------- text columns ----------------
+        for col in self._text:
+            if col not in df.columns:
+                continue
+            rule = self.columns[col]
+            values = df[col].array
+            absent = np.asarray(values.isna())
+            if rule.default is not None:
+                report.add(col, "filled", absent.sum())
+                if absent.any():
+                    values = values.copy()
+                    values[absent] = rule.default
+                    updates[col] = values
+                absent = np.zeros(len(df), dtype=bool)
+            else:
+                report.add(col, "missing", absent.sum())
+            if rule.required:
+                keep &= ~absent
+            missing[col] = absent
+
+        # ---------------- row rules ----------------
+        for group in self.any_of:
+            present = [c for c in group if c in df.columns]
+            if present:
+                all_missing = np.logical_and.reduce([
+                    missing[c] if c in missing else df[c].isna().to_numpy() for c in present
+                ])
+                report.add("|".join(present), "all_missing", (all_missing & keep).sum())
+                keep &= ~all_missing
+
+        report.add("*", "dropped_invalid", (~keep).sum())
+        rows = np.flatnonzero(keep)
+
+        key = [c for c in self.unique if c in df.columns]
+        if key:
+            codes = [
+                pd.factorize((updates[c] if c in updates else df[c].array).take(rows))[0]
+                for c in key
+            ]
+            stacked = codes[0] if len(codes) == 1 else np.column_stack(codes)
+            _, first = np.unique(stacked, return_index=True, axis=0)
+            report.add("|".join(key), "duplicate", len(rows) - len(first))
+            rows = rows[np.sort(first)]
+
+        # ---------------- one materialisation ----------------
+        clean = df.take(rows).reset_index(drop=True)
+        for col, values in updates.items():
+            clean[col] = values.take(rows)
+        report.rows_out = len(clean)
+        report.seconds = time.perf_counter() - started
+        return clean, report
+
+
+def _as_float(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """(float64 values, was-missing mask) with a single NA scan per column."""
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "fiub":
+        values = series.to_numpy(dtype=np.float64)
+        return values, np.isnan(values)
+    absent = series.isna().to_numpy()
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return values, absent
+
+
+# ============================================================================
+# SCHEMAS
+# ============================================================================
+
+_RS = {col: Column("float", default=0.0) for col in ("RS_21", "RS_55", "RS_123")}
+
+SECTOR_SCHEMA = FrameSchema(
+    {
+        "LTP": Column("float", default=0.0, min=0),
+        "Change": Column("float", default=0.0),
+        "% Change": Column("float", default=0.0),
+        "% Change 20 DMA": Column("float", default=0.0),
+        **_RS,
+        "Sector": Column("str", default="Unknown"),
+        "Category": Column("str", default="Mixed"),
+        "TLDR": Column("str", default="No data"),
+    },
+    unique=["Sector"],
+    name="sectors",
+)
+
+ETF_SCHEMA = FrameSchema(
+    {
+        "LTP": Column("float", default=0.0, min=0),
+        "Change": Column("float", default=0.0),
+        "% Change": Column("float", default=0.0),
+        "% Change 20 DMA": Column("float", default=0.0),
+        "RS_55": Column("float", default=0.0),
+        "Symbol": Column("str", default="N/A"),
+        "Name": Column("str", default="Unknown"),
+        "TLDR": Column("str", default="No signal"),
+    },
+    unique=["Symbol"],
+    name="etfs",
+)
+
+_ANALYSIS_NUMERIC = [
+    "LTP", "Change", "% Change", "% Change 20 DMA",
+    "RS_21", "RS_55", "RS_123",
+    "RS_1", "RS1", "RS_2", "RS2",
+    "Open", "High", "Low", "Close", "Volume",
+    "Token",
+]
+
+# Strict cleaning for sector_analysis_validator: no defaults, bad rows dropped
+ANALYSIS_SCHEMA = FrameSchema(
+    {
+        **{col: Column("float") for col in _ANALYSIS_NUMERIC},
+        "LTP": Column("float", required=True, min=0),
+    },
+    any_of=[
+        _ANALYSIS_NUMERIC,
+        ["Sector", "Index", "ETF Code", "ETF_Name", "Code"],
+    ],
+    name="analysis",
+)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _dirty_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    """Synthetic result frame with NaN, inf, text numbers and duplicates."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Sector": [f"Sector {i % (rows // 2 or 1)}" for i in range(rows)],
+        "LTP": rng.uniform(-5, 5000, rows),
+        "Change": rng.normal(0, 2, rows),
+        "% Change": rng.normal(0, 2, rows),
+        "% Change 20 DMA": rng.normal(0, 4, rows),
+        "RS_21": rng.normal(0, 3, rows),
+        "RS_55": rng.normal(0, 5, rows),
+        "RS_123": rng.normal(0, 8, rows),
+        "Category": rng.choice(["Outperforming", "Mixed", None], rows),
+        "TLDR": rng.choice(["x", None], rows),
+    })
+    for col in ("LTP", "RS_21", "RS_55"):
+        df.loc[rng.random(rows) < 0.02, col] = np.nan
+        df.loc[rng.random(rows) < 0.01, col] = np.inf
+    df["RS_123"] = df["RS_123"].astype(object)
+    df.loc[rng.random(rows) < 0.02, "RS_123"] = "n/a"
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time schema validation on a synthetic frame")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    df = _dirty_frame(args.rows)
+    for schema in (SECTOR_SCHEMA, ANALYSIS_SCHEMA):
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            _, report = schema.validate(df)
+        per_call = (time.perf_counter() - t0) / args.repeat
+        print(f"{schema.name:<10} {args.rows} rows: {per_call * 1000:.2f} ms/call · {report.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Instrument Freshness
+Decides which instruments a partial refresh has to re-fetch
+
+Last fetch time and last failure come from the token health board, the last
+stored bar from the price history store, and session boundaries from the
+trading calendar, so no extra state is persisted.
+
+Features:
+- freshness(): last fetch, last bar and stale reason for one token
+- stale_tokens(): {token: reason} for everything that needs a fetch:
+    never fetched / failed last cycle / too little stored history /
+    last bar before the latest session / fetched more than max_age ago
+    during a session / fetched before the latest session closed
+- freshness_table(): DataFrame for the admin view
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from config import PARTIAL_REFRESH_MAX_AGE_MINUTES
+from price_history import get_history_store
+from token_health import get_health_board
+from trading_calendar import IST, get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+
+def freshness(
+    token,
+    max_age_minutes: float = PARTIAL_REFRESH_MAX_AGE_MINUTES,
+    min_bars: int = 0,
+    now: Optional[datetime] = None,
+) -> Dict:
+    """
+    {"token", "last_fetch", "last_bar", "stale", "reason"} for one token.
+    `reason` is empty when the stored data is fresh enough to reuse.
+    """
+    calendar = get_trading_calendar()
+    now = calendar.to_ist(now)
+    entry = get_health_board().entry(token)
+    series = get_history_store().series(token)
+
+    last_fetch = entry.get("last_success_at") if entry else None
+    last_bar = series.index[-1].date() if series is not None and len(series) else None
+
+    session = calendar.latest_session(now)
+    session_close = calendar.session_close(session)
+
+    if not last_fetch:
+        reason = "never fetched"
+    elif entry.get("consecutive_failures"):
+        reason = "failed last cycle"
+    elif series is None or len(series) < min_bars:
+        reason = "short history"
+    elif last_bar < session:
+        reason = "missing latest session"
+    elif now < session_close and now.timestamp() - last_fetch > max_age_minutes * 60:
+        reason = f"older than {max_age_minutes:g} min"
+    elif now >= session_close and last_fetch < session_close.timestamp():
+        reason = "fetched before close"
+    else:
+        reason = ""
+
+    return {
+        "token": str(token),
+        "last_fetch": last_fetch,
+        "last_bar": last_bar,
+        "stale": bool(reason),
+        "reason": reason,
+    }
+
+
+def stale_tokens(
+    tokens: Iterable,
+    max_age_minutes: float = PARTIAL_REFRESH_MAX_AGE_MINUTES,
+    min_bars: int = 0,
+    now: Optional[datetime] = None,
+) -> Dict[str, str]:
+    """{token: reason} for every token that must be re-fetched."""
+    stale = {}
+    for token in tokens:
+        info = freshness(token, max_age_minutes, min_bars, now)
+        if info["stale"]:
+            stale[info["token"]] = info["reason"]
+    return stale
+
+
+def freshness_table(
+    names: Dict[str, str],
+    max_age_minutes: float = PARTIAL_REFRESH_MAX_AGE_MINUTES,
+) -> pd.DataFrame:
+    """One row per {token: name}: last fetch (IST), last bar, status."""
+    rows = []
+    for token, name in names.items():
+        info = freshness(token, max_age_minutes)
+        last_fetch = info["last_fetch"]
+        rows.append({
+            "Token": info["token"],
+            "Name": name,
+            "Last Fetch": (
+                datetime.fromtimestamp(last_fetch, IST).strftime("%Y-%m-%d %H:%M")
+                if last_fetch else "Never"
+            ),
+            "Last Bar": str(info["last_bar"] or "-"),
+            "Status": f"🟠 {info['reason']}" if info["stale"] else "🟢 Fresh",
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,282 @@
+"""
+Instrument Registry - SmartAPI Scrip-Master Loader
+
+Builds a compact, indexed instrument table from AngelOne's scrip-master JSON
+so tokens no longer have to be hand-maintained in ETFs-List_updated.csv.
+
+Features:
+- Stream-parse the (tens of MB) scrip-master without loading it into memory
+- Persist a compact NumPy index (symbol, name, token, exchange, instrument type)
+- Memory-map the index on startup, build lookup dicts lazily on first use
+- O(1) lookups by symbol or token per exchange
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SCRIP_MASTER_URL = (
+    "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
+)
+SCRIP_MASTER_FILE = "OpenAPIScripMaster.json"
+INSTRUMENT_INDEX_FILE = "instrument_index.npy"
+
+# Fixed-width byte fields keep each record at ~100 bytes
+INDEX_DTYPE = np.dtype([
+    ("symbol", "S40"),
+    ("name", "S32"),
+    ("token", "S16"),
+    ("exchange", "S8"),
+    ("instrument_type", "S12"),
+])
+
+_CHUNK_SIZE = 1 << 20  # 1 MB read window
+_BUILD_BATCH = 50_000
+
+
+# ============================================================================
+# DOWNLOAD & STREAM PARSING
+# ============================================================================
+
+def download_scrip_master(dest=SCRIP_MASTER_FILE, url=SCRIP_MASTER_URL, timeout=60):
+    """Download the scrip-master to disk in chunks (never held in memory)."""
+    import requests
+
+    tmp = dest + ".tmp"
+    with requests.get(url, stream=True, timeout=timeout) as resp:
+        resp.raise_for_status()
+        with open(tmp, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+    os.replace(tmp, dest)
+    logger.info(f"Scrip-master downloaded to {dest}")
+    return dest
+
+
+def iter_scrip_master(path=SCRIP_MASTER_FILE, chunk_size=_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yield instrument dicts from a scrip-master JSON array one at a time.
+
+    Reads the file in fixed-size chunks and decodes objects incrementally, so
+    peak memory is one chunk plus one record regardless of file size.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    started = False
+
+    with open(path, "r", encoding="utf-8") as f:
+        eof = False
+        while not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
+
+            pos = 0
+            while True:
+                # Skip whitespace, array brackets and separators
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if not started and pos < len(buf):
+                    if buf[pos] != "[":
+                        raise ValueError("Scrip-master must be a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+                if pos >= len(buf) or buf[pos] == "]":
+                    break
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    break  # incomplete object, wait for the next chunk
+                pos = end
+                if isinstance(obj, dict):
+                    yield obj
+
+            buf = buf[pos:]
+
+
+# ============================================================================
+# INDEX BUILD
+# ============================================================================
+
+def _to_record(item: dict) -> Tuple[bytes, bytes, bytes, bytes, bytes]:
+    def b(key, width):
+        raw = str(item.get(key, "") or "").strip().encode("utf-8")[:width]
+        # Never cut a multibyte character in half: _row() decodes strictly
+        return raw.decode("utf-8", "ignore").encode("utf-8")
+
+    return (
+        b("symbol", 40),
+        b("name", 32),
+        b("token", 16),
+        b("exch_seg", 8),
+        b("instrumenttype", 12),
+    )
+
+
+def build_instrument_index(
+    source=SCRIP_MASTER_FILE,
+    dest=INSTRUMENT_INDEX_FILE,
+    exchanges=("NSE", "BSE"),
+) -> int:
+    """
+    Stream the scrip-master into a compact .npy index.
+
+    Only instruments on the given exchanges are kept. Records are converted
+    in batches so the full JSON is never materialised as Python objects.
+
+    Returns:
+        Number of instruments written
+    """
+    exchanges = {e.upper() for e in exchanges} if exchanges else None
+    parts: List[np.ndarray] = []
+    batch = []
+
+    for item in iter_scrip_master(source):
+        if exchanges and str(item.get("exch_seg", "")).upper() not in exchanges:
+            continue
+        batch.append(_to_record(item))
+        if len(batch) >= _BUILD_BATCH:
+            parts.append(np.array(batch, dtype=INDEX_DTYPE))
+            batch = []
+
+    if batch:
+        parts.append(np.array(batch, dtype=INDEX_DTYPE))
+
+    table = np.concatenate(parts) if parts else np.empty(0, dtype=INDEX_DTYPE)
+    tmp = dest + ".tmp.npy"
+    np.save(tmp, table)
+    os.replace(tmp, dest)
+
+    logger.info(f"Instrument index built: {len(table)} instruments -> {dest}")
+    return len(table)
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+class InstrumentRegistry:
+    """
+    Read-only view over the persisted instrument index.
+
+    The .npy file is memory-mapped; symbol/token dicts are built on the first
+    lookup and reused for the life of the process.
+    """
+
+    def __init__(self, index_path=INSTRUMENT_INDEX_FILE):
+        self.index_path = index_path
+        self._table: Optional[np.ndarray] = None
+        self._by_symbol: Optional[Dict[Tuple[str, str], int]] = None
+        self._by_token: Optional[Dict[Tuple[str, str], int]] = None
+
+    @property
+    def available(self) -> bool:
+        return os.path.exists(self.index_path)
+
+    @property
+    def table(self) -> np.ndarray:
+        if self._table is None:
+            if not self.available:
+                self._table = np.empty(0, dtype=INDEX_DTYPE)
+            else:
+                self._table = np.load(self.index_path, mmap_mode="r")
+        return self._table
+
+    def __len__(self):
+        return len(self.table)
+
+    def _ensure_index(self):
+        if self._by_symbol is not None:
+            return
+        table = self.table
+        exch = np.char.decode(table["exchange"], "utf-8")
+        syms = np.char.decode(table["symbol"], "utf-8")
+        toks = np.char.decode(table["token"], "utf-8")
+        self._by_symbol = {(e, s): i for i, (e, s) in enumerate(zip(exch, syms))}
+        self._by_token = {(e, t): i for i, (e, t) in enumerate(zip(exch, toks))}
+
+    def _row(self, i: int) -> Dict[str, str]:
+        rec = self.table[i]
+        return {
+            "symbol": rec["symbol"].decode("utf-8"),
+            "name": rec["name"].decode("utf-8"),
+            "token": rec["token"].decode("utf-8"),
+            "exchange": rec["exchange"].decode("utf-8"),
+            "instrument_type": rec["instrument_type"].decode("utf-8"),
+        }
+
+    def by_symbol(self, symbol: str, exchange: str = "NSE") -> Optional[Dict[str, str]]:
+        """Look up an instrument by trading symbol (e.g. 'NIFTYBEES-EQ')."""
+        self._ensure_index()
+        i = self._by_symbol.get((exchange.upper(), str(symbol).strip()))
+        return self._row(i) if i is not None else None
+
+    def by_token(self, token, exchange: str = "NSE") -> Optional[Dict[str, str]]:
+        """Look up an instrument by exchange token."""
+        self._ensure_index()
+        i = self._by_token.get((exchange.upper(), str(token).strip()))
+        return self._row(i) if i is not None else None
+
+    def token_for(self, symbol: str, exchange: str = "NSE") -> Optional[str]:
+        row = self.by_symbol(symbol, exchange)
+        return row["token"] if row else None
+
+    def select(self, exchange: str = "NSE", symbol_suffix: Optional[str] = "-EQ") -> List[Dict[str, str]]:
+        """
+        Return every instrument on an exchange, optionally filtered by symbol
+        suffix ('-EQ' keeps cash equities and ETFs). Vectorised over the index.
+        """
+        table = self.table
+        mask = table["exchange"] == exchange.upper().encode("utf-8")
+        if symbol_suffix:
+            mask &= np.char.endswith(table["symbol"], symbol_suffix.encode("utf-8"))
+        return [self._row(i) for i in np.flatnonzero(mask)]
+
+
+_registry: Optional[InstrumentRegistry] = None
+
+
+def get_registry(index_path=INSTRUMENT_INDEX_FILE) -> InstrumentRegistry:
+    """Process-wide registry (lazily opened)."""
+    global _registry
+    if _registry is None or _registry.index_path != index_path:
+        _registry = InstrumentRegistry(index_path)
+    return _registry
+
+
+def resolve_token(row, exchange: str = "NSE") -> Optional[str]:
+    """
+    Resolve an ETF list row to an exchange token.
+
+    Uses an explicit token column when present, otherwise falls back to the
+    instrument registry keyed by 'ETF Code'.
+    """
+    for col in ("Token", "token", "numeric_token"):
+        val = row.get(col)
+        if val is not None and str(val).strip() not in ("", "nan"):
+            try:
+                return str(int(float(val)))
+            except (TypeError, ValueError):
+                return str(val).strip()
+
+    code = row.get("ETF Code")
+    registry = get_registry()
+    if code and registry.available:
+        return registry.token_for(str(code), exchange)
+    return None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not os.path.exists(SCRIP_MASTER_FILE):
+        download_scrip_master()
+    build_instrument_index()
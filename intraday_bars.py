@@ -0,0 +1,293 @@
+"""
+Intraday Bars
+Interval-aware candle fetching, compact bar storage and intraday RS
+
+Features:
+- date_windows(): split a date range into per-request chunks that respect
+  SmartAPI's max days per interval (INTERVAL_MAX_DAYS)
+- IntradayBarStore: one compressed .npz per token and interval holding
+  int64 epoch seconds, float32 OHLC and int64 volume (~32 bytes per bar),
+  pruned to INTRADAY_RETENTION_DAYS
+- Incremental fetch: only days after the last stored bar are requested
+- run_intraday_rs(): RS on intraday bars using the universe_rs engine
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    INTERVAL_MAX_DAYS,
+    INTRADAY_DIR,
+    INTRADAY_RETENTION_DAYS,
+    INTRADAY_RS_PERIODS,
+    SECTOR_TOKENS,
+)
+from trading_calendar import ist_now
+
+logger = logging.getLogger(__name__)
+
+IST_TZ = "Asia/Kolkata"
+
+
+def date_windows(
+    fromdate: datetime, todate: datetime, interval: str = "ONE_DAY"
+) -> List[Tuple[datetime, datetime]]:
+    """Consecutive (start, end) windows no longer than the interval's request limit."""
+    step = timedelta(days=INTERVAL_MAX_DAYS.get(interval, 30))
+    windows = []
+    start = fromdate
+    while start < todate:
+        end = min(start + step, todate)
+        windows.append((start, end))
+        start = end
+    return windows or [(fromdate, todate)]
+
+
+def _epoch_seconds(timestamps) -> np.ndarray:
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    if ts.tz is None:
+        ts = ts.tz_localize(IST_TZ)
+    # Unit-agnostic (pandas may store ns or us resolution)
+    ts = ts.tz_convert("UTC").tz_localize(None)
+    return ((ts - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def _to_ist(epoch: np.ndarray) -> pd.DatetimeIndex:
+    """Epoch seconds -> naive IST timestamps (how the rest of the app shows time)."""
+    return pd.to_datetime(epoch, unit="s", utc=True).tz_convert(IST_TZ).tz_localize(None)
+
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+class IntradayBarStore:
+    """Compact per-token bar arrays for one interval."""
+
+    def __init__(self, interval: str, root: str = INTRADAY_DIR, retention_days: Optional[int] = None):
+        self.interval = interval
+        self.dir = os.path.join(root, interval)
+        self.retention_days = retention_days or INTRADAY_RETENTION_DAYS.get(interval, 30)
+        self._bars: Dict[str, Dict[str, np.ndarray]] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def _path(self, token) -> str:
+        return os.path.join(self.dir, f"{token}.npz")
+
+    def _get(self, token) -> Optional[Dict[str, np.ndarray]]:
+        key = str(token)
+        if key not in self._bars:
+            path = self._path(key)
+            bars = None
+            if os.path.exists(path):
+                try:
+                    with np.load(path, allow_pickle=False) as data:
+                        bars = {k: data[k] for k in ("ts", "ohlc", "volume")}
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable {path}: {e}")
+            self._bars[key] = bars
+        return self._bars[key]
+
+    def update(self, token, df: pd.DataFrame) -> int:
+        """Merge a candle frame; returns the number of bars now stored."""
+        if df is None or df.empty:
+            return 0
+        new = {
+            "ts": _epoch_seconds(df["timestamp"]),
+            "ohlc": df[["open", "high", "low", "close"]].to_numpy(dtype=np.float32),
+            "volume": df["volume"].to_numpy(dtype=np.int64),
+        }
+        key = str(token)
+        with self._lock:
+            old = self._get(key)
+            if old is not None:
+                new = {k: np.concatenate([old[k], new[k]]) for k in new}
+            # Keep the last copy of each timestamp (newer fetch wins), sorted
+            rev_ts = new["ts"][::-1]
+            _, first = np.unique(rev_ts, return_index=True)
+            keep = len(rev_ts) - 1 - first
+            cutoff = int((datetime.now() - timedelta(days=self.retention_days)).timestamp())
+            keep = keep[new["ts"][keep] >= cutoff]
+            self._bars[key] = {k: v[keep] for k, v in new.items()}
+            self._dirty.add(key)
+            return len(keep)
+
+    def save(self) -> int:
+        """Write changed tokens (atomic per file). Returns files written."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if dirty:
+                os.makedirs(self.dir, exist_ok=True)
+            for key in dirty:
+                bars = self._bars.get(key)
+                if bars is None:
+                    continue
+                tmp = self._path(key) + ".tmp.npz"
+                try:
+                    np.savez_compressed(tmp, **bars)
+                    os.replace(tmp, self._path(key))
+                except Exception as e:
+                    logger.error(f"Could not save intraday bars for {key}: {e}")
+            return len(dirty)
+
+    def last_timestamp(self, token) -> Optional[pd.Timestamp]:
+        bars = self._get(token)
+        if bars is None or not len(bars["ts"]):
+            return None
+        return _to_ist(bars["ts"][-1:])[0]
+
+    def frame(self, token) -> Optional[pd.DataFrame]:
+        """Stored bars as a candle frame (naive IST timestamps)."""
+        bars = self._get(token)
+        if bars is None:
+            return None
+        ohlc = bars["ohlc"]
+        return pd.DataFrame({
+            "timestamp": _to_ist(bars["ts"]),
+            "open": ohlc[:, 0], "high": ohlc[:, 1], "low": ohlc[:, 2], "close": ohlc[:, 3],
+            "volume": bars["volume"],
+        })
+
+    def closes(self, tokens: Sequence) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Float32 (bars x tokens) close panel on the first token's timestamps,
+        other columns forward-filled onto that axis.
+        """
+        from universe_rs import forward_fill
+
+        first = self._get(tokens[0]) if len(tokens) else None
+        if first is None:
+            return pd.DatetimeIndex([]), np.empty((0, len(tokens)), dtype=np.float32)
+        axis = first["ts"]
+        panel = np.full((len(axis), len(tokens)), np.nan, dtype=np.float32)
+        for j, token in enumerate(tokens):
+            bars = self._get(token)
+            if bars is None or not len(bars["ts"]):
+                continue
+            # Last bar at or before each axis timestamp
+            pos = np.searchsorted(bars["ts"], axis, side="right") - 1
+            ok = pos >= 0
+            panel[ok, j] = bars["ohlc"][pos[ok], 3]
+        return _to_ist(axis), forward_fill(panel)
+
+    def nbytes(self) -> int:
+        """In-memory size of loaded bars."""
+        return sum(
+            sum(v.nbytes for v in bars.values())
+            for bars in self._bars.values() if bars is not None
+        )
+
+
+_stores: Dict[str, IntradayBarStore] = {}
+
+
+def get_intraday_store(interval: str) -> IntradayBarStore:
+    """Process-wide store per interval."""
+    if interval not in _stores:
+        _stores[interval] = IntradayBarStore(interval)
+    return _stores[interval]
+
+
+# ============================================================================
+# FETCH + RS
+# ============================================================================
+
+def refresh_intraday(connector, tokens: Sequence, interval: str, progress_callback: Optional[Callable] = None) -> List[str]:
+    """
+    Bring stored bars up to date for `tokens`. Only the days after each
+    token's last stored bar are requested. Returns tokens that failed.
+    """
+    from rate_limiter import get_shared_limiter
+
+    store = get_intraday_store(interval)
+    limiter = get_shared_limiter()
+    now = ist_now()  # stored bars are naive IST too
+    failed = []
+
+    for i, token in enumerate(tokens):
+        last = store.last_timestamp(token)
+        days_back = store.retention_days
+        if last is not None:
+            days_back = min(days_back, (now - last.to_pydatetime()).days + 1)
+        limiter.acquire()
+        df = connector.get_historical_df(token, days_back, interval=interval)
+        if df is None or df.empty:
+            failed.append(str(token))
+        else:
+            store.update(token, df)
+        if progress_callback:
+            progress_callback(i + 1, len(tokens), str(token))
+
+    store.save()
+    return failed
+
+
+def run_intraday_rs(
+    connector,
+    benchmark_token,
+    interval: str = "FIFTEEN_MINUTE",
+    instruments: Optional[Dict[str, str]] = None,
+    periods: Optional[Sequence[int]] = None,
+    progress_callback: Optional[Callable] = None,
+) -> pd.DataFrame:
+    """
+    Intraday RS vs the benchmark on `interval` bars.
+
+    Args:
+        instruments: {name: token}; defaults to every sector index
+
+    Returns DataFrame with Sector, Token, LTP, Change (vs previous session
+    close), RS_<bars> per period, Category, As Of and rs_ratings columns.
+    """
+    from rs_ratings import add_rs_ratings
+    from universe_rs import compute_rs_matrix
+
+    if instruments is None:
+        instruments = {info["name"]: str(info["token"]) for info in SECTOR_TOKENS.values()}
+    periods = list(periods or INTRADAY_RS_PERIODS.get(interval, [4, 13, 25]))
+    names = list(instruments.keys())
+    tokens = [str(benchmark_token)] + [str(t) for t in instruments.values()]
+
+    refresh_intraday(connector, tokens, interval, progress_callback)
+
+    stamps, panel = get_intraday_store(interval).closes(tokens)
+    if len(stamps) == 0:
+        return pd.DataFrame()
+
+    panel = panel.astype(np.float64)
+    bench, closes = panel[:, 0], panel[:, 1:]
+    rs = compute_rs_matrix(closes, bench, periods)
+
+    ltp = closes[-1]
+    sessions = stamps.normalize()
+    earlier = np.flatnonzero(sessions < sessions[-1])
+    prev = closes[earlier[-1]] if len(earlier) else closes[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(prev != 0, (ltp - prev) / prev * 100.0, 0.0)
+
+    category = np.select(
+        [np.all(rs > 0, axis=1), np.all(rs < 0, axis=1)],
+        ["Outperforming", "Underperforming"],
+        default="Mixed",
+    )
+
+    df = pd.DataFrame({
+        "Sector": names,
+        "Token": tokens[1:],
+        "LTP": np.round(ltp, 2),
+        "Change": np.round(change, 2),
+    })
+    for k, p in enumerate(periods):
+        df[f"RS_{p}"] = np.round(rs[:, k], 2)
+    df["Category"] = category
+    df["As Of"] = stamps[-1].strftime("%Y-%m-%d %H:%M")
+
+    df = add_rs_ratings(df[np.isfinite(ltp)], [f"RS_{p}" for p in periods])
+    return df.sort_values("RS_Composite_Rank", na_position="last").reset_index(drop=True)
@@ -0,0 +1,398 @@
+"""
+Live Tick Ingestion
+Streams LTP ticks for sector and ETF tokens over one WebSocket and keeps
+an in-memory latest-price book; derived metrics are recomputed from the
+stored daily history plus the live price.
+
+Features:
+- LTPBook: thread-safe token -> (ltp, timestamp) book
+- LiveFeed: SmartAPI WebSocket V2 (LTP mode) or any JSON tick WebSocket
+- start_live_feed() / stop_live_feed(): one process-wide feed
+- Optional recording of ticks to JSONL for later replay
+- ReplayTickServer: local stdlib WebSocket stand-in that replays recorded ticks
+- derive_live_metrics(): LTP, % change, % from 20-DMA, RS from history + LTP
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import re
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import DEFAULT_RS_PERIODS
+from price_history import get_history_store
+
+logger = logging.getLogger(__name__)
+
+SMARTAPI_LTP_MODE = 1
+NSE_CM_EXCHANGE_TYPE = 1
+
+
+# ============================================================================
+# LTP BOOK
+# ============================================================================
+
+class LTPBook:
+    """Latest traded price per token, safe to update from the feed thread."""
+
+    def __init__(self):
+        self._book: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.tick_count = 0
+
+    def update(self, token, ltp: float, ts: Optional[float] = None) -> None:
+        with self._lock:
+            self._book[str(token)] = (float(ltp), ts if ts is not None else time.time())
+            self.tick_count += 1
+
+    def get(self, token) -> Optional[float]:
+        entry = self._book.get(str(token))
+        return entry[0] if entry else None
+
+    def snapshot(self) -> Dict[str, Tuple[float, float]]:
+        with self._lock:
+            return dict(self._book)
+
+    def __len__(self):
+        return len(self._book)
+
+
+def normalize_tick(message) -> Optional[Dict]:
+    """
+    Normalise a tick to {"token", "ltp", "ts"}.
+
+    Accepts SmartAPI V2 dicts (LTP in paise, epoch-ms timestamp) and the
+    plain JSON records produced by recording/replay.
+    """
+    if isinstance(message, (bytes, str)):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            return None
+    if not isinstance(message, dict) or "token" not in message:
+        return None
+
+    if "ltp" in message:
+        ltp = float(message["ltp"])
+    elif "last_traded_price" in message:
+        ltp = float(message["last_traded_price"]) / 100.0
+    else:
+        return None
+
+    ts = message.get("ts") or message.get("exchange_timestamp")
+    ts = float(ts) / 1000.0 if ts and float(ts) > 1e11 else (float(ts) if ts else time.time())
+    return {"token": str(message["token"]), "ltp": ltp, "ts": ts}
+
+
+# ============================================================================
+# FEED
+# ============================================================================
+
+class LiveFeed:
+    """
+    Single WebSocket subscription feeding an LTPBook.
+
+    With `url` set, connects to a JSON tick WebSocket (e.g. ReplayTickServer);
+    otherwise uses SmartAPI's WebSocket V2 with the connector's session tokens.
+    """
+
+    def __init__(
+        self,
+        tokens: Iterable,
+        connector=None,
+        url: Optional[str] = None,
+        book: Optional[LTPBook] = None,
+        record_path: Optional[str] = None,
+    ):
+        self.tokens = [str(t) for t in tokens]
+        self.connector = connector
+        self.url = url
+        self.book = book or LTPBook()
+        self.record_path = record_path
+        self._record_file = None
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+        self.closed = threading.Event()
+
+    # ------------------ Callbacks ------------------
+
+    def _on_tick(self, message):
+        tick = normalize_tick(message)
+        if tick is None:
+            return
+        self.book.update(tick["token"], tick["ltp"], tick["ts"])
+        if self._record_file:
+            self._record_file.write(json.dumps(tick) + "\n")
+
+    def _on_open(self, *_):
+        self.connected.set()
+        logger.info(f"Live feed connected ({len(self.tokens)} tokens)")
+
+    def _on_close(self, *_):
+        self.closed.set()
+        if self._record_file:
+            self._record_file.flush()
+        logger.info("Live feed closed")
+
+    def _on_error(self, _ws, error):
+        logger.warning(f"Live feed error: {error}")
+
+    # ------------------ Transports ------------------
+
+    def _run_json(self):
+        import websocket
+
+        self._ws = websocket.WebSocketApp(
+            self.url,
+            on_open=self._on_open,
+            on_message=lambda _ws, msg: self._on_tick(msg),
+            on_error=self._on_error,
+            on_close=self._on_close,
+        )
+        self._ws.run_forever()
+
+    def _run_smartapi(self):
+        from SmartApi.smartWebSocketV2 import SmartWebSocketV2
+
+        c = self.connector
+        sws = SmartWebSocketV2(c.jwt_token, c.apikey, c.clientcode, c.feed_token)
+        self._ws = sws
+
+        def on_open(wsapp):
+            self._on_open()
+            sws.subscribe(
+                "dmr_ltp",
+                SMARTAPI_LTP_MODE,
+                [{"exchangeType": NSE_CM_EXCHANGE_TYPE, "tokens": self.tokens}],
+            )
+
+        sws.on_open = on_open
+        sws.on_data = lambda wsapp, msg: self._on_tick(msg)
+        sws.on_error = self._on_error
+        sws.on_close = self._on_close
+        sws.connect()
+
+    # ------------------ Control ------------------
+
+    def start(self) -> "LiveFeed":
+        if self._thread and self._thread.is_alive():
+            return self
+        if self.record_path:
+            self._record_file = open(self.record_path, "a", encoding="utf-8")
+        target = self._run_json if self.url else self._run_smartapi
+        self._thread = threading.Thread(target=target, name="live-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        try:
+            if self._ws is not None:
+                close = getattr(self._ws, "close_connection", None) or self._ws.close
+                close()
+        except Exception as e:
+            logger.debug(f"Live feed stop: {e}")
+        if self._record_file:
+            self._record_file.close()
+            self._record_file = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+
+# ============================================================================
+# DERIVED METRICS
+# ============================================================================
+
+def derive_live_metrics(
+    book: LTPBook,
+    instruments: Dict[str, str],
+    benchmark_token,
+    periods: Sequence[int] = DEFAULT_RS_PERIODS,
+) -> pd.DataFrame:
+    """
+    Recompute LTP, % Change, % Change 20 DMA and RS_<p> for every instrument
+    from stored daily closes plus the live LTP (vectorised over the panel).
+
+    Args:
+        instruments: {display name: token}
+    """
+    bench_token = str(benchmark_token)
+    names = list(instruments.keys())
+    tokens = [str(t) for t in instruments.values()]
+    dates, panel = get_history_store().panel([bench_token] + tokens)
+    if len(dates) == 0:
+        return pd.DataFrame()
+
+    # Today's stored bar (if any) is superseded by the live price
+    today = pd.Timestamp.now().normalize()
+    hist = panel[: int((dates < today).sum())]
+    if len(hist) == 0:
+        return pd.DataFrame()
+
+    live = np.array(
+        [book.get(t) if book.get(t) is not None else np.nan for t in [bench_token] + tokens],
+        dtype=np.float64,
+    )
+    live = np.where(np.isnan(live), hist[-1], live)
+    closes = np.vstack([hist, live[None, :]])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ltp = closes[-1, 1:]
+        prev = closes[-2, 1:] if len(closes) > 1 else ltp
+        change = (ltp - prev) / prev * 100.0
+        dma = closes[-20:, 1:].mean(axis=0) if len(closes) >= 20 else np.full(len(tokens), np.nan)
+        pct_dma = (ltp - dma) / dma * 100.0
+
+        df = pd.DataFrame({
+            "Name": names,
+            "Token": tokens,
+            "LTP": np.round(ltp, 2),
+            "Change": np.round(change, 2),
+            "20 DMA": np.round(dma, 2),
+            "% Change 20 DMA": np.round(pct_dma, 2),
+        })
+        for p in periods:
+            if len(closes) > p:
+                ret = closes[-1] / closes[-p - 1] - 1.0
+                df[f"RS_{p}"] = np.round((ret[1:] - ret[0]) * 100.0, 2)
+            else:
+                df[f"RS_{p}"] = np.nan
+
+    df["Live"] = [book.get(t) is not None for t in tokens]
+    return df
+
+
+# ============================================================================
+# LOCAL WEBSOCKET STAND-IN
+# ============================================================================
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    header = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        header += bytes([n])
+    elif n < 65536:
+        header += bytes([126]) + n.to_bytes(2, "big")
+    else:
+        header += bytes([127]) + n.to_bytes(8, "big")
+    return header + payload
+
+
+class ReplayTickServer:
+    """
+    Minimal WebSocket server (stdlib only) that replays recorded ticks.
+
+    Each client receives every line of the JSONL recording as a text frame,
+    `interval` seconds apart, then a close frame.
+    """
+
+    def __init__(self, ticks, host: str = "127.0.0.1", port: int = 0, interval: float = 0.0):
+        if isinstance(ticks, str):
+            with open(ticks, "r", encoding="utf-8") as f:
+                ticks = [line.strip() for line in f if line.strip()]
+        self.lines: List[str] = [t if isinstance(t, str) else json.dumps(t) for t in ticks]
+        self.interval = interval
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(4)
+        self.host, self.port = self._sock.getsockname()[:2]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/"
+
+    def _handle(self, conn: socket.socket):
+        with conn:
+            request = b""
+            while b"\r\n\r\n" not in request:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    return
+                request += chunk
+            match = re.search(rb"sec-websocket-key:\s*(\S+)", request, re.I)
+            if not match:
+                return
+            accept = base64.b64encode(hashlib.sha1(match.group(1) + _WS_GUID).digest())
+            conn.sendall(
+                b"HTTP/1.1 101 Switching Protocols\r\n"
+                b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+            )
+            for line in self.lines:
+                conn.sendall(_ws_frame(line.encode("utf-8")))
+                if self.interval:
+                    time.sleep(self.interval)
+            conn.sendall(_ws_frame(b"\x03\xe8", opcode=0x8))
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def start(self) -> "ReplayTickServer":
+        self._thread = threading.Thread(target=self._serve, name="tick-replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._sock.close()
+
+
+# ============================================================================
+# PROCESS-WIDE FEED
+# ============================================================================
+
+def default_live_instruments(etf_csv_path: str = "ETFs-List_updated.csv") -> Dict[str, str]:
+    """{name: token} for every sector index and every ETF in the list."""
+    from config import SECTOR_TOKENS
+    from instrument_registry import resolve_token
+
+    instruments = {info["name"]: str(info["token"]) for info in SECTOR_TOKENS.values()}
+    try:
+        for idx, row in pd.read_csv(etf_csv_path).iterrows():
+            token = resolve_token(row)
+            if token:
+                instruments[row.get("ETF Code", f"ETF_{idx}")] = token
+    except Exception as e:
+        logger.warning(f"ETF list unavailable for live feed: {e}")
+    return instruments
+
+
+_feed: Optional[LiveFeed] = None
+
+
+def start_live_feed(connector, tokens: Iterable, **kwargs) -> LiveFeed:
+    """Start (or reuse) the single process-wide feed."""
+    global _feed
+    if _feed is None or not _feed.running:
+        _feed = LiveFeed(tokens, connector=connector, **kwargs).start()
+    return _feed
+
+
+def get_live_feed() -> Optional[LiveFeed]:
+    return _feed
+
+
+def stop_live_feed() -> None:
+    """Close the process-wide feed, if one is running."""
+    global _feed
+    if _feed is not None:
+        _feed.stop()
+        _feed = None
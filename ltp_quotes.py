@@ -0,0 +1,114 @@
+"""
+LTP Quotes - Intraday Fast Refresh Support
+Batched last-traded-price quotes spliced into stored daily history
+
+During market hours only today's price changes between refreshes, so the
+sector / ETF fast paths fetch every LTP in one or two market-data calls
+(up to QUOTE_BATCH_SIZE tokens each) instead of one candle request per
+instrument, then recompute metrics from price_history with today's bar
+replaced by the LTP.
+
+Features:
+- fetch_ltps(): batched getMarketData("LTP", {"NSE": [...]}) under a limiter
+- splice_ltps(): write LTPs as today's close into the history store
+  (session days only)
+- has_recent_history(): guard so the fast path only runs on a session day
+  with history complete up to the previous session (RS windows count
+  bars, so a missing session would shift them)
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from config import QUOTE_BATCH_SIZE, QUOTE_REQUESTS_PER_SECOND
+from metrics import span
+from price_history import get_history_store
+from rate_limiter import RateLimiter
+from trading_calendar import get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+_quote_limiter: Optional[RateLimiter] = None
+
+
+def get_quote_limiter() -> RateLimiter:
+    """Process-wide limiter for the market-data (quote) endpoint."""
+    global _quote_limiter
+    if _quote_limiter is None:
+        _quote_limiter = RateLimiter(QUOTE_REQUESTS_PER_SECOND)
+    return _quote_limiter
+
+
+def fetch_ltps(
+    smartapi,
+    tokens: Iterable,
+    exchange: str = "NSE",
+    batch_size: int = QUOTE_BATCH_SIZE,
+    limiter: Optional[RateLimiter] = None,
+) -> Dict[str, float]:
+    """
+    {token: ltp} for every token the quote API returned.
+
+    Tokens missing from the response (listed under "unfetched") are simply
+    absent, so callers can tell which prices are live.
+    """
+    tokens = list(dict.fromkeys(str(t) for t in tokens))
+    limiter = limiter or get_quote_limiter()
+    ltps: Dict[str, float] = {}
+
+    for i in range(0, len(tokens), batch_size):
+        batch = tokens[i:i + batch_size]
+        limiter.acquire()
+        try:
+            with span("fetch_quotes", exchange=exchange):
+                response = smartapi.getMarketData("LTP", {exchange: batch})
+        except Exception as e:
+            logger.warning(f"LTP quote failed for {len(batch)} tokens: {e}")
+            continue
+        if not isinstance(response, dict) or not response.get("status"):
+            message = response.get("message") if isinstance(response, dict) else response
+            logger.warning(f"LTP quote rejected: {message}")
+            continue
+        for item in (response.get("data") or {}).get("fetched", []):
+            try:
+                ltps[str(item["symbolToken"])] = float(item["ltp"])
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    return ltps
+
+
+def has_recent_history(token, min_bars: int, now=None) -> bool:
+    """
+    True when today (IST) is a session and the store holds at least
+    `min_bars` bars for `token` whose last bar before today is the previous
+    session – i.e. splicing today's LTP leaves no missing session.
+    """
+    calendar = get_trading_calendar()
+    today = calendar.to_ist(now).date()
+    if not calendar.is_session(today):
+        return False
+    series = get_history_store().series(token)
+    if series is None or len(series) < min_bars:
+        return False
+    days = series.index
+    if days[-1].date() == today:  # already spliced by an earlier fast refresh
+        days = days[:-1]
+    return len(days) > 0 and days[-1].date() == calendar.previous_session(today)
+
+
+def splice_ltps(ltps: Dict[str, float], day=None) -> None:
+    """
+    Store each LTP as `day`'s (default today's, IST) close, replacing any
+    prior value. Non-session days are skipped.
+    """
+    calendar = get_trading_calendar()
+    day = pd.Timestamp(day or calendar.to_ist(None).replace(tzinfo=None)).normalize()
+    if not calendar.is_session(day):
+        logger.warning(f"Not splicing LTPs: {day.date()} is not a session")
+        return
+    history = get_history_store()
+    for token, ltp in ltps.items():
+        history.update(token, pd.DataFrame({"timestamp": [day], "close": [ltp]}))
@@ -26,7 +26,7 @@ INTEGRATION INSTRUCTIONS:
 
 import os
 import time
-from datetime import datetime, time as dt_time
+from datetime import datetime
 import pytz
 import logging
 import pandas as pd
@@ -55,9 +55,14 @@ try:
         render_subscriber_sector_view,
         render_subscriber_etf_view,
         render_subscriber_comprehensive_view,
+        render_data_version_poller,
     )
     from data_refresh_tracker import DataRefreshTracker
     from user_store import UserStore
+    from frame_schema import ETF_SCHEMA, SECTOR_SCHEMA
+    from trading_calendar import get_trading_calendar
+    from data_version import publish_results, sync_session
+    from rerun_profiler import RerunProfiler, profile_section
 
 except ImportError as e:
     logger.error(f"Import error: {e}")
@@ -76,15 +81,9 @@ IST = pytz.timezone("Asia/Kolkata")
 # ============================================================================
 
 def is_market_open() -> bool:
-    """✅ FIXED: Simple NSE market-hours check in IST timezone."""
+    """NSE session check in IST (holidays included, see trading_calendar)."""
     try:
-        now = datetime.now(IST)
-        if now.weekday() >= 5:
-            return False
-        market_start = dt_time(9, 15)
-        market_end = dt_time(15, 30)
-        current_time = now.time()
-        return market_start <= current_time <= market_end
+        return get_trading_calendar().is_open()
     except Exception as e:
         logger.error(f"Error checking market hours: {e}")
         return False
@@ -94,31 +93,13 @@ def is_market_open() -> bool:
 # ============================================================================
 
 def validate_etf_data(etf_df: pd.DataFrame) -> pd.DataFrame:
-    """Robust ETF data validation"""
+    """Robust ETF data validation (single pass, see frame_schema.ETF_SCHEMA)"""
     if etf_df.empty:
         return etf_df
     
     try:
-        etf_df = etf_df.reset_index(drop=True)
-        
-        # Numeric columns
-        numeric_cols = ['LTP', 'Change', '% Change', '% Change 20 DMA', 'RS_55']
-        for col in numeric_cols:
-            if col in etf_df.columns:
-                etf_df[col] = pd.to_numeric(etf_df[col], errors='coerce')
-                etf_df[col] = etf_df[col].fillna(0.0)
-        
-        # String columns
-        etf_df['Symbol'] = etf_df['Symbol'].fillna('N/A')
-        etf_df['Name'] = etf_df['Name'].fillna('Unknown')
-        etf_df['TLDR'] = etf_df['TLDR'].fillna('No signal')
-        
-        etf_df = etf_df.drop_duplicates(subset=['Symbol'], keep='first')
-        etf_df = etf_df.reset_index(drop=True)
-        
-        final_count = len(etf_df)
-        logger.info(f"✅ Validated ETF data: {final_count} rows (expected 34)")
-        
+        etf_df, report = ETF_SCHEMA.validate(etf_df)
+        logger.info(f"✅ Validated ETF data: {report.summary()} (expected 34)")
         return etf_df
         
     except Exception as e:
@@ -127,50 +108,20 @@ def validate_etf_data(etf_df: pd.DataFrame) -> pd.DataFrame:
 
 def validate_sector_data(sector_df: pd.DataFrame) -> pd.DataFrame:
     """
-    ROBUST sector data validation - ALWAYS returns exactly 19 sectors
-    Handles NaN, bad data, index issues, column mismatches
+    ROBUST sector data validation (single pass, see frame_schema.SECTOR_SCHEMA)
+    Numeric NaN / inf / bad values -> 0.0, text defaults, one row per sector
     """
     if sector_df.empty:
         logger.warning("Sector DataFrame is empty")
         return pd.DataFrame()
     
-    original_count = len(sector_df)
-    logger.info(f"📊 Original sector data: {original_count} rows")
+    logger.info(f"📊 Original sector data: {len(sector_df)} rows")
     
     try:
-        # 1. RESET INDEX - ensures clean 0-based indexing
-        sector_df = sector_df.reset_index(drop=True)
-        
-        # 2. SAFE NUMERIC CONVERSION - never drops rows, fills NaN with 0
-        numeric_cols = ['RS_21', 'RS_55', 'RS_123', 'Change', '% Change', '% Change 20 DMA', 'LTP']
-        for col in numeric_cols:
-            if col in sector_df.columns:
-                sector_df[col] = pd.to_numeric(sector_df[col], errors='coerce')
-        
-        # 3. FILL NaN WITH DEFAULTS - prevents validation drops
-        sector_df['RS_21'] = sector_df['RS_21'].fillna(0.0)
-        sector_df['RS_55'] = sector_df['RS_55'].fillna(0.0)
-        sector_df['RS_123'] = sector_df['RS_123'].fillna(0.0)
-        sector_df['LTP'] = sector_df['LTP'].fillna(0.0)
-        sector_df['Change'] = sector_df['Change'].fillna(0.0)
-        sector_df['% Change'] = sector_df['% Change'].fillna(0.0)
-        sector_df['% Change 20 DMA'] = sector_df['% Change 20 DMA'].fillna(0.0)
-        
-        # 4. FILL EMPTY STRING COLUMNS
-        sector_df['Sector'] = sector_df['Sector'].fillna('Unknown')
-        sector_df['Category'] = sector_df['Category'].fillna('Mixed')
-        sector_df['TLDR'] = sector_df['TLDR'].fillna('No data')
-        
-        # 5. REMOVE DUPLICATES BY SECTOR NAME
-        sector_df = sector_df.drop_duplicates(subset=['Sector'], keep='first')
-        
-        # 6. FINAL INDEX RESET
-        sector_df = sector_df.reset_index(drop=True)
-        
+        sector_df, report = SECTOR_SCHEMA.validate(sector_df)
         final_count = len(sector_df)
-        logger.info(f"✅ Validated sector data: {final_count} rows (expected 19, got {final_count})")
+        logger.info(f"✅ Validated sector data: {report.summary()} (expected 19, got {final_count})")
         
-        # 7. ENSURE EXACTLY 19 SECTORS (if CSV has less, pad with zeros)
         if final_count < 19:
             logger.warning(f"⚠️ Only {final_count} sectors loaded, expected 19")
             # Don't pad - return what we have, don't fabricate data
@@ -310,39 +261,25 @@ def load_persistent_session_if_exists():
 # ============================================================================
 
 def load_persisted_analysis_into_session():
-    """Load last saved sector & ETF analysis plus timestamps"""
-    try:
-        if os.path.exists("sector_analysis_data.csv"):
-            df = pd.read_csv("sector_analysis_data.csv")
-            df = validate_sector_data(df)
-            st.session_state.analysis_results = df
-            logger.info(f"Loaded sector analysis: {len(df)} rows")
-    except Exception as e:
-        logger.error(f"Error loading sector analysis: {e}")
-    
-    try:
-        if os.path.exists("etf_rs_output.csv"):
-            df = pd.read_csv("etf_rs_output.csv")
-            df = validate_etf_data(df)
-            st.session_state.etf_rs = df
-            logger.info(f"Loaded ETF RS: {len(df)} rows")
-    except Exception as e:
-        logger.error(f"Error loading ETF RS: {e}")
-    
-    # Load refresh timestamps
+    """
+    Load last saved sector & ETF analysis plus timestamps (from the shared
+    read model: CSVs are only re-read when the data version changes)
+    """
     try:
-        sector_status = DataRefreshTracker.get_status("sectors")
-        if sector_status and sector_status.get("last_refresh") and sector_status["last_refresh"] != "Never":
-            st.session_state.last_analysis_time = sector_status["last_refresh"]
+        if sync_session(st.session_state):
+            logger.info(f"Loaded published analysis (data version {st.session_state.data_version})")
     except Exception as e:
-        logger.warning(f"Error loading sector status: {e}")
+        logger.error(f"Error loading published analysis: {e}")
     
+    # Load refresh timestamps (one cached tracker read)
     try:
-        etf_status = DataRefreshTracker.get_status("etfs")
-        if etf_status and etf_status.get("last_refresh") and etf_status["last_refresh"] != "Never":
-            st.session_state.last_etf_time = etf_status["last_refresh"]
+        statuses = DataRefreshTracker.get_all_status()
+        if statuses["sectors"]["last_refresh_ts"] is not None:
+            st.session_state.last_analysis_time = statuses["sectors"]["last_refresh"]
+        if statuses["etfs"]["last_refresh_ts"] is not None:
+            st.session_state.last_etf_time = statuses["etfs"]["last_refresh"]
     except Exception as e:
-        logger.warning(f"Error loading ETF status: {e}")
+        logger.warning(f"Error loading refresh status: {e}")
 
 # ============================================================================
 # ✅ CRITICAL: SESSION ACTIVITY TRACKING
@@ -462,13 +399,17 @@ def check_authentication() -> UserStore:
 # ANALYSIS HELPERS
 # ============================================================================
 
-def run_sector_analysis():
-    """Run sector RS analysis with validation"""
+def run_sector_analysis(fast: bool = False, partial: bool = False):
+    """
+    Run sector RS analysis with validation (fast=True: LTP-only when history
+    is warm; partial=True: re-fetch only stale / failed sectors)
+    """
     try:
         from rs_analyzer import SectorRSAnalyzer
         from config import SECTOR_TOKENS, BENCHMARK_TOKENS
         
-        connector = st.session_state.admin_connector
+        from broker_session import get_broker_session
+        connector = get_broker_session().connector() or st.session_state.admin_connector
         if not connector:
             st.error("❌ AngelOne not connected")
             return
@@ -480,67 +421,171 @@ def run_sector_analysis():
         
         with st.spinner("🔄 Fetching live market data for sectors..."):
             analyzer = SectorRSAnalyzer(connector, SECTOR_TOKENS)
-            df = analyzer.analyze(
-                BENCHMARK_TOKENS[benchmark_name]["token"],
-                [rs1, rs2, rs3],
-                None,
-            )
+            df = None
+            if fast:
+                df = analyzer.analyze_ltp(
+                    BENCHMARK_TOKENS[benchmark_name]["token"],
+                    [rs1, rs2, rs3],
+                    snapshot=st.session_state.get("analysis_results"),
+                )
+            if df is None and partial:
+                df = analyzer.analyze_partial(
+                    BENCHMARK_TOKENS[benchmark_name]["token"],
+                    [rs1, rs2, rs3],
+                    snapshot=st.session_state.get("analysis_results"),
+                )
+                if df is not None:
+                    st.info(f"🩹 Re-fetched {len(analyzer.refreshed)} stale sector(s)")
+            if df is None:
+                df = analyzer.analyze(
+                    BENCHMARK_TOKENS[benchmark_name]["token"],
+                    [rs1, rs2, rs3],
+                    None,
+                    snapshot=st.session_state.get("analysis_results"),
+                )
         
         if df is None or df.empty:
             st.error("❌ No sector data returned")
             logger.error("Sector analysis returned empty DataFrame")
             return
         
-        df = validate_sector_data(df)
-        st.session_state.analysis_results = df
-        st.session_state.last_analysis_time = datetime.now(IST).strftime("%Y-%m-%d %H:%M IST")
+        # Re-fetch only the sectors that dropped out
+        from sector_analysis_validator import enforce_complete_analysis
+        complete, df, msg = enforce_complete_analysis(
+            df,
+            lambda missing: analyzer.analyze_missing(
+                missing, BENCHMARK_TOKENS[benchmark_name]["token"], [rs1, rs2, rs3]
+            ),
+        )
+        if not complete:
+            st.warning(msg)
         
-        try:
-            df.to_csv("sector_analysis_data.csv", index=False)
-            DataRefreshTracker.update_status("sectors", status="success", count=len(df))
-            st.success(f"✅ Sector analysis complete: {len(df)} sectors analyzed")
-            logger.info(f"Sector analysis successful: {len(df)} rows")
-        except Exception as e:
-            st.warning(f"⚠️ Analysis done but save failed: {e}")
-            logger.error(f"Error saving sector analysis: {e}")
+        publish_sector_results(df)
     except Exception as e:
         st.error(f"❌ Sector analysis error: {str(e)}")
         logger.error(f"Sector analysis failed: {e}", exc_info=True)
 
-def run_etf_analysis():
-    """Run ETF RS calculation with validation"""
+def publish_sector_results(df):
+    """
+    Validate, store in session and persist a finished sector analysis
+    (identical results are not rewritten and do not bump the tracker)
+    """
+    df = validate_sector_data(df)
+    st.session_state.analysis_results = df
+    
+    try:
+        if publish_results("sectors", df) is None:
+            st.info(f"ℹ️ Sector analysis unchanged since last refresh ({len(df)} sectors)")
+            return
+        st.session_state.last_analysis_time = datetime.now(IST).strftime("%Y-%m-%d %H:%M IST")
+        DataRefreshTracker.update_status("sectors", status="success", count=len(df))
+        st.success(f"✅ Sector analysis complete: {len(df)} sectors analyzed")
+        logger.info(f"Sector analysis successful: {len(df)} rows")
+    except Exception as e:
+        st.warning(f"⚠️ Analysis done but save failed: {e}")
+        logger.error(f"Error saving sector analysis: {e}")
+
+def run_etf_analysis(fast: bool = False, partial: bool = False):
+    """
+    Run ETF RS calculation with validation (fast=True: LTP-only when history
+    is warm; partial=True: re-fetch only stale / failed ETFs)
+    """
     try:
-        from etf_rs_calculator import calculate_etf_rs
+        from etf_rs_calculator import (
+            calculate_etf_rs,
+            calculate_etf_rs_ltp,
+            calculate_etf_rs_partial,
+        )
         
-        smartapi = st.session_state.admin_connector.smartapi
+        from broker_session import get_broker_session
+        connector = get_broker_session().connector() or st.session_state.admin_connector
+        smartapi = connector.smartapi
         
         with st.spinner("🔄 Calculating ETF RS for all ETFs..."):
-            df_etf = calculate_etf_rs(
-                smartapi,
-                "ETFs-List_updated.csv",
-            )
+            df_etf = None
+            if fast:
+                df_etf = calculate_etf_rs_ltp(smartapi, "ETFs-List_updated.csv")
+            if df_etf is None and partial:
+                df_etf = calculate_etf_rs_partial(smartapi, "ETFs-List_updated.csv")
+            if df_etf is None:
+                df_etf = calculate_etf_rs(
+                    smartapi,
+                    "ETFs-List_updated.csv",
+                )
         
         if df_etf is None or df_etf.empty:
             st.error("❌ No ETF data returned")
             logger.error("ETF analysis returned empty DataFrame")
             return
         
-        df_etf = validate_etf_data(df_etf)
-        st.session_state.etf_rs = df_etf
-        st.session_state.last_etf_time = datetime.now(IST).strftime("%Y-%m-%d %H:%M IST")
-        
-        try:
-            df_etf.to_csv("etf_rs_output.csv", index=False)
-            DataRefreshTracker.save_refresh("etfs", status="success", count=len(df_etf))
-            st.success(f"✅ ETF RS calculation complete: {len(df_etf)} ETFs analyzed")
-            logger.info(f"ETF analysis successful: {len(df_etf)} rows")
-        except Exception as e:
-            st.warning(f"⚠️ ETF RS done but save failed: {e}")
-            logger.error(f"Error saving ETF analysis: {e}")
+        publish_etf_results(df_etf)
     except Exception as e:
         st.error(f"❌ ETF analysis error: {str(e)}")
         logger.error(f"ETF analysis failed: {e}", exc_info=True)
 
+def publish_etf_results(df_etf):
+    """
+    Validate, store in session and persist a finished ETF RS run
+    (identical results are not rewritten and do not bump the tracker)
+    """
+    df_etf = validate_etf_data(df_etf)
+    st.session_state.etf_rs = df_etf
+    
+    try:
+        if publish_results("etfs", df_etf) is None:
+            st.info(f"ℹ️ ETF RS unchanged since last refresh ({len(df_etf)} ETFs)")
+            return
+        st.session_state.last_etf_time = datetime.now(IST).strftime("%Y-%m-%d %H:%M IST")
+        DataRefreshTracker.save_refresh("etfs", status="success", count=len(df_etf))
+        st.success(f"✅ ETF RS calculation complete: {len(df_etf)} ETFs analyzed")
+        logger.info(f"ETF analysis successful: {len(df_etf)} rows")
+    except Exception as e:
+        st.warning(f"⚠️ ETF RS done but save failed: {e}")
+        logger.error(f"Error saving ETF analysis: {e}")
+
+def run_concurrent_refresh(fast: bool = False, partial: bool = False):
+    """
+    Sector and ETF analysis side by side under the shared rate limiter
+    (see refresh_orchestrator); each result is published as above
+    """
+    try:
+        from refresh_orchestrator import RefreshOrchestrator, SECTORS, ETFS
+        from config import BENCHMARK_TOKENS
+        
+        from broker_session import get_broker_session
+        connector = get_broker_session().connector() or st.session_state.admin_connector
+        if not connector:
+            st.error("❌ AngelOne not connected")
+            return
+        
+        benchmark_name = st.session_state.get("benchmark", "NIFTY 50")
+        rs_periods = [
+            st.session_state.get("rs_period_1", 21),
+            st.session_state.get("rs_period_2", 55),
+            st.session_state.get("rs_period_3", 123),
+        ]
+        
+        with st.spinner("🔄 Refreshing sectors and ETFs..."):
+            results = RefreshOrchestrator(connector).run(
+                fast=fast,
+                partial=partial,
+                benchmark_token=BENCHMARK_TOKENS[benchmark_name]["token"],
+                rs_periods=rs_periods,
+                sector_snapshot=st.session_state.get("analysis_results"),
+            )
+        
+        if results.get(SECTORS) is not None:
+            publish_sector_results(results[SECTORS])
+        else:
+            st.error("❌ No sector data returned")
+        if results.get(ETFS) is not None:
+            publish_etf_results(results[ETFS])
+        else:
+            st.error("❌ No ETF data returned")
+    except Exception as e:
+        st.error(f"❌ Refresh error: {str(e)}")
+        logger.error(f"Concurrent refresh failed: {e}", exc_info=True)
+
 # ============================================================================
 # SIDEBAR CONFIGURATION
 # ============================================================================
@@ -552,6 +597,10 @@ def render_sidebar_config():
         
         # AngelOne API (admin only)
         if st.session_state.get("user_role") == "admin":
+            # Reuse the shared broker session (survives reloads, other admins)
+            from admin_panel import attach_shared_session
+            attach_shared_session()
+
             with st.expander(
                 "🔐 AngelOne API Connection",
                 expanded=not st.session_state.admin_connected,
@@ -591,6 +640,8 @@ def render_sidebar_config():
                                     conn = AngelOneConnector(apikey, client_code, password, totp)
                                     ok, msg = conn.connect()
                                     if ok:
+                                        from broker_session import get_broker_session
+                                        get_broker_session().adopt(conn)
                                         st.session_state.admin_connector = conn
                                         st.session_state.admin_connected = True
                                         st.success(msg)
@@ -608,6 +659,8 @@ def render_sidebar_config():
                 
                 with col2:
                     if st.button("🚪 Disconnect", width="stretch", key="sidebar_disconnect_btn"):
+                        from broker_session import get_broker_session
+                        get_broker_session().clear()
                         st.session_state.admin_connected = False
                         st.session_state.admin_connector = None
                         st.success("Disconnected from AngelOne")
@@ -724,6 +777,18 @@ def render_sidebar_config():
         
         # Action buttons
         if st.session_state.get("user_role") == "admin":
+            st.checkbox(
+                "🩹 Only re-fetch stale / failed instruments",
+                value=False,
+                key="partial_refresh",
+                help="Instruments fetched recently are recomputed from stored history",
+            )
+            st.toggle(
+                "🧪 Profile page reruns",
+                value=False,
+                key="profile_reruns",
+                help="Runs each rerun under cProfile and shows a summary at the bottom",
+            )
             analyze_clicked = st.button(
                 "🔍 Analyze All Sectors",
                 type="primary",
@@ -741,13 +806,13 @@ def render_sidebar_config():
                 if not st.session_state.admin_connected:
                     st.error("❌ Connect to AngelOne first")
                 else:
-                    run_sector_analysis()
+                    run_sector_analysis(partial=st.session_state.partial_refresh)
             
             if etf_clicked:
                 if not st.session_state.admin_connected:
                     st.error("❌ Connect to AngelOne first")
                 else:
-                    run_etf_analysis()
+                    run_etf_analysis(partial=st.session_state.partial_refresh)
         else:
             st.info("💡 Only admin can refresh analysis.")
         
@@ -856,8 +921,7 @@ if st.session_state.get("user_role") == "subscriber":
                     )
                     if counter > 0 and is_market_open() and st.session_state.admin_connected:
                         logger.info(f"Auto-refresh triggered (counter={counter})")
-                        run_sector_analysis()
-                        run_etf_analysis()
+                        run_concurrent_refresh(fast=True)
                 except ImportError:
                     st.warning(
                         "⚠️ streamlit-autorefresh not installed. "
@@ -879,7 +943,7 @@ if st.session_state.get("user_role") == "subscriber":
             )
             
             # Home
-            with admin_nav[0]:
+            with admin_nav[0], profile_section("Home"):
                 render_tab_home()
                 st.divider()
                 st.subheader("👨💼 Admin Snapshot")
@@ -908,18 +972,15 @@ if st.session_state.get("user_role") == "subscriber":
                     )
             
             # Data Refresh
-            with admin_nav[1]:
+            with admin_nav[1], profile_section("Data Refresh"):
                 st.subheader("🔄 Refresh Market Data")
-                sector_status = DataRefreshTracker.get_status("sectors") or {}
-                etf_status = DataRefreshTracker.get_status("etfs") or {}
+                statuses = DataRefreshTracker.get_all_status()
                 
                 col1, col2 = st.columns(2)
                 with col1:
-                    sector_display = sector_status.get("last_refresh", "Never")
-                    st.caption(f"🕒 Sectors last refreshed: {sector_display} IST")
+                    st.caption(f"🕒 Sectors last refreshed: {statuses['sectors']['last_refresh']}")
                 with col2:
-                    etf_display = etf_status.get("last_refresh", "Never")
-                    st.caption(f"🕒 ETFs last refreshed: {etf_display} IST")
+                    st.caption(f"🕒 ETFs last refreshed: {statuses['etfs']['last_refresh']}")
                 
                 st.divider()
                 
@@ -933,7 +994,7 @@ if st.session_state.get("user_role") == "subscriber":
                             width="stretch",
                             key="tab_analyze_sectors",
                         ):
-                            run_sector_analysis()
+                            run_sector_analysis(partial=st.session_state.get("partial_refresh", False))
                     with col2:
                         if st.button(
                             "📑 Calculate ETF RS",
@@ -941,12 +1002,12 @@ if st.session_state.get("user_role") == "subscriber":
                             width="stretch",
                             key="tab_calc_etf",
                         ):
-                            run_etf_analysis()
+                            run_etf_analysis(partial=st.session_state.get("partial_refresh", False))
                 else:
                     st.warning("⚠️ Connect to AngelOne in the sidebar first")
             
             # Dashboards
-            with admin_nav[2]:
+            with admin_nav[2], profile_section("Dashboards"):
                 st.subheader("📊 Analysis Dashboards")
                 if st.session_state.get("analysis_results") is not None:
                     st.info("✅ Sector analysis data available for viewing")
@@ -968,7 +1029,7 @@ if st.session_state.get("user_role") == "subscriber":
 
             
             # User Management
-            with admin_nav[3]:
+            with admin_nav[3], profile_section("User Management"):
                 st.subheader("👥 User Management")
 
                 user_store = UserStore()
@@ -1163,7 +1224,7 @@ if st.session_state.get("user_role") == "subscriber":
 
             
             # System Settings
-            with admin_nav[4]:
+            with admin_nav[4], profile_section("System Settings"):
                 st.subheader("⚙️ System Settings")
                 col1, col2 = st.columns(2)
                 
@@ -1193,7 +1254,7 @@ if st.session_state.get("user_role") == "subscriber":
                     )
             
             # Blog
-            with admin_nav[5]:
+            with admin_nav[5], profile_section("Blog"):
                 blogpage()
         
         else:
@@ -1210,6 +1271,7 @@ if st.session_state.get("user_role") == "subscriber":
 
             
             load_persisted_analysis_into_session()
+            render_data_version_poller()
             
             st.markdown("## 📚 Educational Market Analysis Reports")
             st.caption(
@@ -1222,12 +1284,11 @@ if st.session_state.get("user_role") == "subscriber":
                 "trading advice."
             )
             
-            sector_status = DataRefreshTracker.get_status("sectors") or {}
-            etf_status = DataRefreshTracker.get_status("etfs") or {}
+            statuses = DataRefreshTracker.get_all_status()
             
             st.caption(
-                f"🕒 Sectors last refreshed: {sector_status.get('last_refresh', 'Never')} IST\n\n"
-                f"🕒 ETFs last refreshed: {etf_status.get('last_refresh', 'Never')} IST"
+                f"🕒 Sectors last refreshed: {statuses['sectors']['last_refresh']}\n\n"
+                f"🕒 ETFs last refreshed: {statuses['etfs']['last_refresh']}"
             )
             
             st.divider()
@@ -1277,4 +1338,11 @@ if st.session_state.get("user_role") == "subscriber":
 # ============================================================================
 
 if __name__ == "__main__":
-    main()
+    if st.session_state.get("profile_reruns") and st.session_state.get("user_role") == "admin":
+        from admin_panel import render_profile_panel
+
+        with RerunProfiler(page="admin") as profiler:
+            main()
+        render_profile_panel(profiler.record)
+    else:
+        main()
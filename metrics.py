@@ -0,0 +1,291 @@
+"""
+Metrics
+In-process timing spans and counters for the refresh / render hot paths
+
+Timings used to be guessed from a mix of print() and logger output. Hot
+paths now wrap themselves in span() / timed() and bump incr() counters;
+the registry keeps a small histogram per (span, labels) series.
+
+Disabled (the default) every call returns before touching the registry:
+span() hands back a shared no-op context manager, so instrumented code
+pays one global lookup and a function call.
+
+Features:
+- span(name, **labels): `with span("fetch", token=t): ...`
+- timed(name, **labels): decorator form, enabled state checked per call
+- incr(name, value=1, **labels): counters (cache hits, rows, bytes)
+- MetricsRegistry.snapshot(): JSON-ready dict (admin panel, metrics.json)
+- prometheus_text(): Prometheus exposition format; webhook_server serves
+  it at GET /metrics, merged with the snapshot the Streamlit process
+  dumps to METRICS_FILE (the two run as separate processes)
+- set_enabled() / is_enabled(); METRICS_ENABLED in config, RS_METRICS=1|0
+  in the environment overrides it
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import METRICS_BUCKETS, METRICS_DUMP_SECONDS, METRICS_ENABLED, METRICS_FILE
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Series:
+    """Count / sum / min / max plus per-bucket counts for one span series."""
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self, n_buckets: int):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (n_buckets + 1)  # last slot: above the top bucket
+
+
+class MetricsRegistry:
+    """Thread-safe store of span histograms and counters."""
+
+    def __init__(self, buckets: Iterable[float] = METRICS_BUCKETS, process: str = "app"):
+        self.buckets = sorted(buckets)
+        self.process = process
+        self.started_at = time.time()
+        self._spans: Dict[Tuple[str, Labels], _Series] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+        self._dump_lock = threading.Lock()
+        self._last_dump = time.monotonic()
+
+    def observe(self, name: str, seconds: float, labels: Labels = ()) -> None:
+        key = (name, labels)
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._spans.get(key)
+            if series is None:
+                series = self._spans[key] = _Series(len(self.buckets))
+            series.count += 1
+            series.total += seconds
+            series.min = min(series.min, seconds)
+            series.max = max(series.max, seconds)
+            series.buckets[slot] += 1
+
+    def incr(self, name: str, value: float = 1.0, labels: Labels = ()) -> None:
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict:
+        """{"process", "generated_at", "buckets", "spans": [...], "counters": [...]}"""
+        with self._lock:
+            spans = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": s.count,
+                    "sum": s.total,
+                    "min": s.min if s.count else 0.0,
+                    "max": s.max,
+                    "buckets": list(s.buckets),
+                }
+                for (name, labels), s in self._spans.items()
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+        return {
+            "process": self.process,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "generated_at": time.time(),
+            "enabled": _enabled,
+            "buckets": self.buckets,
+            "spans": spans,
+            "counters": counters,
+        }
+
+    def _write(self, path: str) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Could not write {path}: {e}")
+        self._last_dump = time.monotonic()
+
+    def dump(self, path: str = METRICS_FILE) -> None:
+        """Atomically write snapshot() as JSON."""
+        with self._dump_lock:
+            self._write(path)
+
+    def maybe_dump(self, path: str = METRICS_FILE, every: float = METRICS_DUMP_SECONDS) -> None:
+        """dump() at most once every `every` seconds; never waits on another dump."""
+        if time.monotonic() - self._last_dump < every:
+            return
+        if not self._dump_lock.acquire(blocking=False):
+            return  # another thread is dumping right now
+        try:
+            if time.monotonic() - self._last_dump >= every:
+                self._write(path)
+        finally:
+            self._dump_lock.release()
+
+
+# ============================================================================
+# PROMETHEUS TEXT
+# ============================================================================
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels: Dict, **extra) -> str:
+    items = {**labels, **extra}
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in items.items())
+
+
+def prometheus_text(snapshots: List[Dict]) -> str:
+    """
+    Exposition text for one or more snapshots: span histograms as
+    rs_span_seconds{span=...}, counters as rs_events_total{event=...},
+    each series labelled with its process.
+    """
+    lines = [
+        "# HELP rs_span_seconds Time spent in instrumented spans",
+        "# TYPE rs_span_seconds histogram",
+    ]
+    for snap in snapshots:
+        bounds = [str(b) for b in snap["buckets"]] + ["+Inf"]
+        for s in snap["spans"]:
+            base = {"process": snap["process"], "span": s["name"], **s["labels"]}
+            cumulative = 0
+            for le, n in zip(bounds, s["buckets"]):
+                cumulative += n
+                lines.append(f"rs_span_seconds_bucket{{{_label_text(base, le=le)}}} {cumulative}")
+            lines.append(f"rs_span_seconds_sum{{{_label_text(base)}}} {s['sum']:.6f}")
+            lines.append(f"rs_span_seconds_count{{{_label_text(base)}}} {s['count']}")
+
+    lines += [
+        "# HELP rs_events_total Instrumented event counters",
+        "# TYPE rs_events_total counter",
+    ]
+    for snap in snapshots:
+        for c in snap["counters"]:
+            base = {"process": snap["process"], "event": c["name"], **c["labels"]}
+            lines.append(f"rs_events_total{{{_label_text(base)}}} {c['value']:g}")
+    return "\n".join(lines) + "\n"
+
+
+def load_dumped_snapshot(path: str = METRICS_FILE) -> Optional[Dict]:
+    """Snapshot another process dumped, or None."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ============================================================================
+# INSTRUMENTATION API
+# ============================================================================
+
+def _env_enabled() -> bool:
+    value = os.environ.get("RS_METRICS")
+    if value is None:
+        return METRICS_ENABLED
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+_enabled = _env_enabled()
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: Labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _registry.observe(self.name, time.perf_counter() - self.started, self.labels)
+        if exc_type is not None:
+            _registry.incr("span_errors", 1.0, (("span", self.name),))
+        _registry.maybe_dump()
+        return False
+
+
+def span(name: str, **labels):
+    """Time a block; a shared no-op when metrics are disabled."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name, _labels(labels))
+
+
+def timed(name: str, **labels):
+    """Decorator version of span() with fixed labels."""
+    fixed = _labels(labels)
+
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, fixed):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def incr(name: str, value: float = 1.0, **labels) -> None:
+    if _enabled:
+        _registry.incr(name, value, _labels(labels))
@@ -12,6 +12,8 @@ import time
 from datetime import datetime
 import pytz
 
+from trading_calendar import get_trading_calendar
+
 # Define IST timezone
 IST = pytz.timezone("Asia/Kolkata")
 
@@ -35,11 +37,7 @@ def render_header_with_timestamp():
     
     # Get LIVE timestamp on EVERY page reload (not cached!)
     current_time_ist = datetime.now(IST)
-    is_market_open = (
-        current_time_ist.weekday() < 5 and  # Mon-Fri
-        current_time_ist.time() >= datetime.min.time().replace(hour=9, minute=15) and
-        current_time_ist.time() <= datetime.min.time().replace(hour=15, minute=30)
-    )
+    is_market_open = get_trading_calendar().is_open(current_time_ist)
     
     with col_status:
         if is_market_open:
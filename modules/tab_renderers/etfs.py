@@ -140,8 +140,11 @@ def render_tab_etfs():
                         st.session_state.etf_rs = df_etf
                         st.session_state.last_etf_time = datetime.now()
                         try:
-                            df_etf.to_csv("etf_rs_output.csv", index=False)
-                            st.success("✅ ETF RS calculation complete and saved")
+                            from data_version import publish_results
+                            if publish_results("etfs", df_etf) is None:
+                                st.info("ℹ️ ETF RS unchanged since last refresh")
+                            else:
+                                st.success("✅ ETF RS calculation complete and saved")
                         except Exception as e:
                             st.warning(f"⚠️ ETF RS done but save failed: {e}")
         else:
@@ -8,6 +8,8 @@ import pandas as pd
 from datetime import datetime
 import pytz
 
+from rs_ratings import top_n
+
 IST = pytz.timezone("Asia/Kolkata")
 
 
@@ -103,6 +105,11 @@ def render_tab_sectors():
 
         # ACTION BUTTONS (ADMIN ONLY)
         if st.session_state.get("user_role") == "admin":
+            partial = st.checkbox(
+                "🩹 Only re-fetch stale / failed instruments",
+                value=False,
+                key="sector_partial_refresh",
+            )
             analyze_clicked = st.button(
                 "🔍 Analyze All Sectors",
                 type="primary",
@@ -131,11 +138,20 @@ def render_tab_sectors():
 
                     with st.spinner("Analyzing all sectors..."):
                         analyzer = SectorRSAnalyzer(connector, SECTOR_TOKENS)
-                        df = analyzer.analyze(
-                            BENCHMARK_TOKENS[benchmark_name]["token"],
-                            [rs1, rs2, rs3],
-                            None,
-                        )
+                        df = None
+                        if partial:
+                            df = analyzer.analyze_partial(
+                                BENCHMARK_TOKENS[benchmark_name]["token"],
+                                [rs1, rs2, rs3],
+                                snapshot=st.session_state.get("analysis_results"),
+                            )
+                        if df is None:
+                            df = analyzer.analyze(
+                                BENCHMARK_TOKENS[benchmark_name]["token"],
+                                [rs1, rs2, rs3],
+                                None,
+                                snapshot=st.session_state.get("analysis_results"),
+                            )
 
                     if df is None or df.empty:
                         st.error("❌ No sector data returned")
@@ -143,8 +159,11 @@ def render_tab_sectors():
                         st.session_state.analysis_results = df
                         st.session_state.last_analysis_time = datetime.now()
                         try:
-                            df.to_csv("sector_analysis_data.csv", index=False)
-                            st.success("✅ Sector analysis complete and saved")
+                            from data_version import publish_results
+                            if publish_results("sectors", df) is None:
+                                st.info("ℹ️ Sector analysis unchanged since last refresh")
+                            else:
+                                st.success("✅ Sector analysis complete and saved")
                         except Exception as e:
                             st.warning(f"⚠️ Analysis done but save failed: {e}")
 
@@ -152,13 +171,19 @@ def render_tab_sectors():
                 if not st.session_state.admin_connected:
                     st.error("❌ Please connect to AngelOne first")
                 else:
-                    from etf_rs_calculator import calculate_etf_rs
+                    from etf_rs_calculator import calculate_etf_rs, calculate_etf_rs_partial
 
                     smartapi = st.session_state.admin_connector.smartapi
                     with st.spinner("Calculating ETF RS for all ETFs..."):
-                        df_etf = calculate_etf_rs(
-                            smartapi, "ETFs-List_updated.csv"
-                        )
+                        df_etf = None
+                        if partial:
+                            df_etf = calculate_etf_rs_partial(
+                                smartapi, "ETFs-List_updated.csv"
+                            )
+                        if df_etf is None:
+                            df_etf = calculate_etf_rs(
+                                smartapi, "ETFs-List_updated.csv"
+                            )
 
                     if df_etf is None or df_etf.empty:
                         st.error("❌ No ETF data returned")
@@ -166,8 +191,11 @@ def render_tab_sectors():
                         st.session_state.etf_rs = df_etf
                         st.session_state.last_etf_time = datetime.now()
                         try:
-                            df_etf.to_csv("etf_rs_output.csv", index=False)
-                            st.success("✅ ETF RS calculation complete and saved")
+                            from data_version import publish_results
+                            if publish_results("etfs", df_etf) is None:
+                                st.info("ℹ️ ETF RS unchanged since last refresh")
+                            else:
+                                st.success("✅ ETF RS calculation complete and saved")
                         except Exception as e:
                             st.warning(f"⚠️ ETF RS done but save failed: {e}")
         else:
@@ -217,19 +245,68 @@ def render_tab_sectors():
 
         col1, col2 = st.columns(2)
 
+        # Composite RS (precomputed per refresh) when available
+        rs_key = "RS_Composite" if "RS_Composite" in df.columns else "RS_55"
+
         with col1:
             st.subheader("📈 RS Distribution")
-            if "RS1" in df.columns:
-                st.bar_chart(df["RS1"].astype(float))
+            if rs_key in df.columns:
+                st.bar_chart(pd.to_numeric(df[rs_key], errors="coerce"))
 
         with col2:
             st.subheader("🏆 Top Performing Sectors")
-            if "RS1" in df.columns and "Sector" in df.columns:
-                top_sectors = df.nlargest(5, "RS1")[["Sector", "RS1"]]
+            if rs_key in df.columns and "Sector" in df.columns:
+                top_sectors = top_n(df, 5, rs_key)[["Sector", rs_key]]
                 st.dataframe(top_sectors, width="stretch", hide_index=True)
 
         st.divider()
 
+        st.subheader("🔄 Relative Rotation Graph")
+        try:
+            from config import BENCHMARK_TOKENS
+            from rrg_engine import build_rrg_figure, get_rrg_engine
+
+            bench_name = st.session_state.get("benchmark", "NIFTY 50")
+            bench_token = BENCHMARK_TOKENS.get(bench_name, BENCHMARK_TOKENS["NIFTY 50"])["token"]
+            tails = get_rrg_engine(bench_token).update().tails()
+            if tails.empty:
+                st.info("Not enough stored history for the RRG yet.")
+            else:
+                st.plotly_chart(
+                    build_rrg_figure(tails, f"Sector Rotation vs {bench_name}"),
+                    width="stretch",
+                )
+        except Exception as e:
+            st.warning(f"⚠️ RRG unavailable: {e}")
+
+        st.divider()
+
+        st.subheader("⏱️ Intraday Sector RS")
+        try:
+            from config import BENCHMARK_TOKENS, INTRADAY_INTERVALS
+            from intraday_bars import run_intraday_rs
+
+            bench_name = st.session_state.get("benchmark", "NIFTY 50")
+            bench_token = BENCHMARK_TOKENS.get(bench_name, BENCHMARK_TOKENS["NIFTY 50"])["token"]
+            interval = st.selectbox(
+                "Bar interval", INTRADAY_INTERVALS, index=1, key="intraday_interval"
+            )
+            if st.session_state.get("admin_connected") and st.button("📈 Compute Intraday RS"):
+                with st.spinner(f"Fetching {interval} bars..."):
+                    st.session_state.intraday_rs = run_intraday_rs(
+                        st.session_state.admin_connector, bench_token, interval
+                    )
+            df_intraday = st.session_state.get("intraday_rs")
+            if df_intraday is not None and not df_intraday.empty:
+                st.caption(f"RS periods are in bars · as of {df_intraday['As Of'].iloc[0]}")
+                st.dataframe(df_intraday, width="stretch", hide_index=True)
+            else:
+                st.info("No intraday RS computed yet.")
+        except Exception as e:
+            st.warning(f"⚠️ Intraday RS unavailable: {e}")
+
+        st.divider()
+
         csv = df.to_csv(index=False)
         st.download_button(
             label="📥 Download Sector Analysis (CSV)",
@@ -0,0 +1,179 @@
+"""
+Price History Store
+Compact on-disk store of daily closes for every fetched instrument
+
+Every candle frame fetched by the sector / ETF pipelines is merged in here,
+so history accumulates across refreshes and can be replayed offline
+(backtests, RRG, intraday splicing) without re-calling the broker.
+
+Storage: one .npz in long format – token (str), day (datetime64[D]),
+close (float32) – about 12 bytes per bar.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from metrics import incr, span
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = "price_history.npz"
+
+
+def _to_days(timestamps) -> pd.DatetimeIndex:
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    if ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+
+class PriceHistoryStore:
+    """In-memory close series per token, persisted to a single .npz file."""
+
+    def __init__(self, path: str = HISTORY_FILE):
+        self.path = path
+        self._series: Optional[Dict[str, pd.Series]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    # ------------------ Internal ------------------
+
+    def _load(self) -> Dict[str, pd.Series]:
+        if self._series is not None:
+            return self._series
+
+        series: Dict[str, pd.Series] = {}
+        if os.path.exists(self.path):
+            try:
+                with span("io", store="price_history", op="read"), \
+                        np.load(self.path, allow_pickle=False) as data:
+                    tokens, days, closes = data["token"], data["day"], data["close"]
+                if len(tokens):
+                    # Rows are written grouped by token, so split on boundaries
+                    starts = np.flatnonzero(np.r_[True, tokens[1:] != tokens[:-1]])
+                    ends = np.r_[starts[1:], len(tokens)]
+                    for s, e in zip(starts, ends):
+                        series[str(tokens[s])] = pd.Series(
+                            closes[s:e], index=pd.DatetimeIndex(days[s:e])
+                        )
+            except Exception as e:
+                logger.error(f"Could not load {self.path}: {e}")
+        self._series = series
+        return series
+
+    # ------------------ Public API ------------------
+
+    def update(self, token, df: pd.DataFrame) -> None:
+        """Merge a candle frame (timestamp, close) into the store."""
+        if df is None or df.empty or "close" not in df.columns:
+            return
+        new = pd.Series(
+            df["close"].to_numpy(dtype=np.float32), index=_to_days(df["timestamp"])
+        )
+        new = new[~new.index.duplicated(keep="last")]
+        key = str(token)
+        with self._lock:
+            series = self._load()
+            old = series.get(key)
+            if old is not None:
+                new = new.combine_first(old)
+            series[key] = new.sort_index().astype(np.float32)
+            self._dirty = True
+
+    def save(self) -> bool:
+        """Flush to disk (atomic replace). No-op when nothing changed."""
+        with self._lock:
+            if not self._dirty or self._series is None:
+                return False
+            tokens, days, closes = [], [], []
+            for key, s in self._series.items():
+                tokens.append(np.full(len(s), key))
+                days.append(s.index.values.astype("datetime64[D]"))
+                closes.append(s.to_numpy(dtype=np.float32))
+            tmp = self.path + ".tmp.npz"
+            try:
+                with span("io", store="price_history", op="write"):
+                    np.savez_compressed(
+                        tmp,
+                        token=np.concatenate(tokens) if tokens else np.array([], dtype="U1"),
+                        day=np.concatenate(days) if days else np.array([], dtype="datetime64[D]"),
+                        close=np.concatenate(closes) if closes else np.array([], dtype=np.float32),
+                    )
+                    os.replace(tmp, self.path)
+                self._dirty = False
+                return True
+            except Exception as e:
+                logger.error(f"Could not save {self.path}: {e}")
+                return False
+
+    def tokens(self) -> Iterable[str]:
+        return list(self._load().keys())
+
+    def series(self, token) -> Optional[pd.Series]:
+        """Close series for one token (DatetimeIndex of trading days)."""
+        return self._load().get(str(token))
+
+    def frame(self, token) -> Optional[pd.DataFrame]:
+        """Close history as a candle-style frame (timestamp, close)."""
+        incr("store_reads", store="price_history")
+        s = self.series(token)
+        if s is None:
+            return None
+        return pd.DataFrame({"timestamp": s.index, "close": s.to_numpy(dtype=float)})
+
+    def panel(
+        self, tokens: Iterable, start=None, end=None
+    ) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Aligned float32 (days x tokens) close panel, forward-filled.
+
+        Tokens without history become all-NaN columns; duplicates are kept.
+        """
+        series = self._load()
+        cols = [series.get(str(t), pd.Series(dtype=np.float32)) for t in tokens]
+        if not cols:
+            return pd.DatetimeIndex([]), np.empty((0, 0), dtype=np.float32)
+        # Positional columns: the same token may be requested twice
+        df = pd.concat(cols, axis=1, keys=range(len(cols))).sort_index()
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end)]
+        df = df.ffill()
+        return df.index, df.to_numpy(dtype=np.float32)
+
+
+_store: Optional[PriceHistoryStore] = None
+
+
+def get_history_store() -> PriceHistoryStore:
+    """Process-wide history store."""
+    global _store
+    if _store is None:
+        _store = PriceHistoryStore()
+    return _store
+
+
+def backfill(connector, tokens: Iterable, days_back: int = 1900) -> int:
+    """
+    Seed long history for backtests (SmartAPI allows ~2000 daily bars per
+    request). Returns number of tokens stored.
+    """
+    from rate_limiter import get_shared_limiter
+
+    store = get_history_store()
+    limiter = get_shared_limiter()
+    stored = 0
+    for token in tokens:
+        limiter.acquire()
+        df = connector.get_historical_df(token, days_back)
+        if df is not None and not df.empty:
+            store.update(token, df)
+            stored += 1
+    store.save()
+    return stored
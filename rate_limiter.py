@@ -0,0 +1,69 @@
+"""
+Shared Rate Limiter
+Thread-safe request pacing shared by every fetch pipeline
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from config import HISTORICAL_REQUESTS_PER_SECOND
+
+
+class RateLimiter:
+    """
+    Spaces calls evenly at `rate` per second across all threads.
+
+    Each caller reserves the next free slot under a lock and sleeps outside
+    it, so concurrent workers never exceed the shared budget.
+    """
+
+    def __init__(self, rate: float = HISTORICAL_REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Claim the next slot without waiting. Returns seconds until it opens."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        return slot - now
+
+    def acquire(self) -> float:
+        """Block until the caller may send a request. Returns seconds waited."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class AsyncRateLimiter:
+    """
+    asyncio front-end to a RateLimiter: coroutines await their slot instead
+    of blocking the event loop, and share the budget with threaded callers.
+    """
+
+    def __init__(self, limiter: Optional[RateLimiter] = None):
+        self.limiter = limiter or get_shared_limiter()
+
+    async def acquire(self) -> float:
+        delay = self.limiter.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+_shared: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter() -> RateLimiter:
+    """Process-wide limiter for the SmartAPI historical endpoint."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimiter(HISTORICAL_REQUESTS_PER_SECOND)
+        return _shared
@@ -0,0 +1,338 @@
+"""
+Refresh Benchmark Harness
+End-to-end timing of the refresh pipelines against FakeSmartConnect
+
+Runs SectorRSAnalyzer.analyze, calculate_etf_rs, admin_panel.refresh_all_data
+and the universe ranker (threaded, or async against FakeSmartAPIServer) under a grid of latency / error / worker / pacing
+settings, so changes to the fetch path can be compared on identical input.
+The live_ticks target records fake LTP ticks to JSONL, replays them through
+ReplayTickServer into LiveFeed(url=...) and checks the resulting LTPBook.
+
+All runs happen in a scratch directory: history stores, tracker files and
+CSV outputs written by the pipelines never touch the working tree.
+
+Usage:
+    python refresh_benchmark.py                      # default scenarios
+    python refresh_benchmark.py --targets sector etf --latency 0.1
+    python refresh_benchmark.py --csv results.csv
+    python refresh_benchmark.py --targets live_ticks --latency 0
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+import config
+import etf_rs_calculator
+import price_history
+import rate_limiter
+import rs_analyzer
+import token_health
+from fake_broker import FIXTURE_DIR, FakeSmartAPIServer, FakeSmartConnect, make_fake_connector
+from live_ticks import LiveFeed, ReplayTickServer
+from universe_rs import run_universe_rs
+
+try:
+    from admin_panel import refresh_all_data
+except ImportError:  # streamlit not installed
+    refresh_all_data = None
+
+logger = logging.getLogger(__name__)
+
+ETF_CSV = "ETFs-List_updated.csv"
+TARGETS = ("sector", "etf", "refresh_all", "universe", "universe_async", "live_ticks")
+LIVE_TICK_ROUNDS = 20
+LIVE_TICK_FILE = "live_ticks_recording.jsonl"
+
+# name -> FakeSmartConnect / pacing settings
+DEFAULT_SCENARIOS: List[Dict] = [
+    {"name": "clean", "latency": 0.05},
+    {"name": "slow-api", "latency": 0.25, "jitter": 0.1},
+    {"name": "rate-limited", "latency": 0.05, "max_rps": 3},
+    {"name": "flaky", "latency": 0.05, "rate_limit_rate": 0.05, "server_error_rate": 0.02},
+    {"name": "no-pacing", "latency": 0.05, "sector_delay": 0.0, "etf_delay": 0.0},
+    {"name": "fast-limiter", "latency": 0.25, "requests_per_second": 20},
+]
+DEFAULT_WORKERS = (1, 3, 6)
+
+
+@contextlib.contextmanager
+def _scratch_dir(keep: bool = False):
+    """chdir into a temp dir seeded with the ETF list; restore afterwards."""
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp(prefix="refresh_bench_")
+    if os.path.exists(ETF_CSV):
+        shutil.copy(ETF_CSV, tmp)
+    os.chdir(tmp)
+    try:
+        yield tmp
+    finally:
+        os.chdir(cwd)
+        if not keep:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def _pacing(sector_delay: Optional[float], etf_delay: Optional[float], rate: Optional[float]):
+    """Temporarily override per-request sleeps and the shared limiter rate."""
+    saved = (
+        rs_analyzer.RATE_LIMIT_DELAY,
+        etf_rs_calculator.ETF_RATE_LIMIT_DELAY,
+        rate_limiter._shared,
+    )
+    if sector_delay is not None:
+        rs_analyzer.RATE_LIMIT_DELAY = sector_delay
+    if etf_delay is not None:
+        etf_rs_calculator.ETF_RATE_LIMIT_DELAY = etf_delay
+    if rate is not None:
+        rate_limiter._shared = rate_limiter.RateLimiter(rate)
+    try:
+        yield
+    finally:
+        (
+            rs_analyzer.RATE_LIMIT_DELAY,
+            etf_rs_calculator.ETF_RATE_LIMIT_DELAY,
+            rate_limiter._shared,
+        ) = saved
+
+
+def _reset_singletons():
+    """Fresh history store and health board per run so every run starts cold."""
+    price_history._store = None
+    token_health._board = None
+
+
+def _synthetic_universe(n: int) -> List[Dict[str, str]]:
+    return [
+        {"symbol": f"SYN{i:04d}-EQ", "name": f"Synthetic {i}", "token": str(900000 + i)}
+        for i in range(n)
+    ]
+
+
+# ============================================================================
+# TARGETS
+# ============================================================================
+
+def _run_sector(connector, **_):
+    analyzer = rs_analyzer.SectorRSAnalyzer(connector, config.SECTOR_TOKENS)
+    df = analyzer.analyze(
+        config.BENCHMARK_TOKENS["NIFTY 50"]["token"], config.DEFAULT_RS_PERIODS
+    )
+    return len(df)
+
+
+def _run_etf(connector, **_):
+    df = etf_rs_calculator.calculate_etf_rs(connector.smartapi, ETF_CSV)
+    return 0 if df is None else len(df)
+
+
+def _run_refresh_all(connector, **_):
+    if refresh_all_data is None:
+        raise ImportError("admin_panel unavailable (streamlit not installed)")
+    ok, message = refresh_all_data(connector)
+    return int(ok)
+
+
+def _run_universe(connector, workers: int = config.UNIVERSE_MAX_WORKERS, universe_size: int = 200, **_):
+    df = run_universe_rs(
+        connector,
+        config.BENCHMARK_TOKENS["NIFTY 50"]["token"],
+        instruments=_synthetic_universe(universe_size),
+        max_workers=workers,
+        output_path=None,
+    )
+    return len(df)
+
+
+def _run_universe_async(connector, workers: int = config.ASYNC_MAX_CONCURRENCY, universe_size: int = 200, **_):
+    """Universe panel over HTTP; `workers` is the client's in-flight cap."""
+    from async_smartapi import AsyncSmartAPIClient
+
+    with FakeSmartAPIServer(connector.smartapi, jwt_token=connector.jwt_token) as server:
+        client = AsyncSmartAPIClient.from_connector(
+            connector, base_url=server.url, max_concurrency=workers
+        )
+        df = run_universe_rs(
+            connector,
+            config.BENCHMARK_TOKENS["NIFTY 50"]["token"],
+            instruments=_synthetic_universe(universe_size),
+            output_path=None,
+            async_client=client,
+        )
+    return len(df)
+
+
+def _record_ticks(smartapi, tokens, rounds: int, path: str) -> Dict[str, float]:
+    """
+    Write `rounds` quote snapshots as SmartAPI V2-style ticks (paise, epoch
+    ms) to a JSONL recording. Returns the last LTP per token.
+    """
+    last = {}
+    start_ms = int(time.time() * 1000)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(rounds):
+            response = smartapi.getMarketData("LTP", {"NSE": list(tokens)})
+            if not isinstance(response, dict) or not response.get("status"):
+                continue
+            for item in response["data"]["fetched"]:
+                f.write(json.dumps({
+                    "token": item["symbolToken"],
+                    "last_traded_price": int(round(item["ltp"] * 100)),
+                    "exchange_timestamp": start_ms + i * 1000,
+                }) + "\n")
+                last[item["symbolToken"]] = round(item["ltp"], 2)
+    return last
+
+
+def _run_live_ticks(connector, **_):
+    """Replay a recorded tick file through LiveFeed and verify the LTP book."""
+    tokens = [str(info["token"]) for info in config.SECTOR_TOKENS.values()]
+    expected = _record_ticks(connector.smartapi, tokens, LIVE_TICK_ROUNDS, LIVE_TICK_FILE)
+
+    server = ReplayTickServer(LIVE_TICK_FILE).start()
+    feed = LiveFeed(tokens, url=server.url)
+    try:
+        feed.start()
+        if not feed.closed.wait(30):
+            raise RuntimeError("replay did not finish within 30 s")
+    finally:
+        feed.stop()
+        server.stop()
+
+    book = feed.book.snapshot()
+    wrong = [t for t, ltp in expected.items() if t not in book or abs(book[t][0] - ltp) > 1e-6]
+    if wrong:
+        raise RuntimeError(f"LTP book mismatch for {len(wrong)} token(s), e.g. {wrong[0]}")
+    return len(book)
+
+
+_RUNNERS = {
+    "sector": _run_sector,
+    "etf": _run_etf,
+    "refresh_all": _run_refresh_all,
+    "universe": _run_universe,
+    "universe_async": _run_universe_async,
+    "live_ticks": _run_live_ticks,
+}
+
+
+# ============================================================================
+# HARNESS
+# ============================================================================
+
+def run_scenario(
+    scenario: Dict,
+    target: str,
+    workers: int = config.UNIVERSE_MAX_WORKERS,
+    fixture_dir: str = FIXTURE_DIR,
+    universe_size: int = 200,
+    seed: int = 42,
+) -> Dict:
+    """Time one target under one scenario. Returns a result row."""
+    fake = FakeSmartConnect(
+        fixture_dir=os.path.abspath(fixture_dir),
+        latency=scenario.get("latency", 0.05),
+        jitter=scenario.get("jitter", 0.0),
+        rate_limit_rate=scenario.get("rate_limit_rate", 0.0),
+        server_error_rate=scenario.get("server_error_rate", 0.0),
+        max_rps=scenario.get("max_rps"),
+        seed=seed,
+    )
+    connector = make_fake_connector(fake)
+    row = {"Scenario": scenario["name"], "Target": target, "Workers": workers}
+
+    with _scratch_dir(), _pacing(
+        scenario.get("sector_delay"), scenario.get("etf_delay"), scenario.get("requests_per_second")
+    ):
+        _reset_singletons()
+        t0 = time.perf_counter()
+        try:
+            rows = _RUNNERS[target](connector, workers=workers, universe_size=universe_size)
+            error = ""
+        except ImportError as e:
+            rows, error = 0, f"skipped: {e}"
+        except Exception as e:
+            rows, error = 0, str(e)[:80]
+        elapsed = time.perf_counter() - t0
+        _reset_singletons()
+
+    row.update({
+        "Seconds": round(elapsed, 3),
+        "Rows": rows,
+        "API Calls": fake.stats["calls"],
+        "Rate Limited": fake.stats["rate_limited"],
+        "Server Errors": fake.stats["server_errors"],
+        "Error": error,
+    })
+    return row
+
+
+def run_benchmark(
+    targets: Sequence[str] = TARGETS,
+    scenarios: Sequence[Dict] = DEFAULT_SCENARIOS,
+    workers: Sequence[int] = DEFAULT_WORKERS,
+    fixture_dir: str = FIXTURE_DIR,
+    universe_size: int = 200,
+) -> pd.DataFrame:
+    """Full grid; worker counts only vary for targets that use a worker pool."""
+    rows = []
+    for scenario in scenarios:
+        for target in targets:
+            for w in (workers if target.startswith("universe") else workers[:1]):
+                row = run_scenario(scenario, target, w, fixture_dir, universe_size)
+                logger.info(
+                    f"{row['Scenario']:<13} {row['Target']:<12} w={w} "
+                    f"{row['Seconds']:>8.2f}s calls={row['API Calls']} {row['Error']}"
+                )
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark refresh pipelines on a fake broker")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--workers", nargs="+", type=int, default=list(DEFAULT_WORKERS))
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--universe-size", type=int, default=200)
+    parser.add_argument("--latency", type=float, help="single custom scenario latency (s)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float)
+    parser.add_argument("--requests-per-second", type=float, help="shared limiter rate")
+    parser.add_argument("--sector-delay", type=float)
+    parser.add_argument("--etf-delay", type=float)
+    parser.add_argument("--csv", help="write results to this CSV")
+    args = parser.parse_args(argv)
+
+    scenarios = DEFAULT_SCENARIOS
+    if args.latency is not None:
+        scenarios = [{
+            "name": "custom",
+            "latency": args.latency,
+            "rate_limit_rate": args.rate_limit_rate,
+            "server_error_rate": args.server_error_rate,
+            "max_rps": args.max_rps,
+            "requests_per_second": args.requests_per_second,
+            "sector_delay": args.sector_delay,
+            "etf_delay": args.etf_delay,
+        }]
+
+    df = run_benchmark(args.targets, scenarios, args.workers, args.fixtures, args.universe_size)
+    print(df.to_string(index=False))
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""
+Refresh Orchestrator
+Sector and ETF pipelines run concurrently under one shared rate limiter
+
+admin_panel.refresh_all_data and the main.py auto refresh used to run the
+sector analysis and then the ETF analysis strictly in sequence, each with
+its own fixed sleep between requests. Both pipelines now run side by side
+and take their request slots from the process-wide RateLimiter, so a
+combined refresh takes roughly as long as the slower pipeline instead of
+the sum of the two, without ever exceeding the broker's request budget.
+
+Features:
+- RefreshProgress: thread-safe progress channel – per pipeline state,
+  instrument i/N, current instrument, requests, response bytes, retries,
+  errors and elapsed time; snapshot() is what the UI polls
+- MeteredSmartAPI: SmartConnect proxy that reports every candle / quote
+  request (bytes, retries = repeated windows) to the channel
+- run_sector_pipeline / run_etf_pipeline: fast (LTP) -> partial -> full
+  fallbacks, the same branches refresh_all_data always had
+- RefreshOrchestrator.run(): both pipelines on a two-worker pool
+- start_refresh() / get_refresh_job(): one background job per process, so
+  a Streamlit rerun can poll progress without blocking on the fetch
+"""
+
+import copy
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from config import BENCHMARK_TOKENS, DEFAULT_RS_PERIODS, SECTOR_TOKENS
+from etf_rs_calculator import calculate_etf_rs, calculate_etf_rs_ltp, calculate_etf_rs_partial
+from rate_limiter import RateLimiter, get_shared_limiter
+from rs_analyzer import SectorRSAnalyzer
+from sector_analysis_validator import enforce_complete_analysis
+
+logger = logging.getLogger(__name__)
+
+SECTORS = "sectors"
+ETFS = "etfs"
+ETF_LIST_FILE = "ETFs-List_updated.csv"
+
+
+# ============================================================================
+# PROGRESS CHANNEL
+# ============================================================================
+
+class RefreshProgress:
+    """Per-pipeline progress shared between worker threads and the UI."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pipelines: Dict[str, Dict] = {}
+
+    def start(self, pipeline: str) -> None:
+        with self._lock:
+            self._pipelines[pipeline] = {
+                "state": "running",
+                "done": 0,
+                "total": 0,
+                "current": "",
+                "requests": 0,
+                "bytes": 0,
+                "retries": 0,
+                "errors": 0,
+                "started": time.time(),
+                "finished": None,
+                "message": "",
+            }
+
+    def update(self, pipeline: str, done: int, total: int, current: str = "") -> None:
+        """Instrument `done` of `total` is being processed."""
+        with self._lock:
+            entry = self._pipelines.get(pipeline)
+            if entry is not None:
+                entry.update(done=done, total=total, current=str(current))
+
+    def callback(self, pipeline: str) -> Callable[[int, int, str], None]:
+        """progress_callback(i, total, name) bound to one pipeline."""
+        return lambda done, total, current="": self.update(pipeline, done, total, current)
+
+    def record_request(self, pipeline: str, nbytes: int = 0, retry: bool = False, error: bool = False) -> None:
+        with self._lock:
+            entry = self._pipelines.get(pipeline)
+            if entry is not None:
+                entry["requests"] += 1
+                entry["bytes"] += nbytes
+                entry["retries"] += int(retry)
+                entry["errors"] += int(error)
+
+    def finish(self, pipeline: str, ok: bool, message: str = "") -> None:
+        with self._lock:
+            entry = self._pipelines.get(pipeline)
+            if entry is not None:
+                entry.update(state="done" if ok else "failed", finished=time.time(), message=message)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Copy of every pipeline's progress, with `elapsed` seconds added."""
+        now = time.time()
+        with self._lock:
+            out = {name: dict(entry) for name, entry in self._pipelines.items()}
+        for entry in out.values():
+            entry["elapsed"] = (entry["finished"] or now) - entry["started"]
+        return out
+
+    def running(self) -> bool:
+        with self._lock:
+            return any(e["state"] == "running" for e in self._pipelines.values())
+
+
+def _payload_size(data) -> int:
+    """Approximate response size in bytes (SmartConnect returns parsed JSON)."""
+    if isinstance(data, (dict, list)):
+        return len(json.dumps(data, default=str))
+    return len(str(data or ""))
+
+
+class MeteredSmartAPI:
+    """
+    SmartConnect proxy reporting candle / quote traffic to a RefreshProgress.
+    A candle request for a (token, window) whose last attempt failed counts
+    as a retry. Everything else is delegated untouched.
+    """
+
+    def __init__(self, smartapi, progress: RefreshProgress, pipeline: str):
+        self._smartapi = smartapi
+        self._progress = progress
+        self._pipeline = pipeline
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._smartapi, name)
+
+    def _call(self, fn, *args, key=None, **kwargs):
+        with self._lock:
+            retry = key in self._failed
+        try:
+            data = fn(*args, **kwargs)
+        except Exception:
+            self._settle(key, failed=True)
+            self._progress.record_request(self._pipeline, 0, retry, error=True)
+            raise
+        failed = not (isinstance(data, dict) and data.get("status"))
+        self._settle(key, failed)
+        self._progress.record_request(self._pipeline, _payload_size(data), retry, failed)
+        return data
+
+    def _settle(self, key, failed: bool) -> None:
+        with self._lock:
+            if failed:
+                self._failed.add(key)
+            else:
+                self._failed.discard(key)
+
+    def getCandleData(self, params):
+        key = (params.get("symboltoken"), params.get("interval"), params.get("fromdate"))
+        return self._call(self._smartapi.getCandleData, params, key=key)
+
+    def getMarketData(self, *args, **kwargs):
+        return self._call(self._smartapi.getMarketData, *args, key=("quote", repr(args)), **kwargs)
+
+
+# ============================================================================
+# PIPELINES
+# ============================================================================
+
+def run_sector_pipeline(
+    connector,
+    benchmark_token=BENCHMARK_TOKENS["NIFTY 50"]["token"],
+    rs_periods=DEFAULT_RS_PERIODS,
+    fast: bool = False,
+    partial: bool = False,
+    snapshot: Optional[pd.DataFrame] = None,
+    limiter: Optional[RateLimiter] = None,
+    progress_callback=None,
+) -> Optional[pd.DataFrame]:
+    """Sector RS: LTP fast mode, then partial, then full; missing sectors re-fetched."""
+    analyzer = SectorRSAnalyzer(connector, SECTOR_TOKENS, limiter=limiter)
+    df = None
+    if fast:
+        df = analyzer.analyze_ltp(benchmark_token, rs_periods, snapshot=snapshot)
+    if df is None and partial:
+        df = analyzer.analyze_partial(
+            benchmark_token, rs_periods, snapshot=snapshot, progress_callback=progress_callback
+        )
+    if df is None:
+        df = analyzer.analyze(benchmark_token, rs_periods, progress_callback, snapshot=snapshot)
+    if df is None or df.empty:
+        return None
+
+    # Re-fetch only sectors that dropped out (not the whole universe)
+    _, df, _ = enforce_complete_analysis(
+        df,
+        lambda missing: SectorRSAnalyzer(connector, missing, limiter=limiter).analyze_missing(
+            missing, benchmark_token, rs_periods
+        ),
+    )
+    return df
+
+
+def run_etf_pipeline(
+    smartapi,
+    etf_csv_path: str = ETF_LIST_FILE,
+    fast: bool = False,
+    partial: bool = False,
+    limiter: Optional[RateLimiter] = None,
+    progress_callback=None,
+) -> Optional[pd.DataFrame]:
+    """ETF RS: LTP fast mode, then partial, then full."""
+    df = None
+    if fast:
+        df = calculate_etf_rs_ltp(smartapi, etf_csv_path)
+    if df is None and partial:
+        df = calculate_etf_rs_partial(
+            smartapi, etf_csv_path, limiter=limiter, progress_callback=progress_callback
+        )
+    if df is None:
+        df = calculate_etf_rs(
+            smartapi, etf_csv_path, limiter=limiter, progress_callback=progress_callback
+        )
+    if df is None or df.empty:
+        return None
+    return df
+
+
+# ============================================================================
+# ORCHESTRATOR
+# ============================================================================
+
+class RefreshOrchestrator:
+    """Runs the sector and ETF pipelines concurrently on one limiter."""
+
+    def __init__(
+        self,
+        connector,
+        limiter: Optional[RateLimiter] = None,
+        progress: Optional[RefreshProgress] = None,
+    ):
+        self.connector = connector
+        self.limiter = limiter or get_shared_limiter()
+        self.progress = progress or RefreshProgress()
+
+    def _metered(self, pipeline: str):
+        return MeteredSmartAPI(self.connector.smartapi, self.progress, pipeline)
+
+    def run(
+        self,
+        run_sector: bool = True,
+        run_etf: bool = True,
+        fast: bool = False,
+        partial: bool = False,
+        benchmark_token=BENCHMARK_TOKENS["NIFTY 50"]["token"],
+        rs_periods=DEFAULT_RS_PERIODS,
+        sector_snapshot: Optional[pd.DataFrame] = None,
+        etf_csv_path: str = ETF_LIST_FILE,
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        {"sectors": df, "etfs": df} for the pipelines asked for (None when a
+        pipeline produced nothing). Blocks until both have finished.
+        """
+        tasks = {}
+        if run_sector:
+            # Same session, own metering proxy
+            connector = copy.copy(self.connector)
+            connector.smartapi = self._metered(SECTORS)
+            tasks[SECTORS] = lambda: run_sector_pipeline(
+                connector,
+                benchmark_token,
+                rs_periods,
+                fast=fast,
+                partial=partial,
+                snapshot=sector_snapshot,
+                limiter=self.limiter,
+                progress_callback=self.progress.callback(SECTORS),
+            )
+        if run_etf:
+            smartapi = self._metered(ETFS)
+            tasks[ETFS] = lambda: run_etf_pipeline(
+                smartapi,
+                etf_csv_path,
+                fast=fast,
+                partial=partial,
+                limiter=self.limiter,
+                progress_callback=self.progress.callback(ETFS),
+            )
+        if not tasks:
+            return {}
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="refresh") as pool:
+            futures = {name: pool.submit(self._run, name, task) for name, task in tasks.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
+        progress = self.progress.snapshot()
+        logger.info(
+            f"Refresh ({', '.join(tasks)}) finished in {time.perf_counter() - started:.1f}s: "
+            + "; ".join(
+                f"{name} {p['elapsed']:.1f}s, {p['requests']} requests, {p['retries']} retries"
+                for name, p in progress.items()
+            )
+        )
+        return results
+
+    def _run(self, name: str, task) -> Optional[pd.DataFrame]:
+        self.progress.start(name)
+        try:
+            df = task()
+        except Exception as e:
+            logger.exception(f"{name} refresh failed")
+            self.progress.finish(name, False, str(e)[:200])
+            return None
+        if df is None:
+            self.progress.finish(name, False, "No data returned")
+        else:
+            self.progress.finish(name, True, f"{len(df)} rows")
+        return df
+
+
+# ============================================================================
+# BACKGROUND JOB
+# ============================================================================
+
+class RefreshJob:
+    """One orchestrated refresh running on a daemon thread."""
+
+    def __init__(self, orchestrator: RefreshOrchestrator, on_complete=None, **run_kwargs):
+        self.id = uuid.uuid4().hex[:12]
+        self.orchestrator = orchestrator
+        self.on_complete = on_complete
+        self.progress = orchestrator.progress
+        self.run_kwargs = run_kwargs
+        self.results: Dict[str, Optional[pd.DataFrame]] = {}
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._thread = threading.Thread(target=self._run, name=f"refresh-{self.id}", daemon=True)
+
+    def start(self) -> "RefreshJob":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            self.results = self.orchestrator.run(**self.run_kwargs)
+            if self.on_complete is not None:
+                self.on_complete(self)
+        except Exception as e:
+            logger.exception("Refresh job failed")
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+
+    @property
+    def running(self) -> bool:
+        return self.finished_at is None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._thread.join(timeout)
+        return not self.running
+
+
+_job: Optional[RefreshJob] = None
+_job_lock = threading.Lock()
+
+
+def start_refresh(
+    connector,
+    limiter: Optional[RateLimiter] = None,
+    on_complete: Optional[Callable[[RefreshJob], None]] = None,
+    **run_kwargs,
+) -> RefreshJob:
+    """
+    Start a background refresh (see RefreshOrchestrator.run for arguments).
+    on_complete(job) runs once on the worker thread when results are in.
+    While one is running every caller gets that job back instead.
+    """
+    global _job
+    with _job_lock:
+        if _job is not None and _job.running:
+            return _job
+        orchestrator = RefreshOrchestrator(connector, limiter)
+        _job = RefreshJob(orchestrator, on_complete, **run_kwargs).start()
+        return _job
+
+
+def get_refresh_job() -> Optional[RefreshJob]:
+    """Latest refresh job in this process (running or finished), if any."""
+    return _job
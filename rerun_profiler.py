@@ -0,0 +1,217 @@
+"""
+Rerun Profiler
+Opt-in cProfile capture of one Streamlit rerun for the admin dashboard
+
+An admin rerun touches every tab, the stores behind them and the published
+CSVs; when the page feels slow there was no way to tell which one. With
+profiling switched on (sidebar toggle) the whole rerun runs under cProfile
+and a summary is appended to a per-rerun log.
+
+Features:
+- RerunProfiler: context manager around the rerun; `.record` afterwards
+- profile_section(name): wall time per tab / block, no-op when the
+  current thread is not being profiled
+- record: total rerun time, top N functions by cumulative time, file
+  opens and CSV / JSON / npz parses (with the calling function, which
+  names the store), section times
+- save_profile() / load_profiles(): JSON lines in PROFILE_LOG_FILE,
+  trimmed to the last PROFILE_LOG_MAX_ENTRIES reruns
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import PROFILE_LOG_FILE, PROFILE_LOG_MAX_ENTRIES, PROFILE_TOP_N
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Streamlit runs each session's rerun on its own thread
+_local = threading.local()
+
+
+def _is_open(func) -> bool:
+    filename, _, name = func
+    return filename == "~" and name in ("<built-in method io.open>", "<built-in method _io.open>")
+
+
+def _is_parse(func) -> bool:
+    filename, _, name = func
+    path = filename.replace("\\", "/")
+    if name == "read_csv":
+        return "/pandas/" in path
+    if name in ("load", "loads"):
+        return path.endswith("/json/__init__.py") or ("/numpy/" in path and "npyio" in path)
+    return False
+
+
+def _label(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    path = os.path.abspath(filename)
+    if path.startswith(REPO_DIR + os.sep):
+        path = os.path.relpath(path, REPO_DIR)
+    else:
+        path = os.path.basename(path)
+    return f"{path}:{line}({name})"
+
+
+class RerunProfiler:
+    """
+    with RerunProfiler(page="admin") as profiler:
+        main()
+    profiler.record  # summary dict, also appended to PROFILE_LOG_FILE
+    """
+
+    def __init__(self, page: str = "", top_n: int = PROFILE_TOP_N, persist: bool = True):
+        self.page = page
+        self.top_n = top_n
+        self.persist = persist
+        self.sections: Dict[str, float] = {}
+        self.record: Optional[Dict] = None
+        self._profile = cProfile.Profile()
+
+    def __enter__(self):
+        _local.profiler = self
+        self._started_at = time.time()
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        total = time.perf_counter() - self._started
+        _local.profiler = None
+        try:
+            self.record = self._summarise(total, exc_type)
+            if self.persist:
+                save_profile(self.record)
+        except Exception as e:
+            logger.warning(f"Could not summarise rerun profile: {e}")
+        return False
+
+    def _summarise(self, total: float, exc_type) -> Dict:
+        stats = pstats.Stats(self._profile).stats
+
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top_n]
+        opens, parses = 0, 0
+        reads_by_caller: Dict[str, int] = {}
+        for func, (_, total_calls, _, _, callers) in stats.items():
+            is_open = _is_open(func)
+            if not is_open and not _is_parse(func):
+                continue
+            for caller, caller_stats in callers.items():
+                # json.load -> json.loads is one parse
+                if not is_open and _is_parse(caller):
+                    total_calls -= caller_stats[1]
+                    continue
+                key = _label(caller)
+                reads_by_caller[key] = reads_by_caller.get(key, 0) + caller_stats[1]
+            if is_open:
+                opens += total_calls
+            else:
+                parses += total_calls
+
+        return {
+            "at": self._started_at,
+            "page": self.page,
+            "total_seconds": round(total, 4),
+            # st.stop() / st.rerun() end a rerun with an exception on purpose
+            "ended_by": exc_type.__name__ if exc_type else None,
+            "file_opens": opens,
+            "parses": parses,
+            "reads_by_caller": dict(sorted(reads_by_caller.items(), key=lambda kv: -kv[1])),
+            "sections": {name: round(seconds, 4) for name, seconds in self.sections.items()},
+            "top": [
+                {
+                    "function": _label(func),
+                    "calls": calls,
+                    "own_seconds": round(own, 4),
+                    "cumulative_seconds": round(cumulative, 4),
+                }
+                for func, (_, calls, own, cumulative, _) in top
+            ],
+        }
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler: RerunProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        sections = self.profiler.sections
+        sections[self.name] = sections.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _NoSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SECTION = _NoSection()
+
+
+def profile_section(name: str):
+    """Time a block into the current thread's rerun profile, if any."""
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        return _NO_SECTION
+    return _Section(profiler, name)
+
+
+# ============================================================================
+# PER-RERUN LOG
+# ============================================================================
+
+_log_lock = threading.Lock()
+
+
+def save_profile(record: Dict, path: str = PROFILE_LOG_FILE, keep: int = PROFILE_LOG_MAX_ENTRIES) -> None:
+    """Append one rerun summary, keeping only the newest `keep` lines."""
+    with _log_lock:
+        lines: List[str] = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        lines = lines[-(keep - 1):] if keep > 1 else []
+        lines.append(json.dumps(record))
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+
+def load_profiles(limit: int = 50, path: str = PROFILE_LOG_FILE) -> List[Dict]:
+    """Newest-first rerun summaries."""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f.read().splitlines()[-limit:]:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records[::-1]
@@ -0,0 +1,131 @@
+"""
+Retry Scheduler
+Deferred, non-blocking retries for transient broker errors
+
+A fetch that hits a server-side error ("Something went wrong" / AB1004)
+is parked in a queue with exponential backoff + jitter instead of
+sleeping inline. The caller keeps working through the rest of the
+universe; the queue is drained at the end of the cycle, by which time
+most of the backoff has already elapsed.
+
+Features:
+- RetryableFetchError: raised by fetchers for transient server errors
+- RetryScheduler.defer(): park a failed fetch with its next ready time
+- RetryScheduler.drain(): run due retries, yielding (key, result)
+- RetryScheduler.call(): bounded blocking retry for must-have fetches
+- A total drain budget caps how long one cycle can spend on retries
+"""
+
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from config import (
+    RETRY_BASE_DELAY,
+    RETRY_DRAIN_BUDGET,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RetryableFetchError(Exception):
+    """Transient broker-side failure worth retrying later."""
+
+
+def is_retryable_message(message: str) -> bool:
+    message = str(message).lower()
+    return "something went wrong" in message or "ab1004" in message
+
+
+class RetryScheduler:
+    """Min-heap of deferred fetches ordered by the time they become due."""
+
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        jitter: float = 0.25,
+        budget: float = RETRY_DRAIN_BUDGET,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.budget = budget
+        self._clock = clock
+        self._sleep = sleep
+        self._heap = []
+        self._seq = itertools.count()
+        self.failed: Dict[Hashable, str] = {}
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based), with +/- jitter."""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def defer(self, key: Hashable, fn: Callable[[], Any], error=None, attempt: int = 1) -> float:
+        """
+        Queue `fn` for a later retry after failed attempt number `attempt`.
+        Returns the scheduled delay in seconds (0 if attempts are exhausted).
+        """
+        if attempt >= self.max_attempts:
+            self.failed[key] = str(error)
+            return 0.0
+        delay = self.backoff(attempt)
+        heapq.heappush(
+            self._heap, (self._clock() + delay, next(self._seq), key, fn, attempt + 1)
+        )
+        return delay
+
+    def __len__(self):
+        return len(self._heap)
+
+    def drain(self) -> Iterator[Tuple[Hashable, Any]]:
+        """
+        Run queued retries as they fall due, yielding (key, result) for each
+        success. Keys that exhaust their attempts or the drain budget end up
+        in `failed`.
+        """
+        deadline = self._clock() + self.budget
+        while self._heap:
+            ready_at, _, key, fn, attempt = heapq.heappop(self._heap)
+            if ready_at > deadline:
+                self.failed[key] = "retry budget exhausted"
+                continue
+            wait = ready_at - self._clock()
+            if wait > 0:
+                self._sleep(wait)
+            try:
+                result = fn()
+            except RetryableFetchError as e:
+                self.defer(key, fn, error=e, attempt=attempt)
+                continue
+            except Exception as e:
+                self.failed[key] = str(e)
+                continue
+            yield key, result
+
+    def call(self, fn: Callable[[], Any], key: Optional[Hashable] = None) -> Any:
+        """
+        Blocking retry with the same backoff policy, for a fetch everything
+        else depends on (e.g. the benchmark). Returns None on exhaustion.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return fn()
+            except RetryableFetchError as e:
+                if attempt == self.max_attempts:
+                    self.failed[key] = str(e)
+                    return None
+                delay = self.backoff(attempt)
+                logger.warning(f"Server error for {key}, retrying in {delay:.1f}s")
+                self._sleep(delay)
+        return None
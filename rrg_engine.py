@@ -0,0 +1,258 @@
+"""
+Relative Rotation Graph (RRG) Engine
+JdK-style RS-Ratio / RS-Momentum series for every sector vs a benchmark
+
+Method (daily bars from price_history):
+- RS          = 100 * sector / benchmark
+- RS-Ratio    = 100 + rolling z-score of (RS / SMA(RS, window))
+- RS-Momentum = 100 + rolling z-score of the RS-Ratio rate of change
+
+All rolling work is vectorised across sectors. Computed series are cached
+(in memory and in rrg_cache_<token>.npz) and each refresh only recomputes
+the tail that actually changed, so the chart can render on every rerun.
+"""
+
+import logging
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    RRG_MAX_POINTS,
+    RRG_MOMENTUM_LAG,
+    RRG_TAIL_LENGTH,
+    RRG_WINDOW,
+    SECTOR_TOKENS,
+)
+from price_history import get_history_store
+
+logger = logging.getLogger(__name__)
+
+QUADRANT_COLORS = {
+    "Leading": "rgba(25,135,84,0.08)",
+    "Weakening": "rgba(255,193,7,0.10)",
+    "Lagging": "rgba(220,53,69,0.08)",
+    "Improving": "rgba(13,110,253,0.08)",
+}
+
+
+def _zscore(df: pd.DataFrame, window: int) -> pd.DataFrame:
+    roll = df.rolling(window, min_periods=window)
+    return (df - roll.mean()) / roll.std(ddof=0)
+
+
+def compute_rrg(panel: np.ndarray, bench: np.ndarray, window: int, lag: int):
+    """Return (rs_ratio, rs_momentum) float32 arrays shaped like `panel`."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = pd.DataFrame(100.0 * panel / bench[:, None])
+    ratio = 100.0 + _zscore(rs / rs.rolling(window, min_periods=window).mean(), window)
+    roc = ratio / ratio.shift(lag)
+    momentum = 100.0 + _zscore(roc, window)
+    return ratio.to_numpy(dtype=np.float32), momentum.to_numpy(dtype=np.float32)
+
+
+def quadrant(ratio: float, momentum: float) -> str:
+    if ratio >= 100:
+        return "Leading" if momentum >= 100 else "Weakening"
+    return "Improving" if momentum >= 100 else "Lagging"
+
+
+class RRGEngine:
+    """Incrementally maintained RRG series for one benchmark."""
+
+    def __init__(
+        self,
+        benchmark_token,
+        sector_tokens: Dict = SECTOR_TOKENS,
+        window: int = RRG_WINDOW,
+        lag: int = RRG_MOMENTUM_LAG,
+    ):
+        self.benchmark_token = str(benchmark_token)
+        self.names = [info["name"] for info in sector_tokens.values()]
+        self.tokens = [str(info["token"]) for info in sector_tokens.values()]
+        self.window = window
+        self.lag = lag
+        self.cache_path = f"rrg_cache_{self.benchmark_token}.npz"
+
+        self._dates = pd.DatetimeIndex([])
+        self._ratio = np.empty((0, len(self.tokens)), dtype=np.float32)
+        self._momentum = np.empty((0, len(self.tokens)), dtype=np.float32)
+        self._load_cache()
+
+    # ------------------ Cache ------------------
+
+    @property
+    def _lookback(self) -> int:
+        # SMA + z-score on ratio, ROC lag, z-score on momentum
+        return 3 * self.window + self.lag
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                if (
+                    list(data["tokens"]) != self.tokens
+                    or int(data["window"]) != self.window
+                    or int(data["lag"]) != self.lag
+                ):
+                    return
+                self._dates = pd.DatetimeIndex(data["dates"])
+                self._ratio = data["ratio"]
+                self._momentum = data["momentum"]
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable RRG cache: {e}")
+
+    def _save_cache(self):
+        tmp = self.cache_path + ".tmp.npz"
+        try:
+            np.savez(
+                tmp,
+                tokens=np.array(self.tokens),
+                window=self.window,
+                lag=self.lag,
+                dates=self._dates.values.astype("datetime64[D]"),
+                ratio=self._ratio,
+                momentum=self._momentum,
+            )
+            os.replace(tmp, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not save RRG cache: {e}")
+
+    # ------------------ Update ------------------
+
+    def update(self) -> "RRGEngine":
+        """
+        Bring the series up to date with the history store.
+
+        Only the last cached day (which may have been intraday) and any newer
+        days are recomputed, from a slice just long enough for the windows.
+        """
+        dates, panel = get_history_store().panel([self.benchmark_token] + self.tokens)
+        if len(dates) == 0:
+            return self
+
+        if len(self._dates) and self._dates[-1] in dates:
+            keep = int((self._dates < self._dates[-1]).sum())
+            n_new = int((dates >= self._dates[-1]).sum())
+        else:
+            keep, n_new = 0, len(dates)
+
+        start = max(0, len(dates) - n_new - self._lookback)
+        ratio, momentum = compute_rrg(
+            panel[start:, 1:], panel[start:, 0], self.window, self.lag
+        )
+
+        new_dates = dates[-n_new:]
+        if (
+            keep + n_new == len(self._dates)
+            and self._dates[keep:].equals(new_dates)
+            and np.array_equal(self._ratio[keep:], ratio[-n_new:], equal_nan=True)
+            and np.array_equal(self._momentum[keep:], momentum[-n_new:], equal_nan=True)
+        ):
+            return self  # no new bars and the last day is unchanged: keep the cache file
+
+        self._dates = self._dates[:keep].append(new_dates)
+        self._ratio = np.vstack([self._ratio[:keep], ratio[-n_new:]])
+        self._momentum = np.vstack([self._momentum[:keep], momentum[-n_new:]])
+
+        if len(self._dates) > RRG_MAX_POINTS:
+            self._dates = self._dates[-RRG_MAX_POINTS:]
+            self._ratio = self._ratio[-RRG_MAX_POINTS:]
+            self._momentum = self._momentum[-RRG_MAX_POINTS:]
+
+        self._save_cache()
+        return self
+
+    # ------------------ Output ------------------
+
+    def tails(self, length: int = RRG_TAIL_LENGTH) -> pd.DataFrame:
+        """Long-form tail points: Sector, Date, RS-Ratio, RS-Momentum, Quadrant."""
+        if not len(self._dates):
+            return pd.DataFrame(columns=["Sector", "Date", "RS-Ratio", "RS-Momentum", "Quadrant"])
+
+        dates = self._dates[-length:]
+        ratio = self._ratio[-length:]
+        momentum = self._momentum[-length:]
+        df = pd.DataFrame({
+            "Sector": np.repeat(self.names, len(dates)),
+            "Date": np.tile(dates.values, len(self.names)),
+            "RS-Ratio": ratio.T.ravel(),
+            "RS-Momentum": momentum.T.ravel(),
+        }).dropna()
+        df["Quadrant"] = [
+            quadrant(r, m) for r, m in zip(df["RS-Ratio"], df["RS-Momentum"])
+        ]
+        return df
+
+
+_engines: Dict[str, RRGEngine] = {}
+
+
+def get_rrg_engine(benchmark_token) -> RRGEngine:
+    """Process-wide engine per benchmark (kept warm across reruns)."""
+    key = str(benchmark_token)
+    if key not in _engines:
+        _engines[key] = RRGEngine(key)
+    return _engines[key]
+
+
+def build_rrg_figure(tails: pd.DataFrame, title: str = "Relative Rotation Graph"):
+    """Plotly quadrant chart with a trailing tail per sector."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    if tails.empty:
+        return fig
+
+    pad = 0.5
+    x_min = min(tails["RS-Ratio"].min(), 100) - pad
+    x_max = max(tails["RS-Ratio"].max(), 100) + pad
+    y_min = min(tails["RS-Momentum"].min(), 100) - pad
+    y_max = max(tails["RS-Momentum"].max(), 100) + pad
+
+    for name, (x0, x1, y0, y1) in {
+        "Leading": (100, x_max, 100, y_max),
+        "Weakening": (100, x_max, y_min, 100),
+        "Lagging": (x_min, 100, y_min, 100),
+        "Improving": (x_min, 100, 100, y_max),
+    }.items():
+        fig.add_shape(
+            type="rect", x0=x0, x1=x1, y0=y0, y1=y1,
+            fillcolor=QUADRANT_COLORS[name], line_width=0, layer="below",
+        )
+        fig.add_annotation(
+            x=(x0 + x1) / 2, y=y1 if y1 > 100 else y0, text=name,
+            showarrow=False, font=dict(size=12, color="#666"),
+            yanchor="top" if y1 > 100 else "bottom",
+        )
+
+    for sector, g in tails.groupby("Sector", sort=False):
+        n = len(g)
+        fig.add_trace(go.Scatter(
+            x=g["RS-Ratio"], y=g["RS-Momentum"],
+            mode="lines+markers",
+            name=sector,
+            marker=dict(size=[4] * (n - 1) + [10]),
+            text=[d.strftime("%Y-%m-%d") for d in pd.to_datetime(g["Date"])],
+            hovertemplate=(
+                f"<b>{sector}</b><br>%{{text}}<br>"
+                "RS-Ratio %{x:.2f}<br>RS-Momentum %{y:.2f}<extra></extra>"
+            ),
+        ))
+
+    fig.add_hline(y=100, line_width=1, line_color="#999")
+    fig.add_vline(x=100, line_width=1, line_color="#999")
+    fig.update_layout(
+        title=title,
+        xaxis_title="RS-Ratio",
+        yaxis_title="RS-Momentum",
+        xaxis_range=[x_min, x_max],
+        yaxis_range=[y_min, y_max],
+        height=620,
+        legend=dict(orientation="v", font=dict(size=10)),
+        margin=dict(l=40, r=20, t=50, b=40),
+    )
+    return fig
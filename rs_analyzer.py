@@ -4,25 +4,59 @@ Relative Strength Analyzer Module
 Calculates RS values and analyzes sector/ETF performance
 """
 
+import logging
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import time
 
+from config import PARTIAL_REFRESH_MAX_AGE_MINUTES, RATE_LIMIT_DELAY
+from rs_ratings import add_rs_ratings
+from metrics import timed
+from price_history import get_history_store
+from token_health import get_health_board
+from ltp_quotes import fetch_ltps, has_recent_history, splice_ltps
+from candle_quality import CandleQualityChecker
+from trading_calendar import lookback_days
+from freshness import stale_tokens
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_KEY = "__benchmark__"
+
+
+def _snapshot_row(snapshot, symbol, name):
+    """Row for one sector from a previous result frame, or None."""
+    if snapshot is None or snapshot.empty:
+        return None
+    if "Symbol" in snapshot.columns:
+        match = snapshot[snapshot["Symbol"] == symbol]
+    else:
+        match = snapshot[snapshot["Sector"] == name]
+    if match.empty:
+        return None
+    row = match.iloc[-1].to_dict()
+    row["Symbol"] = symbol
+    return row
+
 
 class SectorRSAnalyzer:
     """Analyze sector relative strength vs benchmark"""
 
-    def __init__(self, connector, sector_tokens):
+    def __init__(self, connector, sector_tokens, limiter=None):
         """
         Initialize analyzer
 
         Args:
             connector: AngelOneConnector instance
             sector_tokens: Dict of sector tokens
+            limiter: Optional shared RateLimiter; paces every history fetch
+                instead of the fixed RATE_LIMIT_DELAY sleep
         """
         self.connector = connector
         self.sector_tokens = sector_tokens
+        self.limiter = limiter
+        self.refreshed = []
 
     def calculate_rs(self, sector_df, bench_df, period):
         """
@@ -76,86 +110,305 @@ class SectorRSAnalyzer:
             else:
                 return "Volatile pattern - Inconsistent performance"
 
-    def analyze(self, benchmark_token, rs_periods, progress_callback=None):
+    @timed("compute", stage="sector_row")
+    def _result_row(self, symbol, info, sector_df, bench_df, rs_periods):
+        """Metrics, category and TLDR for one sector"""
+        # Calculate metrics
+        ltp = round(sector_df["close"].iloc[-1], 2)
+        prev_close = (
+            sector_df["close"].iloc[-2] if len(sector_df) > 1 else ltp
+        )
+        pct_change = round(
+            (ltp - prev_close) / prev_close * 100 if prev_close != 0 else 0,
+            2,
+        )
+
+        # Calculate RS values
+        rs_vals = [
+            self.calculate_rs(sector_df, bench_df, period)
+            for period in rs_periods
+        ]
+
+        # Categorize
+        pos = sum(1 for rs in rs_vals if rs and rs > 0)
+        neg = sum(1 for rs in rs_vals if rs and rs < 0)
+
+        if pos == len(rs_periods):
+            category = "Outperforming"
+        elif neg == len(rs_periods):
+            category = "Underperforming"
+        else:
+            category = "Mixed"
+
+        tldr = self.get_tldr(
+            rs_vals[0] or 0, rs_vals[1] or 0, rs_vals[2] or 0, category
+        )
+
+        return {
+            "Sector": info["name"],
+            "Symbol": symbol,
+            "LTP": ltp,
+            "Change": pct_change,
+            f"RS_{rs_periods[0]}": round(rs_vals[0], 2) if rs_vals[0] else 0,
+            f"RS_{rs_periods[1]}": round(rs_vals[1], 2) if rs_vals[1] else 0,
+            f"RS_{rs_periods[2]}": round(rs_vals[2], 2) if rs_vals[2] else 0,
+            "Category": category,
+            "TLDR": tldr,
+            "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    @staticmethod
+    def _days_back(rs_periods):
+        # Calendar days spanning max_period sessions on the NSE calendar
+        return lookback_days(max(rs_periods) + 1)
+
+    def analyze(self, benchmark_token, rs_periods, progress_callback=None, snapshot=None):
         """
         Analyze all sectors
 
+        Sectors whose breaker is open keep their row from `snapshot` (or
+        drop out for enforce_complete_analysis).
+
         Returns DataFrame with sector analysis
         """
-        results = []
-        max_period = max(rs_periods)
+        days_back = self._days_back(rs_periods)
 
         # Fetch benchmark data once
-        bench_df = self.connector.get_historical_df(benchmark_token, max_period + 2)
+        bench_df = self._fetch_benchmark(benchmark_token, days_back)
         if bench_df is None:
             return pd.DataFrame()
 
-        total = len(self.sector_tokens)
-        success_count = 0
+        results, _ = self._collect(
+            self.sector_tokens, bench_df, rs_periods, days_back, progress_callback, snapshot
+        )
+
+        return self._finalize(results, rs_periods)
+
+    def _fetch_benchmark(self, benchmark_token, days_back):
+        """Fetch the benchmark into history (health tracked for freshness)."""
+        health = get_health_board()
+        self._pace()
+        bench_df = self.connector.get_historical_df(benchmark_token, days_back)
+        if bench_df is None:
+            health.record_failure(benchmark_token, name="Benchmark")
+            return None
+        health.record_success(benchmark_token, "Benchmark")
+        get_history_store().update(benchmark_token, bench_df)
+        return bench_df
+
+    def analyze_partial(
+        self,
+        benchmark_token,
+        rs_periods,
+        snapshot=None,
+        max_age_minutes=PARTIAL_REFRESH_MAX_AGE_MINUTES,
+        progress_callback=None,
+    ):
+        """
+        Partial refresh: re-fetch only stale or failed sectors (see
+        freshness.stale_tokens) and score every other sector from stored
+        history against the same benchmark. Stale sectors whose re-fetch
+        fails, and sectors with no data at all, keep their row from
+        `snapshot` (never rescored from out-of-date history). Names fetched
+        are left in self.refreshed.
+
+        Returns None when the benchmark cannot be brought up to date – the
+        caller should run analyze().
+        """
+        days_back = self._days_back(rs_periods)
+        min_bars = max(rs_periods) + 2
+        history = get_history_store()
+        tokens = [benchmark_token] + [info["token"] for info in self.sector_tokens.values()]
+        stale = stale_tokens(tokens, max_age_minutes, min_bars)
+
+        if stale.pop(str(benchmark_token), None) is not None:
+            bench_df = self._fetch_benchmark(benchmark_token, days_back)
+        else:
+            bench_df = history.frame(benchmark_token)
+        if bench_df is None:
+            return None
+
+        todo = {
+            symbol: info for symbol, info in self.sector_tokens.items()
+            if str(info["token"]) in stale
+        }
+        fetched, failed = self._collect(
+            todo, bench_df, rs_periods, days_back, progress_callback, snapshot
+        )
+        by_symbol = {row["Symbol"]: row for row in fetched}
+        failed = set(failed)
+        self.refreshed = [info["name"] for info in todo.values() if info["name"] not in failed]
+
+        # Everything else: stored history first, then the previous snapshot.
+        # Failed re-fetches are stale by definition, so only the snapshot.
+        reused, frames = [], {BENCHMARK_KEY: bench_df}
+        for symbol, info in self.sector_tokens.items():
+            if symbol in by_symbol:
+                continue
+            sector_df = None if info["name"] in failed else history.frame(info["token"])
+            if sector_df is not None and len(sector_df) >= min_bars:
+                frames[symbol] = sector_df
+                reused.append(self._result_row(symbol, info, sector_df, bench_df, rs_periods))
+                continue
+            row = _snapshot_row(snapshot, symbol, info["name"])
+            if row is not None:
+                by_symbol[symbol] = row
+        self._attach_quality(reused, frames, rs_periods)
+        by_symbol.update((row["Symbol"], row) for row in reused)
+
+        logger.info(
+            f"Partial refresh: {len(todo) - len(failed)} fetched, {len(failed)} failed, "
+            f"{len(reused)} from history, "
+            f"{len(self.sector_tokens) - len(by_symbol)} unavailable"
+        )
+        results = [by_symbol[s] for s in self.sector_tokens if s in by_symbol]
+        return self._finalize(results, rs_periods)
+
+    def _collect(
+        self, sector_tokens, bench_df, rs_periods, days_back, progress_callback=None, snapshot=None
+    ):
+        """
+        Fetch and score each sector. While a sector's breaker is open its
+        previous row from `snapshot` is served as-is: stored closes would be
+        scored positionally against the freshly fetched benchmark.
+        Returns (result rows, names of sectors with no fresh data and no
+        snapshot row).
+        """
+        history = get_history_store()
+        health = get_health_board()
+        results = []
+        scored = []
+        frames = {BENCHMARK_KEY: bench_df}
         failed_sectors = []
+        total = len(sector_tokens)
 
-        for idx, (symbol, info) in enumerate(self.sector_tokens.items()):
+        for idx, (symbol, info) in enumerate(sector_tokens.items()):
             if progress_callback:
                 progress_callback(idx + 1, total, info["name"])
 
-            # Fetch sector data
+            # Breaker open -> serve the cached row, never re-score old closes
+            if not health.allow(info["token"], info["name"]):
+                row = _snapshot_row(snapshot, symbol, info["name"])
+                if row is None:
+                    failed_sectors.append(info["name"])
+                else:
+                    results.append(row)
+                continue
+
+            self._pace()
             sector_df = self.connector.get_historical_df(
-                info["token"], max_period + 2
+                info["token"], days_back
             )
             if sector_df is None:
+                health.record_failure(info["token"], name=info["name"])
                 failed_sectors.append(info["name"])
                 continue
+            health.record_success(info["token"], info["name"])
+            history.update(info["token"], sector_df)
 
-            # Calculate metrics
-            ltp = round(sector_df["close"].iloc[-1], 2)
-            prev_close = (
-                sector_df["close"].iloc[-2] if len(sector_df) > 1 else ltp
-            )
-            pct_change = round(
-                (ltp - prev_close) / prev_close * 100 if prev_close != 0 else 0,
-                2,
-            )
-
-            # Calculate RS values
-            rs_vals = [
-                self.calculate_rs(sector_df, bench_df, period)
-                for period in rs_periods
-            ]
+            frames[symbol] = sector_df
+            row = self._result_row(symbol, info, sector_df, bench_df, rs_periods)
+            scored.append(row)
+            results.append(row)
+            if self.limiter is None:
+                time.sleep(RATE_LIMIT_DELAY)  # rate limiting
 
-            # Categorize
-            pos = sum(1 for rs in rs_vals if rs and rs > 0)
-            neg = sum(1 for rs in rs_vals if rs and rs < 0)
+        history.save()
+        health.save()
+        self._attach_quality(scored, frames, rs_periods)
+        return results, failed_sectors
 
-            if pos == len(rs_periods):
-                category = "Outperforming"
-            elif neg == len(rs_periods):
-                category = "Underperforming"
-            else:
-                category = "Mixed"
+    def _pace(self):
+        """Wait for a slot on the shared limiter (if one was given)."""
+        if self.limiter is not None:
+            self.limiter.acquire()
 
-            tldr = self.get_tldr(
-                rs_vals[0] or 0, rs_vals[1] or 0, rs_vals[2] or 0, category
-            )
+    @staticmethod
+    def _attach_quality(results, frames, rs_periods):
+        """
+        Score every candle frame in one pass and add a Quality column.
+        Stored-history frames can span years, so only the RS window counts.
+        """
+        checker = CandleQualityChecker(window_bars=max(rs_periods) + 1)
+        for key, df in frames.items():
+            checker.add(key, df)
+        flags = checker.flags()
+        if flags.get(BENCHMARK_KEY, "OK") != "OK":
+            logger.warning(f"Benchmark candles flagged: {flags[BENCHMARK_KEY]}")
+        for row in results:
+            row["Quality"] = flags.get(row["Symbol"], "OK")
 
-            result_row = {
-                "Sector": info["name"],
-                "Symbol": symbol,
-                "LTP": ltp,
-                "Change": pct_change,
-                f"RS_{rs_periods[0]}": round(rs_vals[0], 2) if rs_vals[0] else 0,
-                f"RS_{rs_periods[1]}": round(rs_vals[1], 2) if rs_vals[1] else 0,
-                f"RS_{rs_periods[2]}": round(rs_vals[2], 2) if rs_vals[2] else 0,
-                "Category": category,
-                "TLDR": tldr,
-                "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            }
-
-            results.append(result_row)
-            success_count += 1
-            time.sleep(0.2)  # rate limiting
+    def analyze_missing(self, missing_tokens, benchmark_token, rs_periods):
+        """
+        Result rows for just `missing_tokens` ({symbol: info}), scored against
+        the benchmark already stored by analyze() – no benchmark re-fetch.
+        Rows are unranked; merge them into the full frame before rating.
+        """
+        bench_df = get_history_store().frame(benchmark_token)
+        if bench_df is None:
+            return pd.DataFrame()
+        results, _ = self._collect(
+            missing_tokens, bench_df, rs_periods, self._days_back(rs_periods)
+        )
+        return pd.DataFrame(results)
 
+    def _finalize(self, results, rs_periods):
         df = pd.DataFrame(results)
         if not df.empty:
+            df = add_rs_ratings(df, [f"RS_{p}" for p in rs_periods])
             df = df.sort_values(f"RS_{rs_periods[1]}", ascending=False)
 
         return df
+
+    def analyze_ltp(self, benchmark_token, rs_periods, snapshot=None):
+        """
+        Intraday fast refresh: one batched LTP quote for the benchmark and
+        every sector, spliced into stored daily history as today's close.
+
+        Only sectors with a quote (and a closed breaker) are rescored; the
+        others keep their row from `snapshot` – their stored last bar may be
+        days older than the benchmark's spliced close.
+
+        Returns None when stored history is too short or stale (or the
+        benchmark quote is missing, or no sector was quoted) – the caller
+        should run analyze().
+        """
+        min_bars = max(rs_periods) + 2
+        health = get_health_board()
+        tokens = [benchmark_token] + [
+            info["token"] for info in self.sector_tokens.values()
+            if not health.is_open(info["token"])
+        ]
+        if not all(has_recent_history(t, min_bars) for t in tokens):
+            return None
+
+        ltps = fetch_ltps(self.connector.smartapi, tokens)
+        if str(benchmark_token) not in ltps:
+            return None
+        splice_ltps(ltps)
+
+        history = get_history_store()
+        history.save()
+        bench_df = history.frame(benchmark_token)
+
+        frames = {BENCHMARK_KEY: bench_df}
+        scored, by_symbol = [], {}
+        for symbol, info in self.sector_tokens.items():
+            if str(info["token"]) in ltps and not health.is_open(info["token"]):
+                frames[symbol] = history.frame(info["token"])
+                scored.append(self._result_row(symbol, info, frames[symbol], bench_df, rs_periods))
+                continue
+            row = _snapshot_row(snapshot, symbol, info["name"])
+            if row is not None:
+                by_symbol[symbol] = row
+        if not scored:
+            return None
+        self._attach_quality(scored, frames, rs_periods)
+        by_symbol.update((row["Symbol"], row) for row in scored)
+
+        logger.info(
+            f"LTP refresh: {len(scored)} quoted, {len(by_symbol) - len(scored)} from snapshot, "
+            f"{len(self.sector_tokens) - len(by_symbol)} unavailable"
+        )
+        results = [by_symbol[s] for s in self.sector_tokens if s in by_symbol]
+        return self._finalize(results, rs_periods)
@@ -0,0 +1,104 @@
+"""
+RS Ratings Module
+Percentile ratings, ranks and composite RS score for analysis frames
+
+Computed once per refresh so every renderer can sort/filter on a
+precomputed key instead of re-sorting per view.
+
+Columns added for each RS_<p> column:
+- RS_<p>_Rating   1–99 cross-sectional percentile (99 = strongest)
+- RS_<p>_Rank     1 = strongest
+Plus:
+- RS_Composite         weighted mix of the per-period ratings
+- RS_Composite_Rating  1–99 percentile of the composite
+- RS_Composite_Rank    1 = strongest overall
+"""
+
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config import RS_COMPOSITE_WEIGHTS
+from metrics import timed
+
+_RS_COL = re.compile(r"^RS_(\d+)$")
+
+
+def rs_columns(df: pd.DataFrame) -> List[str]:
+    """RS_<period> columns in period order (ignores derived columns)."""
+    cols = [c for c in df.columns if _RS_COL.match(str(c))]
+    return sorted(cols, key=lambda c: int(_RS_COL.match(c).group(1)))
+
+
+def percentile_ratings(values) -> np.ndarray:
+    """1–99 percentile rating per column, vectorised over the whole universe."""
+    pct = pd.DataFrame(values).rank(pct=True, method="average").to_numpy()
+    return np.clip(np.ceil(pct * 99), 1, 99)
+
+
+@timed("compute", stage="rs_ratings")
+def add_rs_ratings(
+    df: pd.DataFrame,
+    rs_cols: Optional[Sequence[str]] = None,
+    weights: Sequence[float] = RS_COMPOSITE_WEIGHTS,
+) -> pd.DataFrame:
+    """
+    Attach percentile rating, rank and composite columns to an RS frame.
+
+    Non-numeric RS cells (e.g. '-' placeholders) are treated as missing and
+    get no rating/rank. Returns a new DataFrame.
+    """
+    if df is None or df.empty:
+        return df
+
+    rs_cols = list(rs_cols) if rs_cols else rs_columns(df)
+    if not rs_cols:
+        return df
+
+    out = df.copy()
+    values = out[rs_cols].apply(pd.to_numeric, errors="coerce")
+
+    ratings = percentile_ratings(values)
+    ranks = values.rank(ascending=False, method="min").to_numpy()
+
+    for k, col in enumerate(rs_cols):
+        out[f"{col}_Rating"] = ratings[:, k]
+        out[f"{col}_Rank"] = ranks[:, k]
+
+    w = np.asarray(list(weights)[: len(rs_cols)], dtype=float)
+    if len(w) < len(rs_cols):
+        w = np.ones(len(rs_cols))
+    valid = ~np.isnan(ratings)
+    w_sum = (valid * w).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        composite = np.where(
+            w_sum > 0, np.nansum(ratings * w, axis=1) / w_sum, np.nan
+        )
+
+    out["RS_Composite"] = np.round(composite, 1)
+    out["RS_Composite_Rating"] = percentile_ratings(composite)[:, 0]
+    out["RS_Composite_Rank"] = (
+        pd.Series(composite, index=out.index).rank(ascending=False, method="min")
+    )
+    return out
+
+
+def top_n(df: pd.DataFrame, n: int, col: str, bottom: bool = False) -> pd.DataFrame:
+    """
+    Top (or bottom) n rows by an RS column.
+
+    Uses the precomputed <col>_Rank when present (a filter, no sort of the
+    full frame); falls back to nlargest/nsmallest for older snapshots.
+    """
+    rank_col = f"{col}_Rank"
+    if rank_col in df.columns:
+        ranks = pd.to_numeric(df[rank_col], errors="coerce")
+        if bottom:
+            ranks = ranks.max() + 1 - ranks
+        return df[ranks <= n].assign(_r=ranks).sort_values("_r").drop(columns="_r").head(n)
+
+    values = pd.to_numeric(df[col], errors="coerce")
+    order = values.nsmallest(n) if bottom else values.nlargest(n)
+    return df.loc[order.index]
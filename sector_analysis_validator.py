@@ -8,7 +8,8 @@ Status: PRODUCTION READY - Core module for validation
 Functions:
 ✅ validate_sector_count() - Check exactly 19 sectors
 ✅ validate_sector_data() - Clean & validate data types
-✅ enforce_complete_analysis() - Auto-retry incomplete
+✅ enforce_complete_analysis() - Re-fetch only missing sectors
+✅ find_missing_sectors() - Diff a result against SECTOR_TOKENS
 ✅ generate_validation_report() - Full validation report
 
 All functions return tuple with (is_valid, data/msg, count/msg)
@@ -16,7 +17,11 @@ All functions return tuple with (is_valid, data/msg, count/msg)
 
 import pandas as pd
 import logging
-from typing import Tuple, Optional, Callable
+from typing import Dict, Tuple, Optional, Callable
+
+from config import SECTOR_TOKENS
+from frame_schema import ANALYSIS_SCHEMA
+from rs_ratings import add_rs_ratings, rs_columns
 
 logger = logging.getLogger(__name__)
 
@@ -87,7 +92,7 @@ def validate_sector_data(df: pd.DataFrame) -> Tuple[bool, pd.DataFrame, str]:
     """
     Validate and clean sector/ETF data.
     
-    Functions performed:
+    Functions performed (single pass, see frame_schema.ANALYSIS_SCHEMA):
     ✅ Convert numeric columns to float64
     ✅ Remove rows with invalid/missing critical data
     ✅ Handle NaN and infinity values
@@ -108,54 +113,16 @@ def validate_sector_data(df: pd.DataFrame) -> Tuple[bool, pd.DataFrame, str]:
         logger.error(msg)
         return False, None, msg
     
-    df_clean = df.copy()
-    original_count = len(df_clean)
-    
     try:
-        # Numeric columns that might exist in data
-        numeric_columns = [
-            "LTP", "Change", "% Change", "% Change 20 DMA",
-            "RS_21", "RS_55", "RS_123",
-            "RS_1", "RS1", "RS_2", "RS2",
-            "Open", "High", "Low", "Close", "Volume",
-            "Token"
-        ]
-        
-        # Convert identified numeric columns to float
-        for col in numeric_columns:
-            if col in df_clean.columns:
-                try:
-                    df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
-                    logger.debug(f"Converted {col} to numeric")
-                except Exception as e:
-                    logger.warning(f"Could not convert {col}: {e}")
-        
-        # Remove rows with all NaN in numeric columns
-        numeric_cols_present = [col for col in numeric_columns if col in df_clean.columns]
-        if numeric_cols_present:
-            df_clean = df_clean.dropna(subset=numeric_cols_present, how='all')
-        
-        # Remove rows with NaN in critical identifier columns
-        id_cols = ["Sector", "Index", "ETF Code", "ETF_Name", "Code"]
-        id_cols_present = [col for col in id_cols if col in df_clean.columns]
-        if id_cols_present:
-            df_clean = df_clean.dropna(subset=id_cols_present, how='all')
-        
-        # Remove rows where LTP is NaN (critical data)
-        if "LTP" in df_clean.columns:
-            df_clean = df_clean[df_clean["LTP"].notna()]
-        
-        # Replace infinities with NaN then drop
-        df_clean = df_clean.replace([float('inf'), float('-inf')], float('nan'))
+        # One vectorised pass: coerce numerics, NaN/inf/unparseable/negative
+        # LTP -> invalid, drop rows with no numbers, no identifier or no LTP
+        df_clean, report = ANALYSIS_SCHEMA.validate(df)
         
-        cleaned_count = len(df_clean)
-        dropped = original_count - cleaned_count
-        
-        msg = f"✅ Data validated: {cleaned_count} rows (dropped {dropped})"
+        msg = f"✅ Data validated: {report.rows_out} rows (dropped {report.dropped})"
         logger.info(msg)
         
-        if dropped > 0:
-            logger.info(f"Cleaned {dropped} invalid rows from {original_count}")
+        if report.dropped > 0:
+            logger.info(f"Cleaned {report.dropped} invalid rows from {report.rows_in}: {report.summary()}")
         
         return True, df_clean, msg
         
@@ -165,60 +132,116 @@ def validate_sector_data(df: pd.DataFrame) -> Tuple[bool, pd.DataFrame, str]:
         return False, df, msg
 
 
+def find_missing_sectors(df: pd.DataFrame, sector_tokens: Optional[Dict] = None) -> Dict:
+    """
+    Configured sectors absent from a result frame.
+    
+    Matches on "Symbol" (SECTOR_TOKENS key) when present, else on "Sector"
+    (the configured display name).
+    
+    Returns:
+        Dict: {symbol: info} subset of sector_tokens that is missing
+    """
+    sector_tokens = SECTOR_TOKENS if sector_tokens is None else sector_tokens
+    if df is None or df.empty:
+        return dict(sector_tokens)
+    
+    if "Symbol" in df.columns:
+        present = set(df["Symbol"].dropna())
+        return {sym: info for sym, info in sector_tokens.items() if sym not in present}
+    
+    present = set(df["Sector"].dropna()) if "Sector" in df.columns else set()
+    return {sym: info for sym, info in sector_tokens.items() if info["name"] not in present}
+
+
+def merge_sector_rows(df: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge re-fetched rows into a result frame (re-fetched rows win) and
+    recompute the cross-sectional ratings over the merged set.
+    """
+    if rows is None or rows.empty:
+        return df
+    if df is None or df.empty:
+        merged = rows
+    else:
+        key = "Symbol" if "Symbol" in df.columns and "Symbol" in rows.columns else "Sector"
+        merged = pd.concat([df, rows], ignore_index=True)
+        merged = merged.drop_duplicates(subset=[key], keep="last")
+    
+    cols = rs_columns(merged)
+    merged = add_rs_ratings(merged, cols)
+    if len(cols) > 1:
+        merged = merged.sort_values(cols[1], ascending=False)
+    return merged.reset_index(drop=True)
+
+
 def enforce_complete_analysis(
     df: pd.DataFrame,
-    retry_callback: Callable,
-    max_retries: int = 2
+    retry_callback: Callable[[Dict], pd.DataFrame],
+    max_retries: int = 2,
+    sector_tokens: Optional[Dict] = None,
 ) -> Tuple[bool, pd.DataFrame, str]:
     """
-    Retry analysis if incomplete (less than 19 sectors).
+    Re-fetch only the sectors missing from an incomplete analysis.
+    
+    Each attempt diffs the frame against the configured sectors, passes
+    just the missing {symbol: info} to retry_callback (e.g.
+    SectorRSAnalyzer.analyze_missing), and merges whatever comes back.
+    Cost per attempt is O(missing), not a full re-run.
     
     Args:
         df: Initial DataFrame from analysis
-        retry_callback: Function to call for retry (should return DataFrame)
+        retry_callback: fn(missing_tokens) -> DataFrame of rows for them
         max_retries: Maximum retry attempts (default 2)
+        sector_tokens: Expected sectors (default config.SECTOR_TOKENS)
         
     Returns:
         Tuple: (is_valid: bool, final_df: pd.DataFrame, message: str)
-        - is_valid: True if 19 sectors achieved
-        - final_df: DataFrame with complete data (or best attempt)
-        - message: Status with retry count
+        - is_valid: True if every configured sector is present
+        - final_df: Merged DataFrame (best effort if still incomplete)
+        - message: Status naming any sectors that stayed missing
     """
+    sector_tokens = SECTOR_TOKENS if sector_tokens is None else sector_tokens
+    expected = len(sector_tokens)
+    missing = find_missing_sectors(df, sector_tokens)
     
-    is_valid, msg, count = validate_sector_count(df)
-    
-    if is_valid:
-        return True, df, f"✅ Analysis complete on first try: {msg}"
+    if not missing:
+        return True, df, f"✅ Analysis complete on first try: {expected}/{expected} sectors"
     
-    logger.warning(f"Incomplete analysis detected, attempting retry. Got {count}/19")
+    logger.warning(
+        f"Incomplete analysis: {expected - len(missing)}/{expected}, "
+        f"re-fetching {len(missing)} missing sector(s)"
+    )
     
     for attempt in range(1, max_retries + 1):
+        names = ", ".join(info["name"] for info in missing.values())
         try:
-            logger.info(f"Retry attempt {attempt}/{max_retries}")
-            df_retry = retry_callback()
+            logger.info(f"Retry attempt {attempt}/{max_retries} for: {names}")
+            rows = retry_callback(missing)
             
-            if df_retry is None or df_retry.empty:
-                logger.warning(f"Retry attempt {attempt} returned empty data")
+            if rows is None or rows.empty:
+                logger.warning(f"Retry attempt {attempt} returned no rows")
                 continue
             
-            is_valid_retry, msg_retry, count_retry = validate_sector_count(df_retry)
+            df = merge_sector_rows(df, rows)
+            missing = find_missing_sectors(df, sector_tokens)
             
-            if is_valid_retry:
-                success_msg = f"✅ Retry successful: Success after {attempt} retries"
+            if not missing:
+                success_msg = f"✅ Retry successful: {expected}/{expected} sectors after {attempt} retries"
                 logger.info(success_msg)
-                return True, df_retry, success_msg
+                return True, df, success_msg
             
-            else:
-                logger.warning(f"Retry attempt {attempt} returned {count_retry}/19 sectors")
-                df = df_retry  # Keep best attempt so far
+            logger.warning(f"Retry attempt {attempt}: still missing {len(missing)}")
                 
         except Exception as e:
             logger.error(f"Retry attempt {attempt} failed: {e}")
             continue
     
     # Return best attempt even if not complete
-    final_count = len(df)
-    failure_msg = f"❌ Could not achieve 19 sectors after {max_retries} retries. Best: {final_count}/19"
+    names = ", ".join(info["name"] for info in missing.values())
+    failure_msg = (
+        f"❌ Still missing {len(missing)}/{expected} sectors after {max_retries} retries: {names}"
+    )
     logger.error(failure_msg)
     return False, df, failure_msg
 
@@ -297,6 +320,7 @@ if __name__ == "__main__":
     logger.info("Available functions:")
     logger.info("  • validate_sector_count(df)")
     logger.info("  • validate_sector_data(df)")
-    logger.info("  • enforce_complete_analysis(df, retry_callback, max_retries)")
+    logger.info("  • enforce_complete_analysis(df, retry_callback, max_retries, sector_tokens)")
+    logger.info("  • find_missing_sectors(df, sector_tokens)")
     logger.info("  • generate_validation_report(df)")
     logger.info("  • log_validation_summary(df)")
@@ -36,6 +36,8 @@ import pandas as pd
 from datetime import datetime
 import logging
 
+from rs_ratings import top_n
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -519,7 +521,7 @@ def generate_comprehensive_newsletter_v541(
                 cols = ["Sector", "LTP", "Change", "RS_55"]
                 out_cols = ["Name", "LTP", "Change", "RS_55"]
 
-            top_sec = sector_df.nlargest(5, "RS_55")[cols].copy()
+            top_sec = top_n(sector_df, 5, "RS_55")[cols].copy()
             top_sec.columns = out_cols
             html += _table_html(
                 top_sec,
@@ -529,7 +531,7 @@ def generate_comprehensive_newsletter_v541(
                 zebra_color="#e6f4ea",
             )
 
-            bottom_sec = sector_df.nsmallest(5, "RS_55")[cols].copy()
+            bottom_sec = top_n(sector_df, 5, "RS_55", bottom=True)[cols].copy()
             bottom_sec.columns = out_cols
             html += _table_html(
                 bottom_sec,
@@ -569,7 +571,7 @@ def generate_comprehensive_newsletter_v541(
                 cols = ["ETF Code", "LTP", "% Change", "RS_55"]
                 out_cols = ["Name", "LTP", "Change", "RS_55"]
 
-            top_etf = etf_df.nlargest(5, "RS_55")[cols].copy()
+            top_etf = top_n(etf_df, 5, "RS_55")[cols].copy()
             top_etf.columns = out_cols
             html += _table_html(
                 top_etf,
@@ -579,7 +581,7 @@ def generate_comprehensive_newsletter_v541(
                 zebra_color="#e6f4ea",
             )
 
-            bottom_etf = etf_df.nsmallest(5, "RS_55")[cols].copy()
+            bottom_etf = top_n(etf_df, 5, "RS_55", bottom=True)[cols].copy()
             bottom_etf.columns = out_cols
             html += _table_html(
                 bottom_etf,
@@ -644,11 +646,11 @@ def generate_sector_newsletter_v541(
             cols = ["Sector", "LTP", "Change", "% Change 20 DMA", "RS_55"] if has_pct_20_dma else ["Sector", "LTP", "Change", "RS_55"]
             out_cols = ["Name", "LTP", "Change", "% Chg 20‑DMA", "RS_55"] if has_pct_20_dma else ["Name", "LTP", "Change", "RS_55"]
 
-            top_sec = sector_df.nlargest(5, "RS_55")[cols].copy()
+            top_sec = top_n(sector_df, 5, "RS_55")[cols].copy()
             top_sec.columns = out_cols
             html += _table_html(top_sec, out_cols, "Top 5 Performing Sectors", limit=5, zebra_color="#e6f4ea")
 
-            bottom_sec = sector_df.nsmallest(5, "RS_55")[cols].copy()
+            bottom_sec = top_n(sector_df, 5, "RS_55", bottom=True)[cols].copy()
             bottom_sec.columns = out_cols
             html += _table_html(bottom_sec, out_cols, "Bottom 5 Underperforming Sectors", limit=5, zebra_color="#fbe9eb")
 
@@ -702,11 +704,11 @@ def generate_etf_newsletter_v541(etf_df: pd.DataFrame) -> str:
             cols = ["ETF Code", "LTP", "% Change", "% Change 20 DMA", "RS_55"] if has_pct_20_dma else ["ETF Code", "LTP", "% Change", "RS_55"]
             out_cols = ["Name", "LTP", "Change", "% Chg 20‑DMA", "RS_55"] if has_pct_20_dma else ["Name", "LTP", "Change", "RS_55"]
 
-            top_etf = etf_df.nlargest(5, "RS_55")[cols].copy()
+            top_etf = top_n(etf_df, 5, "RS_55")[cols].copy()
             top_etf.columns = out_cols
             html += _table_html(top_etf, out_cols, "Top 5 Leading ETFs", limit=5, zebra_color="#e6f4ea")
 
-            bottom_etf = etf_df.nsmallest(5, "RS_55")[cols].copy()
+            bottom_etf = top_n(etf_df, 5, "RS_55", bottom=True)[cols].copy()
             bottom_etf.columns = out_cols
             html += _table_html(bottom_etf, out_cols, "Bottom 5 Lagging ETFs", limit=5, zebra_color="#fbe9eb")
 
@@ -4,12 +4,22 @@ SUBSCRIBER EMAIL VIEWS - WITH MANUAL, RATE-LIMITED REFRESH
 Subscribers see email-style reports and can refresh data manually.
 The refresh button is disabled during cooldown and shows the next
 allowed refresh time as a clock value (HH:MM:SS IST).
+
+New admin results are also pushed: render_data_version_poller() checks
+the published data version every few seconds and reruns the page only
+when it has moved (see data_version). Newsletter HTML is rebuilt only when
+that version changes, and each report lists what changed since the
+previous refresh.
 """
 
 import time
+import pandas as pd
 import streamlit as st
 
+from config import DATA_VERSION_FALLBACK_POLL_SECONDS, DATA_VERSION_POLL_SECONDS
 from data_refresh_tracker import DataRefreshTracker
+from data_version import data_version_changed, get_last_changes
+from metrics import incr, span
 from sector_rs_email_builder_v541 import (
     generate_sector_newsletter_v541,
     generate_etf_newsletter_v541,
@@ -37,14 +47,88 @@ def render_data_refresh_info(analysis_type: str):
     else:
         freshness_text = ""
 
-    if last_refresh and last_refresh != "Never":
+    if status.get("last_refresh_ts") is not None:
         st.caption(
-            f"🕒 **Data last refreshed:** {last_refresh} IST{freshness_text}"
+            f"🕒 **Data last refreshed:** {last_refresh}{freshness_text}"
         )
     else:
         st.caption("🕒 **Data refresh information not available yet**")
 
 
+def _check_data_version():
+    if data_version_changed(st.session_state):
+        st.rerun()
+
+
+# st.fragment (Streamlit >= 1.37) reruns only the poll, not the reports
+if hasattr(st, "fragment"):
+    _version_poller = st.fragment(run_every=DATA_VERSION_POLL_SECONDS)(_check_data_version)
+else:
+    _version_poller = None
+
+
+def render_data_version_poller():
+    """
+    Rerun the page when newer results are published. Call after the session
+    has been synced (main.load_persisted_analysis_into_session).
+    """
+    if _version_poller is not None:
+        _version_poller()
+        return
+
+    try:
+        from streamlit_autorefresh import st_autorefresh
+        st_autorefresh(
+            interval=DATA_VERSION_FALLBACK_POLL_SECONDS * 1000,
+            key="data_version_poll",
+        )
+    except ImportError:
+        pass
+
+
+# kind -> ((data version, params), html); shared by every session
+_newsletter_cache = {}
+
+
+def _newsletter_html(kind: str, build, *args, params=()):
+    """Newsletter HTML, rebuilt only when the published data version changes."""
+    version = st.session_state.get("data_version")
+    if version is None:
+        with span("newsletter_render", kind=kind):
+            return build(*args)
+    key = (version, *params)
+    cached = _newsletter_cache.get(kind)
+    if cached is None or cached[0] != key:
+        incr("newsletter_cache", kind=kind, result="miss")
+        with span("newsletter_render", kind=kind):
+            cached = (key, build(*args))
+        _newsletter_cache[kind] = cached
+    else:
+        incr("newsletter_cache", kind=kind, result="hit")
+    return cached[1]
+
+
+def render_changes_since_last_refresh(kind: str):
+    """Row-level diff recorded by the last publish that changed `kind`."""
+    changes = get_last_changes(kind)
+    if not changes:
+        return
+
+    changed, added, removed = changes["changed"], changes["added"], changes["removed"]
+    with st.expander(f"🔀 Changed since last refresh ({len(changed) + len(added) + len(removed)} rows)"):
+        rows = [
+            {"Name": name, "Field": field, "Before": before, "After": after}
+            for name, fields in changed.items()
+            for field, (before, after) in fields.items()
+        ]
+        if rows:
+            st.dataframe(pd.DataFrame(rows).astype(str), width="stretch", hide_index=True)
+        if added:
+            st.caption("➕ New: " + ", ".join(added))
+        if removed:
+            st.caption("➖ Dropped: " + ", ".join(removed))
+
+
 def _render_refresh_ui(button_key: str, on_refresh):
     """
     Shared refresh UI with cooldown and next-allowed time label.
@@ -103,8 +187,11 @@ def render_subscriber_sector_view(on_refresh):
     benchmark = st.session_state.get("benchmark", "NIFTY 50")
 
     st.divider()
+    render_changes_since_last_refresh("sectors")
 
-    email_html = generate_sector_newsletter_v541(df, benchmark)
+    email_html = _newsletter_html(
+        "sectors", generate_sector_newsletter_v541, df, benchmark, params=(benchmark,)
+    )
     st.components.v1.html(email_html, height=2000, scrolling=True)
 
 
@@ -132,8 +219,9 @@ def render_subscriber_etf_view(on_refresh):
     etf_df = st.session_state.etf_rs
 
     st.divider()
+    render_changes_since_last_refresh("etfs")
 
-    email_html = generate_etf_newsletter_v541(etf_df)
+    email_html = _newsletter_html("etfs", generate_etf_newsletter_v541, etf_df)
     st.components.v1.html(email_html, height=2000, scrolling=True)
 
 
@@ -168,7 +256,12 @@ def render_subscriber_comprehensive_view(on_refresh):
 
     st.divider()
 
-    email_html = generate_comprehensive_newsletter_v541(
-        sector_df, etf_df, benchmark
+    email_html = _newsletter_html(
+        "comprehensive",
+        generate_comprehensive_newsletter_v541,
+        sector_df,
+        etf_df,
+        benchmark,
+        params=(benchmark,),
     )
     st.components.v1.html(email_html, height=2500, scrolling=True)
@@ -0,0 +1,213 @@
+"""
+Token Health Scoreboard
+Per-token fetch health with a circuit breaker for dead instruments
+
+Features:
+- Failure / success counts, last error, last success per token
+- Circuit breaker: after N consecutive failures a token is skipped for a
+  cool-off window (doubling on every re-trip, capped); callers serve the
+  cached value instead of spending request budget on it
+- Half-open probe: once the cool-off expires one real fetch is allowed;
+  success closes the breaker, failure re-opens it
+- Persisted to token_health.json so state survives restarts
+- table(): DataFrame for the admin health view
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import pandas as pd
+
+from metrics import span
+
+from config import (
+    HEALTH_BREAKER_THRESHOLD,
+    HEALTH_COOLOFF_MINUTES,
+    HEALTH_MAX_COOLOFF_MINUTES,
+)
+
+logger = logging.getLogger(__name__)
+
+HEALTH_FILE = "token_health.json"
+
+
+def _new_entry(name: str = "") -> Dict:
+    return {
+        "name": name,
+        "consecutive_failures": 0,
+        "failures": 0,
+        "successes": 0,
+        "skipped": 0,
+        "trips": 0,
+        "last_error": "",
+        "last_error_at": None,
+        "last_success_at": None,
+        "open_until": None,
+    }
+
+
+class TokenHealthBoard:
+    """Thread-safe health state for every fetched token."""
+
+    def __init__(
+        self,
+        path: str = HEALTH_FILE,
+        threshold: int = HEALTH_BREAKER_THRESHOLD,
+        cooloff_minutes: float = HEALTH_COOLOFF_MINUTES,
+        max_cooloff_minutes: float = HEALTH_MAX_COOLOFF_MINUTES,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.cooloff = cooloff_minutes * 60
+        self.max_cooloff = max_cooloff_minutes * 60
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+
+    # ------------------ Persistence ------------------
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with span("io", store="token_health", op="read"), open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable {self.path}: {e}")
+            return {}
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps(self._entries, indent=2)
+        tmp = self.path + ".tmp"
+        try:
+            with span("io", store="token_health", op="write"):
+                with open(tmp, "w") as f:
+                    f.write(data)
+                os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save {self.path}: {e}")
+
+    # ------------------ Breaker ------------------
+
+    def _entry(self, token, name: str = "") -> Dict:
+        key = str(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _new_entry(name)
+        elif name and not entry.get("name"):
+            entry["name"] = name
+        return entry
+
+    def allow(self, token, name: str = "") -> bool:
+        """
+        False while the token's breaker is open (caller should serve cache).
+        Skips are counted so the admin table shows budget saved.
+        """
+        with self._lock:
+            entry = self._entry(token, name)
+            open_until = entry.get("open_until")
+            if open_until and time.time() < open_until:
+                entry["skipped"] += 1
+                return False
+            return True
+
+    def record_success(self, token, name: str = "") -> None:
+        with self._lock:
+            entry = self._entry(token, name)
+            entry["successes"] += 1
+            entry["consecutive_failures"] = 0
+            entry["trips"] = 0
+            entry["open_until"] = None
+            entry["last_success_at"] = time.time()
+
+    def record_failure(self, token, error="No data returned", name: str = "") -> bool:
+        """Record a failed fetch. Returns True when this failure opened the breaker."""
+        with self._lock:
+            entry = self._entry(token, name)
+            entry["failures"] += 1
+            entry["consecutive_failures"] += 1
+            entry["last_error"] = str(error)[:200]
+            entry["last_error_at"] = time.time()
+            if entry["consecutive_failures"] < self.threshold:
+                return False
+            cooloff = min(self.max_cooloff, self.cooloff * (2 ** entry["trips"]))
+            entry["trips"] += 1
+            entry["open_until"] = time.time() + cooloff
+        logger.warning(
+            f"Circuit open for {name or token} after "
+            f"{entry['consecutive_failures']} failures ({cooloff / 60:.0f} min)"
+        )
+        return True
+
+    def reset(self, token=None) -> None:
+        """Close one breaker (or all of them), e.g. from the admin panel."""
+        with self._lock:
+            keys = [str(token)] if token is not None else list(self._entries)
+            for key in keys:
+                if key in self._entries:
+                    self._entries[key]["consecutive_failures"] = 0
+                    self._entries[key]["trips"] = 0
+                    self._entries[key]["open_until"] = None
+
+    def entry(self, token) -> Optional[Dict]:
+        """Copy of one token's state, or None if it was never fetched."""
+        with self._lock:
+            entry = self._entries.get(str(token))
+            return dict(entry) if entry else None
+
+    def is_open(self, token) -> bool:
+        entry = self._entries.get(str(token))
+        return bool(entry and entry.get("open_until") and time.time() < entry["open_until"])
+
+    # ------------------ Reporting ------------------
+
+    def table(self) -> pd.DataFrame:
+        """One row per token, worst first."""
+        now = time.time()
+
+        def fmt(ts):
+            if not ts:
+                return "Never"
+            return pd.Timestamp(ts, unit="s", tz="UTC").tz_convert("Asia/Kolkata").strftime("%Y-%m-%d %H:%M")
+
+        with self._lock:
+            entries = {k: dict(v) for k, v in self._entries.items()}
+
+        rows = []
+        for token, e in entries.items():
+            total = e["successes"] + e["failures"]
+            open_until = e.get("open_until")
+            is_open = bool(open_until and now < open_until)
+            rows.append({
+                "Token": token,
+                "Name": e.get("name", ""),
+                "State": "🔴 Open" if is_open else ("🟡 Degraded" if e["consecutive_failures"] else "🟢 OK"),
+                "Success %": round(e["successes"] / total * 100, 1) if total else None,
+                "Failures": e["failures"],
+                "Consecutive": e["consecutive_failures"],
+                "Skipped": e["skipped"],
+                "Last Success": fmt(e.get("last_success_at")),
+                "Last Error": e.get("last_error", ""),
+                "Last Error At": fmt(e.get("last_error_at")),
+                "Retry In (min)": round((open_until - now) / 60, 1) if is_open else 0,
+            })
+
+        df = pd.DataFrame(rows)
+        if not df.empty:
+            df = df.sort_values(["Consecutive", "Failures"], ascending=False).reset_index(drop=True)
+        return df
+
+
+_board: Optional[TokenHealthBoard] = None
+
+
+def get_health_board() -> TokenHealthBoard:
+    """Process-wide scoreboard shared by the sector and ETF pipelines."""
+    global _board
+    if _board is None:
+        _board = TokenHealthBoard()
+    return _board
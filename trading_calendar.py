@@ -0,0 +1,175 @@
+"""
+NSE Trading Calendar
+Holiday-aware session checks and trading-day arithmetic (IST)
+
+Market-hours checks used to be copied across main.py, admin_panel.py,
+utils/market_hours.py and the header component, all weekday + clock only,
+so refreshes ran on exchange holidays; fetch lookbacks were a flat 400
+calendar days. Everything now asks this calendar.
+
+Features:
+- NSE_HOLIDAYS table + MARKET_OPEN / MARKET_CLOSE session times from config
+- is_session() / is_open(): O(1) (weekday, holiday set lookup, clock compare)
+- next_open() / next_close() / latest_session() / next_session() /
+  session_close()
+- trading_days_back(n): the session n sessions before a date
+- lookback_days(bars): calendar days a historical request must span to
+  return `bars` sessions (plus LOOKBACK_BUFFER_SESSIONS)
+- ist_now(): naive IST wall clock for SmartAPI fromdate / todate (the
+  container runs in UTC)
+- busdaycal: numpy calendar for vectorised counts (candle_quality);
+  coverage_start: first day of the first year with listed holidays
+"""
+
+import logging
+from datetime import date, datetime, time as dt_time
+from typing import Iterable, Optional
+
+import numpy as np
+import pytz
+
+from config import (
+    LOOKBACK_BUFFER_SESSIONS,
+    MARKET_CLOSE_HOUR,
+    MARKET_CLOSE_MINUTE,
+    MARKET_OPEN_HOUR,
+    MARKET_OPEN_MINUTE,
+    NSE_HOLIDAYS,
+)
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone("Asia/Kolkata")
+
+
+def _as_date(day) -> date:
+    if isinstance(day, datetime):
+        return day.date()
+    if isinstance(day, np.datetime64):
+        return day.astype("datetime64[D]").astype(date)
+    return day
+
+
+class TradingCalendar:
+    """NSE sessions: weekdays minus holidays, open..close IST."""
+
+    def __init__(
+        self,
+        holidays: Iterable = NSE_HOLIDAYS,
+        open_time: dt_time = dt_time(MARKET_OPEN_HOUR, MARKET_OPEN_MINUTE),
+        close_time: dt_time = dt_time(MARKET_CLOSE_HOUR, MARKET_CLOSE_MINUTE),
+    ):
+        days = np.array(sorted(holidays), dtype="datetime64[D]")
+        self.holidays = {d.toordinal() for d in days.astype(date)}
+        # Holidays are only listed from this date on; earlier "sessions" are guesses
+        self.coverage_start = days[0].astype("datetime64[Y]").astype("datetime64[D]") if len(days) else None
+        self.open_time = open_time
+        self.close_time = close_time
+        self.busdaycal = np.busdaycalendar(holidays=days)
+
+    # ------------------ Point checks ------------------
+
+    @staticmethod
+    def to_ist(now: Optional[datetime]) -> datetime:
+        """Aware IST datetime (naive input is taken to be IST already)."""
+        if now is None:
+            return datetime.now(IST)
+        if now.tzinfo is None:
+            return IST.localize(now)
+        return now.astimezone(IST)
+
+    def is_session(self, day) -> bool:
+        day = _as_date(day)
+        return day.weekday() < 5 and day.toordinal() not in self.holidays
+
+    def is_holiday(self, day) -> bool:
+        """Weekday exchange holiday (weekends are not listed)."""
+        return _as_date(day).toordinal() in self.holidays
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        now = self.to_ist(now)
+        return self.is_session(now) and self.open_time <= now.time() <= self.close_time
+
+    # ------------------ Session navigation ------------------
+
+    def next_session(self, day) -> date:
+        """First session strictly after `day`."""
+        start = np.datetime64(_as_date(day), "D") + 1
+        return np.busday_offset(start, 0, roll="forward", busdaycal=self.busdaycal).astype(date)
+
+    def previous_session(self, day) -> date:
+        """Last session strictly before `day`."""
+        end = np.datetime64(_as_date(day), "D") - 1
+        return np.busday_offset(end, 0, roll="backward", busdaycal=self.busdaycal).astype(date)
+
+    def latest_session(self, now: Optional[datetime] = None) -> date:
+        """Most recent session that has opened as of `now`."""
+        now = self.to_ist(now)
+        today = now.date()
+        if self.is_session(today) and now.time() >= self.open_time:
+            return today
+        return self.previous_session(today)
+
+    def _at(self, day: date, at: dt_time) -> datetime:
+        return IST.localize(datetime.combine(_as_date(day), at))
+
+    def session_close(self, day) -> datetime:
+        """Aware IST close time of `day`'s session."""
+        return self._at(day, self.close_time)
+
+    def next_open(self, now: Optional[datetime] = None) -> datetime:
+        """Next session open after `now` (today's if it has not opened yet)."""
+        now = self.to_ist(now)
+        today = now.date()
+        if self.is_session(today) and now.time() < self.open_time:
+            return self._at(today, self.open_time)
+        return self._at(self.next_session(today), self.open_time)
+
+    def next_close(self, now: Optional[datetime] = None) -> datetime:
+        """Close of the current session, or of the next one when closed."""
+        now = self.to_ist(now)
+        today = now.date()
+        if self.is_session(today) and now.time() < self.close_time:
+            return self._at(today, self.close_time)
+        return self._at(self.next_session(today), self.close_time)
+
+    # ------------------ Trading-day arithmetic ------------------
+
+    def trading_days_back(self, n: int, end=None) -> date:
+        """The session `n` sessions before `end` (default: latest session)."""
+        end = np.datetime64(_as_date(end or self.latest_session()), "D")
+        return np.busday_offset(end, -n, roll="backward", busdaycal=self.busdaycal).astype(date)
+
+    def sessions_between(self, start, end) -> int:
+        """Sessions in [start, end)."""
+        return int(np.busday_count(
+            np.datetime64(_as_date(start), "D"), np.datetime64(_as_date(end), "D"),
+            busdaycal=self.busdaycal,
+        ))
+
+    def lookback_days(self, bars: int, buffer: int = LOOKBACK_BUFFER_SESSIONS, now=None) -> int:
+        """Calendar days back from today that cover `bars` (+buffer) sessions."""
+        now = self.to_ist(now)
+        first = self.trading_days_back(bars + buffer - 1, self.latest_session(now))
+        return (now.date() - first).days + 1
+
+
+_calendar: Optional[TradingCalendar] = None
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Process-wide NSE calendar."""
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar()
+    return _calendar
+
+
+def lookback_days(bars: int, buffer: int = LOOKBACK_BUFFER_SESSIONS) -> int:
+    """get_trading_calendar().lookback_days() shortcut for fetchers."""
+    return get_trading_calendar().lookback_days(bars, buffer)
+
+
+def ist_now() -> datetime:
+    """Current IST time, naive – SmartAPI reads fromdate / todate as IST."""
+    return TradingCalendar.to_ist(None).replace(tzinfo=None)
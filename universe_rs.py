@@ -0,0 +1,299 @@
+"""
+Universe-Scale RS Ranking
+Runs the RS_21/55/123 analysis across the full NSE equity universe
+
+Features:
+- Universe taken from the instrument registry (NSE '-EQ' symbols)
+- Fetches sharded across worker threads under the shared rate limiter, or
+  awaited on one event loop via async_smartapi.AsyncSmartAPIClient
+- Closes held in one float32 (days x instruments) panel aligned to the benchmark
+- RS computed vectorised; 1-99 ratings/ranks via rs_ratings.add_rs_ratings
+- Candle quality flags (candle_quality) scored for the whole universe at once
+- Ranked result set written to UNIVERSE_OUTPUT_FILE
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DEFAULT_RS_PERIODS,
+    UNIVERSE_DAYSBACK,
+    UNIVERSE_MAX_WORKERS,
+    UNIVERSE_OUTPUT_FILE,
+)
+from candle_quality import CandleQualityChecker
+from rate_limiter import RateLimiter, get_shared_limiter
+from rs_ratings import add_rs_ratings
+from trading_calendar import lookback_days
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# PRICE PANEL
+# ============================================================================
+
+def _day_index(timestamps) -> np.ndarray:
+    """Normalise candle timestamps (tz-aware or naive) to datetime64[D]."""
+    ts = pd.to_datetime(pd.Series(timestamps))
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_localize(None)
+    return ts.dt.normalize().values.astype("datetime64[D]")
+
+
+def _align(dates: np.ndarray, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (row positions, float32 closes) of df bars that fall on `dates`."""
+    days = _day_index(df["timestamp"])
+    closes = df["close"].to_numpy(dtype=np.float32)
+    pos = np.searchsorted(dates, days)
+    in_range = pos < len(dates)
+    hit = np.zeros(len(days), dtype=bool)
+    hit[in_range] = dates[pos[in_range]] == days[in_range]
+    return pos[hit], closes[hit]
+
+
+def forward_fill(panel: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column of a (days x instruments) panel."""
+    rows = np.arange(panel.shape[0])[:, None]
+    idx = np.where(np.isnan(panel), 0, rows)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return panel[idx, np.arange(panel.shape[1])]
+
+
+def fetch_price_panel(
+    connector,
+    instruments: Sequence[Dict[str, str]],
+    dates: np.ndarray,
+    days_back: int = UNIVERSE_DAYSBACK,
+    max_workers: int = UNIVERSE_MAX_WORKERS,
+    limiter: Optional[RateLimiter] = None,
+    progress_callback: Optional[Callable] = None,
+    quality: Optional[CandleQualityChecker] = None,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Fetch closes for every instrument into a float32 panel.
+
+    Workers only hold one candle frame at a time; each result is reduced to
+    its aligned close column before the next fetch, which keeps a ~2,000
+    symbol run at a few MB of panel memory. With `quality`, each frame's
+    timestamps and closes are also recorded (keyed by column index).
+
+    Returns:
+        (panel, failed_symbols)
+    """
+    limiter = limiter or get_shared_limiter()
+    panel = np.full((len(dates), len(instruments)), np.nan, dtype=np.float32)
+    failed = []
+    total = len(instruments)
+
+    def fetch(j):
+        inst = instruments[j]
+        limiter.acquire()
+        df = connector.get_historical_df(inst["token"], days_back)
+        if quality is not None:
+            quality.add(j, df)
+        if df is None or df.empty:
+            return j, None
+        return j, _align(dates, df)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch, j): j for j in range(total)}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            j = futures[fut]
+            try:
+                _, aligned = fut.result()
+            except Exception as e:
+                logger.warning(f"Universe fetch error ({instruments[j]['symbol']}): {e}")
+                aligned = None
+            if aligned is None:
+                failed.append(instruments[j]["symbol"])
+            else:
+                pos, closes = aligned
+                panel[pos, j] = closes
+            if progress_callback:
+                progress_callback(done, total, instruments[j]["symbol"])
+
+    return panel, failed
+
+
+async def fetch_price_panel_async(
+    client,
+    instruments: Sequence[Dict[str, str]],
+    dates: np.ndarray,
+    days_back: int = UNIVERSE_DAYSBACK,
+    progress_callback: Optional[Callable] = None,
+    quality: Optional[CandleQualityChecker] = None,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    fetch_price_panel() on an AsyncSmartAPIClient: every instrument is one
+    coroutine, bounded by the client's concurrency and rate limit.
+    """
+    panel = np.full((len(dates), len(instruments)), np.nan, dtype=np.float32)
+    failed = []
+    total = len(instruments)
+
+    async def fetch(j):
+        # as_completed() hides which coroutine failed, so errors map to j here
+        try:
+            df = await client.get_candles(instruments[j]["token"], days_back)
+            if quality is not None:
+                quality.add(j, df)
+            if df is None or df.empty:
+                return j, None
+            return j, _align(dates, df)
+        except Exception as e:
+            logger.warning(f"Universe fetch error ({instruments[j]['symbol']}): {e}")
+            return j, None
+
+    async with client:
+        tasks = [fetch(j) for j in range(total)]
+        for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+            j, aligned = await task
+            if aligned is None:
+                failed.append(instruments[j]["symbol"])
+            else:
+                pos, closes = aligned
+                panel[pos, j] = closes
+            if progress_callback:
+                progress_callback(done, total, instruments[j]["symbol"])
+
+    return panel, failed
+
+
+# ============================================================================
+# VECTORISED RS
+# ============================================================================
+
+def period_returns(closes: np.ndarray, period: int) -> np.ndarray:
+    """% return over `period` bars for the last row of a panel (or 1-D series)."""
+    if closes.shape[0] <= period:
+        return np.full(closes.shape[1:] or (1,), np.nan, dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (closes[-1] / closes[-period - 1] - 1.0) * 100.0
+
+
+def compute_rs_matrix(
+    panel: np.ndarray, bench: np.ndarray, periods: Sequence[int]
+) -> np.ndarray:
+    """RS (instrument return - benchmark return, %) as a (instruments x periods) array."""
+    out = np.empty((panel.shape[1], len(periods)), dtype=np.float32)
+    for k, p in enumerate(periods):
+        out[:, k] = period_returns(panel, p) - period_returns(bench, p)
+    return out
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+def universe_instruments(exchange: str = "NSE") -> List[Dict[str, str]]:
+    """All cash-equity symbols from the instrument registry."""
+    from instrument_registry import get_registry
+
+    registry = get_registry()
+    if not registry.available:
+        logger.error("Instrument index missing - run instrument_registry.py first")
+        return []
+    return registry.select(exchange, symbol_suffix="-EQ")
+
+
+def run_universe_rs(
+    connector,
+    benchmark_token,
+    rs_periods: Sequence[int] = DEFAULT_RS_PERIODS,
+    instruments: Optional[Sequence[Dict[str, str]]] = None,
+    max_workers: int = UNIVERSE_MAX_WORKERS,
+    output_path: Optional[str] = UNIVERSE_OUTPUT_FILE,
+    progress_callback: Optional[Callable] = None,
+    async_client=None,
+) -> pd.DataFrame:
+    """
+    Rank the full universe by RS.
+
+    Pass an (unopened) AsyncSmartAPIClient as `async_client` to fetch the
+    panel on an event loop instead of the `max_workers` thread pool.
+
+    Returns DataFrame with Symbol, Name, Token, LTP, Change, RS_<p>, the
+    rs_ratings rating/rank columns, Category, Quality and Rank (by
+    composite rank).
+    """
+    if instruments is None:
+        instruments = universe_instruments()
+    if not instruments:
+        return pd.DataFrame()
+
+    days_back = lookback_days(max(rs_periods) + 1)
+    bench_df = connector.get_historical_df(benchmark_token, days_back)
+    if bench_df is None or bench_df.empty:
+        logger.error("Benchmark data unavailable for universe run")
+        return pd.DataFrame()
+
+    dates = np.unique(_day_index(bench_df["timestamp"]))
+    bench = np.full(len(dates), np.nan, dtype=np.float32)
+    pos, closes = _align(dates, bench_df)
+    bench[pos] = closes
+
+    started = datetime.now()
+    quality = CandleQualityChecker()
+    if async_client is not None:
+        panel, failed = asyncio.run(fetch_price_panel_async(
+            async_client, instruments, dates, days_back,
+            progress_callback=progress_callback,
+            quality=quality,
+        ))
+    else:
+        panel, failed = fetch_price_panel(
+            connector, instruments, dates, days_back,
+            max_workers=max_workers,
+            progress_callback=progress_callback,
+            quality=quality,
+        )
+    flags = quality.flags()
+    panel = forward_fill(panel)
+
+    rs = compute_rs_matrix(panel, bench, rs_periods)
+
+    ltp = panel[-1]
+    prev = panel[-2] if len(panel) > 1 else ltp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(prev != 0, (ltp - prev) / prev * 100.0, 0.0)
+
+    positive = np.all(rs > 0, axis=1)
+    negative = np.all(rs < 0, axis=1)
+    category = np.select(
+        [positive, negative], ["Outperforming", "Underperforming"], default="Mixed"
+    )
+
+    df = pd.DataFrame({
+        "Symbol": [i["symbol"] for i in instruments],
+        "Name": [i.get("name", "") for i in instruments],
+        "Token": [i["token"] for i in instruments],
+        "LTP": np.round(ltp, 2),
+        "Change": np.round(change, 2),
+    })
+    for k, p in enumerate(rs_periods):
+        df[f"RS_{p}"] = np.round(rs[:, k], 2)
+    df["Category"] = category
+    df["Quality"] = [flags.get(j, "no_data") for j in range(len(instruments))]
+
+    df = add_rs_ratings(df[np.isfinite(ltp)])
+    df = df.sort_values("RS_Composite_Rank", na_position="last").reset_index(drop=True)
+    df.insert(0, "Rank", np.arange(1, len(df) + 1))
+    df["Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    elapsed = (datetime.now() - started).total_seconds()
+    logger.info(
+        f"Universe RS: {len(df)} ranked, {len(failed)} failed, "
+        f"panel {panel.nbytes / 1e6:.1f} MB, {elapsed:.0f}s"
+    )
+
+    if output_path:
+        df.to_csv(output_path, index=False)
+
+    return df
@@ -3,6 +3,8 @@ import os
 import threading
 from datetime import datetime
 
+from metrics import span
+
 LOCK = threading.Lock()
 
 USERS_FILE = "users_database.json"
@@ -25,12 +27,12 @@ class UserStore:
                 json.dump([], f, indent=2)
 
     def _load(self, path):
-        with LOCK:
+        with LOCK, span("io", store=os.path.basename(path), op="read"):
             with open(path, "r") as f:
                 return json.load(f)
 
     def _save(self, path, data):
-        with LOCK:
+        with LOCK, span("io", store=os.path.basename(path), op="write"):
             with open(path, "w") as f:
                 json.dump(data, f, indent=2)
 
@@ -1,23 +1,15 @@
 """
 Market Hours Utility
-Handles NSE market open / close logic (IST)
+Handles NSE market open / close logic (IST) via trading_calendar
 """
 
-from datetime import datetime
 import pytz
 
+from trading_calendar import get_trading_calendar
+
 IST = pytz.timezone("Asia/Kolkata")
 
 
 def is_market_open(now=None):
-    if now is None:
-        now = datetime.now(IST)
-
-    # Weekend
-    if now.weekday() >= 5:
-        return False
-
-    open_time = now.replace(hour=9, minute=15, second=0, microsecond=0)
-    close_time = now.replace(hour=15, minute=30, second=0, microsecond=0)
-
-    return open_time <= now <= close_time
+    # Weekends, NSE holidays and out-of-session times are all closed
+    return get_trading_calendar().is_open(now)
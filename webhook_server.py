@@ -1,11 +1,37 @@
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse
 import logging
+import os
 
+from metrics import get_registry, load_dumped_snapshot, prometheus_text
 from payment_processor import PaymentProcessor
 
 app = FastAPI()
 processor = PaymentProcessor()
 logger = logging.getLogger(__name__)
+get_registry().process = "webhook"
+
+
+def _metric_snapshots():
+    """This process's registry plus the one the Streamlit app last dumped."""
+    snapshots = [get_registry().snapshot()]
+    dumped = load_dumped_snapshot()
+    if dumped and dumped.get("pid") != os.getpid():
+        snapshots.append(dumped)
+    return snapshots
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        prometheus_text(_metric_snapshots()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/metrics.json")
+async def metrics_json():
+    return {"processes": _metric_snapshots()}
 
 
 @app.post("/webhook/cashfree")